@@ -1,14 +1,28 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, abort, g
+import hmac
 import secrets
 import uuid
 import os
+import json
 from dotenv import load_dotenv
+from markupsafe import Markup
 from utils.data_loader import TestDataLoader
+from utils.content_build import exam_navigation
+from utils.content_watcher import ContentWatcher
 from utils.results_tracker import ResultsTracker
 from utils.auth import init_auth, User, login_required_optional, get_current_user_email
-from utils.oauth_providers import init_oauth, get_oauth_providers, extract_user_info
+from utils.oauth_providers import get_oauth, get_oauth_providers, extract_user_info
 from flask_login import login_user, logout_user, current_user
 from config import calculate_timeout, get_timeout
+from utils.http_cache import (
+    make_etag, tree_fingerprint, conditional_response, static_max_age
+)
+from utils.fragment_cache import FragmentCache
+from utils.assets import AssetManifest, send_static_asset, compress_response
+from utils.instrumentation import Instrumentation
+from utils.metrics import render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from utils.background import BackgroundWriter
+from utils.sessions import init_sessions
 
 # Load environment variables
 load_dotenv()
@@ -22,18 +36,174 @@ app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HT
 app.config['PERMANENT_SESSION_LIFETIME'] = 86400  # 24 hours
 app.config['SESSION_REFRESH_EACH_REQUEST'] = True
 
+# Static files (diagrams, icons) are served with ETags by Flask; let browsers
+# reuse them for a while before revalidating
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = static_max_age()
+
 # Initialize data loader and results tracker
-data_loader = TestDataLoader(data_dir='data')
+data_loader = TestDataLoader.from_env(data_dir='data')
 results_tracker = ResultsTracker(
-    users_dir='users',
+    users_dir=os.getenv('USERS_DIR', 'users'),
     database_url=os.getenv('DATABASE_URL')
 )
 
-# Initialize authentication
-login_manager = init_auth(app, results_tracker)
+# Picks up new test content, config.json and content builds without a restart
+content_watcher = ContentWatcher.from_env(data_loader)
+
+# Per-request timing spans (Server-Timing header, per-route histograms, profiling)
+instrumentation = Instrumentation(app)
+instrumentation.instrument(data_loader, 'data')
+instrumentation.instrument(
+    results_tracker, 'storage',
+    exclude=('get_storage_stats', 'close_connections', 'new_vocabulary_note_id')
+)
+
+# Shared server-side sessions for multi-instance deployments (SESSION_BACKEND);
+# installed after instrumentation, which sets the default cookie interface
+init_sessions(app)
+
+# Non-critical writes (part results, last_accessed, vocabulary saves) run after
+# the response; reads of a user's data flush that user's pending writes first
+background_writer = BackgroundWriter.from_env(results_tracker)
+
+# Bearer token for /metrics; the endpoint does not exist when unset
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Fingerprinted/precompressed copies of static/ (built by scripts/build_assets.py)
+asset_manifest = AssetManifest(app.static_folder)
+app.jinja_env.globals['asset_url'] = asset_manifest.asset_url
+
+# Dynamic HTML/JSON bodies at least this large are gzipped per request
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+# Templates and the asset manifests only change on deploy — fingerprint them once
+# (config.json is reloaded with test content and covered by the content version)
+TEMPLATE_VERSION = tree_fingerprint(
+    os.path.join(app.root_path, 'templates'), asset_manifest.path, asset_manifest.image_path
+)
+
+
+def page_etag(*parts):
+    """ETag for a page built from test content plus the given per-request parts"""
+    return make_etag(data_loader.get_content_version(), TEMPLATE_VERSION, request.path, *parts)
+
+
+def current_user_key():
+    """Identify the logged-in user for ETags (pages show a login-dependent sidebar)"""
+    return current_user.get_id() if current_user.is_authenticated else ''
+
+
+# Rendered passage/question fragments, shared by every user of a part
+fragment_cache = FragmentCache(max_entries=int(os.getenv('FRAGMENT_CACHE_SIZE', 512)))
+
+# Partial holding the passage/question portion of each page, by (mode, template family)
+CONTENT_PARTIALS = {
+    ('practice', 'reading'): 'test_section_content_partial.html',
+    ('practice', 'listening'): 'listening_content_partial.html',
+    ('exam', 'reading'): 'test_content_partial.html',
+    ('exam', 'listening'): 'listening_test_mode_content_partial.html',
+}
+
+
+def render_part_content(mode, test_num, skill, part_num, **context):
+    """
+    Prepare a test part and render its shared content fragment
+    
+    Both depend only on test content, so they are built once per content
+    version and served from the fragment cache afterwards.  When a current
+    content build (scripts/build_content.py) has the fragment, it is used
+    instead of rendering.  Per-user state (saved answers, login sidebar) is
+    added by the page template.
+    
+    Args:
+        mode: 'practice' or 'exam'
+        test_num: Test number
+        skill: Skill name
+        part_num: Part number
+        **context: Extra content-derived template variables (navigation, progress)
+        
+    Returns:
+        tuple: (processed section data, rendered content HTML)
+    """
+    family = 'listening' if skill == 'listening' else 'reading'
+    template = CONTENT_PARTIALS[(mode, family)]
+    key = (
+        template, test_num, skill, part_num, tuple(sorted(context.items())),
+        data_loader.get_content_version(), TEMPLATE_VERSION,
+    )
+    
+    def render():
+        prebuilt = data_loader.get_prebuilt_fragment(
+            mode, test_num, skill, part_num, context, TEMPLATE_VERSION
+        )
+        if prebuilt is not None:
+            section, html = prebuilt
+            return section, Markup(html)
+        part = data_loader.load_part(test_num, skill, part_num)
+        section = prepare_test_data(
+            part, skill, part_num, require_answers=(mode == 'exam'), test_num=test_num
+        )
+        html = render_template(
+            template,
+            section=section,
+            test_num=test_num,
+            skill=skill,
+            part_num=part_num,
+            **context
+        )
+        return section, Markup(html)
+    
+    return fragment_cache.get_or_render(key, render)
+
+
+def image_fields(url):
+    """Template fields for a test-data image URL: fingerprinted src and responsive sources"""
+    return {
+        'image_url': asset_manifest.rewrite_url(url),
+        'image_sources': asset_manifest.image_sources(url),
+    }
+
+
+def diagram_sources(test_num, skill, diagram_image):
+    """Responsive <picture> sources for a reading diagram under static/images/"""
+    if not diagram_image:
+        return []
+    return asset_manifest.image_sources(f'images/test_{test_num}/{skill}/{diagram_image}')
+
+
+def serve_static(filename):
+    """Serve static files, using precompressed variants and immutable caching when built"""
+    return send_static_asset(app.static_folder, filename, app.get_send_file_max_age(filename))
+
+
+app.view_functions['static'] = serve_static
+
+
+@app.before_request
+def pin_content_snapshot():
+    """Serve the whole request from one version of test content and config"""
+    if request.endpoint == 'static':
+        return
+    if content_watcher is not None:
+        content_watcher.ensure_started()
+    g.content_token = data_loader.pin()
+
+
+@app.teardown_request
+def unpin_content_snapshot(exc=None):
+    token = g.pop('content_token', None)
+    if token is not None:
+        data_loader.unpin(token)
 
-# Initialize OAuth
-oauth = init_oauth(app)
+
+@app.after_request
+def compress_dynamic_response(response):
+    """Gzip large HTML/JSON pages such as the comprehensive answer key"""
+    return compress_response(response, min_size=COMPRESS_MIN_SIZE)
+
+
+# Initialize authentication (OAuth clients are created on the first login, see get_oauth)
+login_manager = init_auth(app, results_tracker)
 
 
 # ============================================================================
@@ -52,7 +222,7 @@ def login():
 def oauth_login(provider):
     """Initiate OAuth login with provider"""
     try:
-        oauth_provider = oauth.create_client(provider)
+        oauth_provider = get_oauth(app).create_client(provider)
         redirect_uri = url_for('oauth_callback', provider=provider, _external=True)
         return oauth_provider.authorize_redirect(redirect_uri)
     except Exception as e:
@@ -63,7 +233,7 @@ def oauth_login(provider):
 def oauth_callback(provider):
     """Handle OAuth callback from provider"""
     try:
-        oauth_provider = oauth.create_client(provider)
+        oauth_provider = get_oauth(app).create_client(provider)
         token = oauth_provider.authorize_access_token()
         
         # Get user info
@@ -83,6 +253,7 @@ def oauth_callback(provider):
         
         # Create or update user
         email = user_info['email']
+        background_writer.flush(email)
         profile = results_tracker.get_user_profile(email)
         
         # Update profile with OAuth info
@@ -196,6 +367,7 @@ def index():
     
     if current_user.is_authenticated:
         user_email = current_user.email
+        background_writer.flush(user_email)
         test_history = results_tracker.get_all_tests_summary(user_email)
     
     return render_template('test_list.html', 
@@ -230,15 +402,19 @@ def test_detail(test_num):
         # Calculate max possible score (38 questions for reading)
         reading_max = 38  # 11 + 8 + 9 + 10
     
-    return render_template('test_detail.html',
-                         test_num=test_num,
-                         reading_parts=reading_parts,
-                         writing_parts=writing_parts,
-                         listening_parts=listening_parts,
-                         speaking_parts=speaking_parts,
-                         session_scores=session_scores,
-                         reading_total=reading_total,
-                         reading_max=reading_max)
+    etag = page_etag(json.dumps(session_scores, sort_keys=True), current_user_key())
+    return conditional_response(
+        etag,
+        lambda: render_template('test_detail.html',
+                                test_num=test_num,
+                                reading_parts=reading_parts,
+                                writing_parts=writing_parts,
+                                listening_parts=listening_parts,
+                                speaking_parts=speaking_parts,
+                                session_scores=session_scores,
+                                reading_total=reading_total,
+                                reading_max=reading_max)
+    )
 
 
 @app.route('/test/<int:test_num>/exam')
@@ -276,7 +452,7 @@ def start_exam(test_num):
     # Create user in tracking system (only if logged in)
     user_email = get_current_user_email()
     if user_email:
-        results_tracker.get_or_create_user(user_email)
+        background_writer.submit(user_email, 'get_or_create_user', user_email=user_email)
     
     # Redirect to reading part 1
     return test_mode_part(test_num, 'reading', 1)
@@ -307,9 +483,22 @@ def clear_session():
 def test_mode_part(test_num, skill, part_num):
     """Display a test part in Test Mode (no going back, sequential only)"""
     try:
-        # Load test data
-        test_data = data_loader.load_test_part(test_num, skill, part_num)
-        processed_data = prepare_test_data(test_data, skill, part_num, require_answers=True)
+        # Last part of this skill, and the skill that follows it
+        available_parts = data_loader.list_available_parts(test_num, skill)
+        navigation = exam_navigation(data_loader.list_available_parts, test_num, skill, part_num)
+        is_last_part_of_skill = navigation['is_last_part_of_skill']
+        next_skill = navigation['next_skill']
+        
+        # Calculate progress
+        total_parts = len(available_parts)
+        progress = (part_num / total_parts) * 100 if total_parts > 0 else 0
+        
+        # Load test data and render the shared content fragment
+        processed_data, content_html = render_part_content(
+            'exam', test_num, skill, part_num,
+            is_last_part_of_skill=is_last_part_of_skill,
+            next_skill=next_skill
+        )
         
         # Save current position in session
         test_key = f'exam_{test_num}'
@@ -318,32 +507,12 @@ def test_mode_part(test_num, skill, part_num):
             session[test_key]['current_part'] = part_num
             session.modified = True
         
-        # Determine skill order and progress
-        skill_order = ['reading', 'listening', 'writing', 'speaking']
-        available_parts = data_loader.list_available_parts(test_num, skill)
-        
-        # Check if this is the last part of current skill
-        is_last_part_of_skill = (part_num == available_parts[-1]) if available_parts else False
-        
-        # Determine next skill
-        next_skill = None
-        if is_last_part_of_skill:
-            current_skill_index = skill_order.index(skill)
-            for i in range(current_skill_index + 1, len(skill_order)):
-                next_skill_candidate = skill_order[i]
-                if data_loader.list_available_parts(test_num, next_skill_candidate):
-                    next_skill = next_skill_candidate
-                    break
-        
-        # Calculate progress
-        total_parts = len(available_parts)
-        progress = (part_num / total_parts) * 100 if total_parts > 0 else 0
-        
         template = 'listening_test_mode_section.html' if skill == 'listening' else 'test_mode_section.html'
         
         return render_template(
             template,
             section=processed_data,
+            content_html=content_html,
             test_num=test_num,
             skill=skill,
             part_num=part_num,
@@ -369,26 +538,28 @@ def test_part(test_num, skill, part_num):
         part_num: Part number
     """
     try:
-        # Load test data from JSON
-        test_data = data_loader.load_test_part(test_num, skill, part_num)
-        
-        # Process the test data based on type
-        processed_data = prepare_test_data(test_data, skill, part_num)
-        
         # Get saved answers for this part from session
         test_key = f'test_{test_num}'
         saved_answers = session.get('answers', {}).get(test_key, {}).get(skill, {}).get(str(part_num), {})
         
-        template = 'listening_section.html' if skill == 'listening' else 'test_section.html'
+        def render():
+            # Load and process the test data, rendering the shared content fragment
+            processed_data, content_html = render_part_content('practice', test_num, skill, part_num)
+            
+            template = 'listening_section.html' if skill == 'listening' else 'test_section.html'
+            
+            return render_template(
+                template,
+                section=processed_data,
+                content_html=content_html,
+                test_num=test_num,
+                skill=skill,
+                part_num=part_num,
+                saved_answers=saved_answers
+            )
         
-        return render_template(
-            template,
-            section=processed_data,
-            test_num=test_num,
-            skill=skill,
-            part_num=part_num,
-            saved_answers=saved_answers
-        )
+        etag = page_etag(json.dumps(saved_answers, sort_keys=True), current_user_key())
+        return conditional_response(etag, render)
     except FileNotFoundError as e:
         return f"Test not found: {e}", 404
     except Exception as e:
@@ -406,28 +577,33 @@ def answer_key(test_num, skill, part_num):
         part_num: Part number
     """
     try:
-        # Load test data from JSON
-        test_data = data_loader.load_test_part(test_num, skill, part_num)
-        
-        # Process the test data for answer key display
-        processed_data = prepare_answer_key_data(test_data, skill, part_num)
-        
-        # Determine next part
-        next_part = None
-        skill_parts = data_loader.list_available_parts(test_num, skill)
-        if part_num in skill_parts:
-            current_index = skill_parts.index(part_num)
-            if current_index + 1 < len(skill_parts):
-                next_part = skill_parts[current_index + 1]
+        def render():
+            # Load the part's model
+            part = data_loader.load_part(test_num, skill, part_num)
+            
+            # Process the test data for answer key display
+            processed_data = prepare_answer_key_data(part, skill, part_num, test_num=test_num)
+            
+            # Determine next part
+            next_part = None
+            skill_parts = data_loader.list_available_parts(test_num, skill)
+            if part_num in skill_parts:
+                current_index = skill_parts.index(part_num)
+                if current_index + 1 < len(skill_parts):
+                    next_part = skill_parts[current_index + 1]
+            
+            return render_template(
+                'answer_key.html',
+                section=processed_data,
+                test_num=test_num,
+                skill=skill,
+                part_num=part_num,
+                next_part=next_part
+            )
         
-        return render_template(
-            'answer_key.html',
-            section=processed_data,
-            test_num=test_num,
-            skill=skill,
-            part_num=part_num,
-            next_part=next_part
-        )
+        # The same for every visitor, but the response still carries the session
+        # cookie (and Vary: Cookie), so it stays private like the other pages
+        return conditional_response(page_etag(), render)
     except FileNotFoundError as e:
         return f"Test not found: {e}", 404
     except Exception as e:
@@ -463,33 +639,31 @@ def comprehensive_answer_key(test_num, skill):
         unanswered = 0
         
         for part_num in skill_parts:
-            # Load test data
-            test_data = data_loader.load_test_part(test_num, skill, part_num)
-            all_questions = data_loader.get_all_questions(test_data)
-            correct_answer_map = data_loader.get_correct_answers(test_data)
+            # Load the part's model
+            part = data_loader.load_part(test_num, skill, part_num)
             
             # Get user's answers for this part
             part_answers = saved_answers.get(str(part_num), {})
             
             # Build questions list with answers
             questions_list = []
-            for q in all_questions:
-                q_id = q['id']  # Use int
+            for q in part.questions:
+                q_id = q.id  # Use int
                 q_id_str = str(q_id)  # String version for part_answers lookup
-                correct_idx = correct_answer_map.get(q_id)
+                correct_idx = q.answer
                 # Convert user answer to int if it's a string
                 user_answer_idx = part_answers.get(q_id_str)
                 if user_answer_idx is not None:
                     user_answer_idx = int(user_answer_idx) if isinstance(user_answer_idx, str) else user_answer_idx
                 
                 # Get answer texts
-                correct_answer_text = q['options'][correct_idx] if correct_idx is not None else '—'
-                user_answer_text = q['options'][user_answer_idx] if user_answer_idx is not None and user_answer_idx < len(q['options']) else None
+                correct_answer_text = q.options[correct_idx] if correct_idx is not None else '—'
+                user_answer_text = q.options[user_answer_idx] if user_answer_idx is not None and user_answer_idx < len(q.options) else None
                 
                 is_correct = user_answer_idx == correct_idx if user_answer_idx is not None else False
                 
                 questions_list.append({
-                    'question_text': f"Q{q['id']}. {q.get('text', q.get('question', ''))}",
+                    'question_text': f"Q{q.id}. {q.text or ''}",
                     'correct_answer_text': correct_answer_text,
                     'user_answer_text': user_answer_text,
                     'is_correct': is_correct
@@ -505,26 +679,13 @@ def comprehensive_answer_key(test_num, skill):
             
             part_entry = {
                 'part_num': part_num,
-                'title': test_data.get('title', f'Part {part_num}'),
+                'title': part.title or f'Part {part_num}',
                 'questions': questions_list
             }
-            if test_data.get('transcript'):
-                part_entry['transcript'] = test_data['transcript']
+            if part.transcript:
+                part_entry['transcript'] = part.transcript
             if skill == 'listening':
-                audio_passages = []
-                layout = test_data.get('layout', '')
-                if layout == 'per_question_audio' and test_data.get('sub_parts'):
-                    for sp in test_data['sub_parts']:
-                        audio_passages.append({
-                            'title': sp.get('title', sp.get('id', '')),
-                            'audio_url': sp.get('passageAudioUrl', '')
-                        })
-                elif test_data.get('mediaUrl'):
-                    audio_passages.append({
-                        'title': test_data.get('title', 'Passage'),
-                        'audio_url': test_data['mediaUrl']
-                    })
-                part_entry['audio_passages'] = audio_passages
+                part_entry['audio_passages'] = audio_passages(part)
             parts_data.append(part_entry)
         
         # Calculate summary
@@ -550,187 +711,167 @@ def comprehensive_answer_key(test_num, skill):
         return jsonify({'error': str(e)}), 500
 
 
-def prepare_test_data(test_data, skill, part_num, require_answers=False):
+def prepare_test_data(part, skill, part_num, require_answers=False, test_num=None):
     """
     Prepare test data for rendering
     
     Args:
-        test_data: Raw test data from JSON
+        part: Part model (data_loader.load_part)
         skill: Skill name
         part_num: Part number
+        require_answers: Whether the part must define correct answers (Test Mode)
+        test_num: Test number, used to locate responsive diagram variants
         
     Returns:
         dict: Processed data ready for template
     """
-    # Get all questions
-    all_questions = data_loader.get_all_questions(test_data)
-    num_questions = len(all_questions)
+    num_questions = len(part.questions)
     
     # Calculate timeout (use JSON value if present, otherwise calculate)
-    timeout = test_data.get('timeout_minutes')
+    timeout = part.timeout_minutes
     if timeout is None:
         # Auto-calculate if not specified in JSON
-        timeout = get_timeout(test_data['part'], skill, part_num, num_questions)
+        timeout = get_timeout(
+            part.part, skill, part_num, num_questions, config=data_loader.get_config()
+        )
     
     processed = {
-        'title': f"Part {part_num}: {test_data['title']}",
-        'instructions': test_data['instructions'],
+        'title': f"Part {part_num}: {part.title}",
+        'instructions': part.instructions,
         'timeout_minutes': timeout,
-        'type': test_data['type'],
-        'questions': all_questions,
+        'type': part.type,
+        # Answers stay out of what pages are rendered from
+        'questions': [{'id': q.id, 'text': q.text, 'options': q.options} for q in part.questions],
         'num_questions': num_questions
     }
     
     # Process based on test type
-    if test_data['type'] == 'correspondence':
+    if part.type == 'correspondence':
         # Part 1: Reading Correspondence
-        passage_section = data_loader.get_section_by_type(test_data, 'passage')
-        response_section = data_loader.get_section_by_type(test_data, 'response_passage')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
+        passage_section = part.section('passage')
+        response_section = part.section('response_passage')
+        questions_section = part.section('questions')
         
         if passage_section:
-            processed['passage'] = passage_section['content']
+            processed['passage'] = passage_section.content
         
         if questions_section:
             processed['questions_1_6_html'] = data_loader.build_question_dropdown_html(
-                questions_section['questions'],
+                questions_section.questions,
                 require_answers=require_answers
             )
         
         if response_section:
             processed['response_passage'] = data_loader.process_dropdown_content(
-                response_section['content'],
-                response_section['questions']
+                response_section.content,
+                response_section.questions
             )
-            processed['section_divider_text'] = response_section.get('instruction_text', '')
+            processed['section_divider_text'] = response_section.instruction_text
     
-    elif test_data['type'] == 'diagram':
+    elif part.type == 'diagram':
         # Part 2: Reading to Apply a Diagram
-        diagram_section = data_loader.get_section_by_type(test_data, 'diagram_email')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
+        diagram_section = part.section('diagram_email')
+        questions_section = part.section('questions')
         
         processed['has_diagram'] = True
         
         if diagram_section:
-            processed['diagram_image'] = diagram_section.get('diagram_image')
+            processed['diagram_image'] = diagram_section.diagram_image
+            processed['diagram_sources'] = diagram_sources(test_num, skill, processed['diagram_image'])
             processed['email_content'] = data_loader.process_dropdown_content(
-                diagram_section['content'],
-                diagram_section['questions']
+                diagram_section.content,
+                diagram_section.questions
             )
         
         if questions_section:
             processed['questions_6_8_html'] = data_loader.build_question_dropdown_html(
-                questions_section['questions'],
+                questions_section.questions,
                 require_answers=require_answers
             )
     
-    elif test_data['type'] == 'information':
+    elif part.type == 'information':
         # Part 3: Reading for Information
-        passage_section = data_loader.get_section_by_type(test_data, 'passage')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
+        passage_section = part.section('passage')
+        questions_section = part.section('questions')
         
         processed['is_information_type'] = True
         
         if passage_section:
-            processed['passage'] = passage_section['content']
-            processed['passage_note'] = passage_section.get('note', '')
+            processed['passage'] = passage_section.content
+            processed['passage_note'] = passage_section.note
         
         if questions_section:
             processed['questions_html'] = data_loader.build_question_dropdown_html(
-                questions_section['questions'],
+                questions_section.questions,
                 test_type='information',
                 require_answers=require_answers
             )
     
-    elif test_data['type'] == 'viewpoints':
+    elif part.type == 'viewpoints':
         # Part 4: Reading for Viewpoints
-        passage_section = data_loader.get_section_by_type(test_data, 'passage')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
-        response_section = data_loader.get_section_by_type(test_data, 'response_passage')
+        passage_section = part.section('passage')
+        questions_section = part.section('questions')
+        response_section = part.section('response_passage')
         
         processed['is_viewpoints_type'] = True
         
         if passage_section:
-            processed['passage'] = passage_section['content']
+            processed['passage'] = passage_section.content
         
         if questions_section:
             processed['questions_html'] = data_loader.build_question_dropdown_html(
-                questions_section['questions'],
+                questions_section.questions,
                 require_answers=require_answers
             )
         
         if response_section:
             processed['response_passage'] = data_loader.process_dropdown_content(
-                response_section['content'],
-                response_section['questions']
+                response_section.content,
+                response_section.questions
             )
-            processed['response_title'] = response_section.get('title', 'Response')
-            processed['section_divider_text'] = response_section.get('instruction_text', '')
+            processed['response_title'] = response_section.title or 'Response'
+            processed['section_divider_text'] = response_section.instruction_text
     
-    elif test_data['type'] == 'listening':
+    elif part.type == 'listening':
         processed['is_listening_type'] = True
-        processed['media_type'] = test_data.get('mediaType', 'audio')
-        processed['media_url'] = test_data.get('mediaUrl', '')
-        processed['image_url'] = test_data.get('imageUrl', '')
-        processed['image_alt'] = test_data.get('imageAlt', 'Listening illustration')
-        processed['layout'] = test_data.get('layout', 'split')
-
-        if processed['layout'] == 'per_question_audio':
-            for q in processed['questions']:
-                q['audio_url'] = q.get('audioUrl', '')
+        processed['media_type'] = part.media_type
+        processed['media_url'] = part.media_url
+        processed.update(image_fields(part.image_url))
+        processed['image_alt'] = part.image_alt or 'Listening illustration'
+        processed['layout'] = part.layout
 
+        if part.layout == 'per_question_audio':
             steps = []
-            sub_parts = test_data.get('sub_parts', [])
-            if sub_parts:
-                for sp in sub_parts:
+            if part.sub_parts:
+                for sp in part.sub_parts:
                     steps.append({
                         'type': 'passage',
-                        'sub_part_id': sp['id'],
-                        'title': sp['title'],
-                        'audio_url': sp.get('passageAudioUrl', ''),
-                        'image_url': sp.get('imageUrl', processed['image_url']),
+                        'sub_part_id': sp.id,
+                        'title': sp.title,
+                        'audio_url': sp.audio_url,
+                        **image_fields(sp.image_url),
                     })
-                    for q in sp.get('questions', []):
-                        q_step = {
-                            'type': 'question',
-                            'id': q['id'],
-                            'audio_url': q.get('audioUrl', ''),
-                            'text': q.get('text', ''),
-                            'options': q.get('options', []),
-                        }
-                        if q.get('imageUrl'):
-                            q_step['image_url'] = q['imageUrl']
-                        steps.append(q_step)
+                    steps.extend(question_step(q) for q in sp.questions)
             else:
                 steps.append({
                     'type': 'passage',
                     'title': processed['title'],
-                    'audio_url': processed['media_url'],
-                    'image_url': processed['image_url'],
+                    'audio_url': part.media_url,
+                    **image_fields(part.image_url),
                 })
-                for q in processed['questions']:
-                    q_step = {
-                        'type': 'question',
-                        'id': q['id'],
-                        'audio_url': q.get('audio_url', q.get('audioUrl', '')),
-                        'text': q.get('text', ''),
-                        'options': q.get('options', []),
-                    }
-                    if q.get('imageUrl'):
-                        q_step['image_url'] = q['imageUrl']
-                    steps.append(q_step)
+                steps.extend(question_step(q) for q in part.questions)
             processed['steps'] = steps
 
-        if processed['layout'] == 'full_questions':
+        if part.layout == 'full_questions':
             dropdown_html = ''
-            for q in processed['questions']:
-                q_id = q['id']
+            for q in part.questions:
+                q_id = q.id
                 dropdown_html += f'<div class="question-inline">'
                 dropdown_html += f'<span class="question-number">{q_id}.</span> '
-                dropdown_html += f'<span class="question-label">{q["text"]}</span> '
+                dropdown_html += f'<span class="question-label">{q.text}</span> '
                 dropdown_html += f'<select class="inline-dropdown" name="q{q_id}" data-question="{q_id}">'
                 dropdown_html += '<option value="">-- Select --</option>'
-                for idx, option in enumerate(q.get('options', [])):
+                for idx, option in enumerate(q.options):
                     dropdown_html += f'<option value="{idx}">{option}</option>'
                 dropdown_html += '</select>'
                 dropdown_html += '</div>'
@@ -739,179 +880,152 @@ def prepare_test_data(test_data, skill, part_num, require_answers=False):
     return processed
 
 
-def prepare_answer_key_data(test_data, skill, part_num):
+def question_step(question):
+    """One question step of a per_question_audio listening part"""
+    step = {
+        'type': 'question',
+        'id': question.id,
+        'audio_url': question.audio_url,
+        'text': question.text or '',
+        'options': question.options,
+    }
+    if question.image_url:
+        step.update(image_fields(question.image_url))
+    return step
+
+
+def answer_key_question(question, embedded=False):
+    """
+    Answer key entry of a question
+    
+    Args:
+        embedded: The question is a blank in a passage (see Question.label)
+    """
+    return {
+        'id': question.id,
+        'text': question.label(embedded),
+        'options': list(enumerate(question.options)),
+        'correct_answer': question.answer
+    }
+
+
+def audio_passages(part):
+    """Recordings of a listening part: one per sub-part, else the part's own"""
+    if part.layout == 'per_question_audio' and part.sub_parts:
+        return [{'title': sp.title, 'audio_url': sp.audio_url} for sp in part.sub_parts]
+    if part.media_url:
+        return [{'title': part.title or 'Passage', 'audio_url': part.media_url}]
+    return []
+
+
+def prepare_answer_key_data(part, skill, part_num, test_num=None):
     """
     Prepare test data for answer key display
     
     Args:
-        test_data: Raw test data from JSON
+        part: Part model (data_loader.load_part)
         skill: Skill name
         part_num: Part number
+        test_num: Test number, used to locate responsive diagram variants
         
     Returns:
         dict: Processed data ready for answer key template
     """
-    # Get all questions
-    all_questions = data_loader.get_all_questions(test_data)
-    correct_answers = data_loader.get_correct_answers(test_data)
-    
     processed = {
-        'title': f"Part {part_num}: {test_data['title']}",
-        'instructions': test_data['instructions'],
-        'type': test_data['type'],
+        'title': f"Part {part_num}: {part.title}",
+        'instructions': part.instructions,
+        'type': part.type,
         'all_questions': []
     }
     
     # Process based on test type
-    if test_data['type'] == 'correspondence':
+    if part.type == 'correspondence':
         # Part 1: Reading Correspondence
-        passage_section = data_loader.get_section_by_type(test_data, 'passage')
-        response_section = data_loader.get_section_by_type(test_data, 'response_passage')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
+        passage_section = part.section('passage')
+        response_section = part.section('response_passage')
+        questions_section = part.section('questions')
         
         if passage_section:
-            processed['passage'] = passage_section['content']
+            processed['passage'] = passage_section.content
         
         processed['questions_1_6'] = []
         processed['questions_7_11'] = []
         
         if questions_section:
-            for q in questions_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('text', q.get('question', f"Question {q['id']}")),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                processed['questions_1_6'].append(q_data)
-        
-        if response_section and 'questions' in response_section:
-            for q in response_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('question', f"Question {q['id']}"),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                processed['questions_7_11'].append(q_data)
+            processed['questions_1_6'] = [answer_key_question(q) for q in questions_section.questions]
+        
+        if response_section:
+            processed['questions_7_11'] = [
+                answer_key_question(q, embedded=True) for q in response_section.questions
+            ]
     
-    elif test_data['type'] == 'diagram':
+    elif part.type == 'diagram':
         # Part 2: Reading to Apply a Diagram
-        diagram_section = data_loader.get_section_by_type(test_data, 'diagram_email')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
+        diagram_section = part.section('diagram_email')
+        questions_section = part.section('questions')
         
         processed['has_diagram'] = True
         
         if diagram_section:
-            processed['diagram_image'] = diagram_section.get('diagram_image')
-            processed['email_text'] = diagram_section['content']
-        
-        # Collect all questions
-        if diagram_section and 'questions' in diagram_section:
-            for q in diagram_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('question', f"Question {q['id']}"),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                processed['all_questions'].append(q_data)
+            processed['diagram_image'] = diagram_section.diagram_image
+            processed['diagram_sources'] = diagram_sources(test_num, skill, processed['diagram_image'])
+            processed['email_text'] = diagram_section.content
+            # Collect all questions
+            processed['all_questions'].extend(
+                answer_key_question(q, embedded=True) for q in diagram_section.questions
+            )
         
         if questions_section:
-            for q in questions_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('text', q.get('question', f"Question {q['id']}")),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                processed['all_questions'].append(q_data)
+            processed['all_questions'].extend(answer_key_question(q) for q in questions_section.questions)
     
-    elif test_data['type'] == 'information':
+    elif part.type == 'information':
         # Part 3: Reading for Information
-        passage_section = data_loader.get_section_by_type(test_data, 'passage')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
+        passage_section = part.section('passage')
+        questions_section = part.section('questions')
         
         processed['is_information_type'] = True
         
         if passage_section:
-            processed['passage'] = passage_section['content']
-            processed['passage_note'] = passage_section.get('note', '')
+            processed['passage'] = passage_section.content
+            processed['passage_note'] = passage_section.note
         
         if questions_section:
-            for q in questions_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('text', q.get('question', f"Question {q['id']}")),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                processed['all_questions'].append(q_data)
+            processed['all_questions'] = [answer_key_question(q) for q in questions_section.questions]
     
-    elif test_data['type'] == 'viewpoints':
+    elif part.type == 'viewpoints':
         # Part 4: Reading for Viewpoints
-        passage_section = data_loader.get_section_by_type(test_data, 'passage')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
-        response_section = data_loader.get_section_by_type(test_data, 'response_passage')
+        passage_section = part.section('passage')
+        questions_section = part.section('questions')
+        response_section = part.section('response_passage')
         
         processed['is_viewpoints_type'] = True
         
         if passage_section:
-            processed['passage'] = passage_section['content']
+            processed['passage'] = passage_section.content
         
         if questions_section:
-            for q in questions_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('text', q.get('question', f"Question {q['id']}")),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                processed['all_questions'].append(q_data)
+            processed['all_questions'] = [answer_key_question(q) for q in questions_section.questions]
         
         processed['response_passage_questions'] = []
-        if response_section and 'questions' in response_section:
-            processed['response_title'] = response_section.get('title', 'Response')
-            processed['section_divider_text'] = response_section.get('instruction_text', '')
-            
-            for q in response_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('question', f"Question {q['id']}"),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                processed['response_passage_questions'].append(q_data)
-    
-    elif test_data['type'] == 'listening':
+        if response_section and response_section.questions:
+            processed['response_title'] = response_section.title or 'Response'
+            processed['section_divider_text'] = response_section.instruction_text
+            processed['response_passage_questions'] = [
+                answer_key_question(q, embedded=True) for q in response_section.questions
+            ]
+    
+    elif part.type == 'listening':
         processed['is_listening_type'] = True
-        processed['transcript'] = test_data.get('transcript', '')
-        questions_section = data_loader.get_section_by_type(test_data, 'questions')
-        
-        processed['audio_passages'] = []
-        layout = test_data.get('layout', '')
-        if layout == 'per_question_audio' and test_data.get('sub_parts'):
-            for sp in test_data['sub_parts']:
-                processed['audio_passages'].append({
-                    'title': sp.get('title', sp.get('id', '')),
-                    'audio_url': sp.get('passageAudioUrl', '')
-                })
-        elif test_data.get('mediaUrl'):
-            processed['audio_passages'].append({
-                'title': test_data.get('title', 'Passage'),
-                'audio_url': test_data['mediaUrl']
-            })
+        processed['transcript'] = part.transcript
+        questions_section = part.section('questions')
+        
+        processed['audio_passages'] = audio_passages(part)
         
         if questions_section:
-            for q in questions_section['questions']:
-                q_data = {
-                    'id': q['id'],
-                    'text': q.get('text', q.get('question', f"Question {q['id']}")),
-                    'options': [(idx, opt) for idx, opt in enumerate(q['options'])],
-                    'correct_answer': correct_answers.get(q['id'])
-                }
-                if q.get('imageUrl'):
-                    q_data['image_url'] = q['imageUrl']
+            for q in questions_section.questions:
+                q_data = answer_key_question(q)
+                if q.image_url:
+                    q_data.update(image_fields(q.image_url))
                 processed['all_questions'].append(q_data)
     
     return processed
@@ -931,9 +1045,8 @@ def submit_test_mode():
     is_last_part = data.get('is_last_part', False)
     
     try:
-        # Load test data and calculate score
-        test_data = data_loader.load_test_part(test_num, skill, part_num)
-        correct_answers = data_loader.get_correct_answers(test_data)
+        # Look up the answer key and calculate score
+        correct_answers = data_loader.get_answer_key(test_num, skill, part_num)
         
         # Convert answers keys to int for comparison
         int_answers = {int(k): int(v) for k, v in answers.items()}
@@ -961,7 +1074,8 @@ def submit_test_mode():
         # Save to JSON tracking if user email is set
         if 'user_email' in session:
             attempt_id = session[test_key].get('attempt_id', str(uuid.uuid4()))
-            results_tracker.save_test_result(
+            background_writer.submit(
+                session['user_email'], 'save_test_result',
                 user_email=session['user_email'],
                 test_num=test_num,
                 skill=skill,
@@ -981,8 +1095,7 @@ def submit_test_mode():
             # Calculate skill total
             skill_scores = session[test_key]['scores'][skill]
             skill_total = sum(skill_scores.values())
-            skill_max = sum([len(data_loader.get_all_questions(data_loader.load_test_part(test_num, skill, p))) 
-                           for p in skill_parts])
+            skill_max = sum(data_loader.count_questions(test_num, skill, p) for p in skill_parts)
             skill_percentage = round((skill_total / skill_max) * 100, 1) if skill_max > 0 else 0
             
             # Check if this is the last skill
@@ -1004,7 +1117,7 @@ def submit_test_mode():
                     # Calculate max for this skill
                     skill_parts_list = data_loader.list_available_parts(test_num, completed_skill)
                     for p in skill_parts_list:
-                        max_score_total += len(data_loader.get_all_questions(data_loader.load_test_part(test_num, completed_skill, p)))
+                        max_score_total += data_loader.count_questions(test_num, completed_skill, p)
                 
                 session[test_key]['completed'] = True
                 session[test_key]['total_score'] = total_score
@@ -1014,7 +1127,8 @@ def submit_test_mode():
                 # Mark attempt as completed in JSON tracking
                 if 'user_email' in session:
                     attempt_id = session[test_key].get('attempt_id', str(uuid.uuid4()))
-                    results_tracker.complete_test_attempt(
+                    background_writer.submit(
+                        session['user_email'], 'complete_test_attempt',
                         user_email=session['user_email'],
                         test_num=test_num,
                         attempt_id=attempt_id
@@ -1071,11 +1185,8 @@ def submit_answers():
     part_num = data.get('part_num')
     
     try:
-        # Load test data
-        test_data = data_loader.load_test_part(test_num, skill, part_num)
-        
         # Get correct answers (returns {int: int})
-        correct_answers = data_loader.get_correct_answers(test_data)
+        correct_answers = data_loader.get_answer_key(test_num, skill, part_num)
         
         # Convert answers keys to int for comparison
         int_answers = {int(k): int(v) for k, v in answers.items()}
@@ -1125,8 +1236,7 @@ def submit_answers():
         skill_total = sum(skill_scores.values())
         # Calculate max possible score for all available parts
         try:
-            skill_max = sum([len(data_loader.get_all_questions(data_loader.load_test_part(test_num, skill, p))) 
-                             for p in skill_parts])
+            skill_max = sum(data_loader.count_questions(test_num, skill, p) for p in skill_parts)
         except:
             skill_max = len(skill_parts) * 10  # Fallback estimation
         
@@ -1311,15 +1421,20 @@ def save_vocabulary_note():
             if field not in data:
                 return jsonify({'success': False, 'error': f'Missing field: {field}'}), 400
         
-        # Save note
-        note_id = results_tracker.save_vocabulary_note(
+        # Save note (in the background; the id is assigned up front)
+        test_num = int(data['test_num'])
+        part_num = int(data['part_num'])
+        note_id = results_tracker.new_vocabulary_note_id(test_num, data['skill'], part_num)
+        background_writer.submit(
+            current_user.email, 'save_vocabulary_note',
             user_email=current_user.email,
-            test_num=int(data['test_num']),
+            test_num=test_num,
             skill=data['skill'],
-            part_num=int(data['part_num']),
+            part_num=part_num,
             word=data['word'],
             definition=data['definition'],
-            context=data.get('context', '')
+            context=data.get('context', ''),
+            note_id=note_id
         )
         
         return jsonify({
@@ -1347,6 +1462,7 @@ def get_vocabulary_notes_route():
         part_num = request.args.get('part_num', type=int)
         
         # Get notes
+        background_writer.flush(current_user.email)
         notes = results_tracker.get_vocabulary_notes(
             user_email=current_user.email,
             test_num=test_num,
@@ -1380,6 +1496,7 @@ def delete_vocabulary_note_route():
             return jsonify({'success': False, 'error': 'Missing note_id'}), 400
         
         # Delete note
+        background_writer.flush(current_user.email)
         deleted = results_tracker.delete_vocabulary_note(
             user_email=current_user.email,
             note_id=note_id
@@ -1416,6 +1533,7 @@ def update_vocabulary_note_route():
             return jsonify({'success': False, 'error': 'Missing note_id'}), 400
         
         # Update note
+        background_writer.flush(current_user.email)
         updated = results_tracker.update_vocabulary_note(
             user_email=current_user.email,
             note_id=note_id,
@@ -1449,6 +1567,7 @@ def vocabulary_notes_page(test_num):
     
     try:
         # Get all notes for this test
+        background_writer.flush(current_user.email)
         notes = results_tracker.get_vocabulary_notes(
             user_email=current_user.email,
             test_num=test_num
@@ -1494,6 +1613,37 @@ def vocabulary_notes_page(test_num):
         return f"Error loading vocabulary notes: {str(e)}", 500
 
 
+
+# ============================================================================
+# MONITORING
+# ============================================================================
+
+@app.route('/metrics')
+def metrics():
+    """
+    Prometheus metrics: request latency per route, storage and cache statistics
+    
+    Requires METRICS_TOKEN, sent as "Authorization: Bearer <token>" (never in
+    the query string, which ends up in access logs). Returns 404 when
+    METRICS_TOKEN is not configured.
+    """
+    if not METRICS_TOKEN:
+        abort(404)
+    
+    auth_header = request.headers.get('Authorization', '')
+    supplied = auth_header[7:] if auth_header.startswith('Bearer ') else ''
+    if not hmac.compare_digest(supplied.encode('utf-8'), METRICS_TOKEN.encode('utf-8')):
+        return 'Unauthorized', 401, {'WWW-Authenticate': 'Bearer'}
+    
+    body = render_metrics(
+        instrumentation,
+        results_tracker.get_storage_stats(),
+        {'fragments': fragment_cache.stats()},
+        background_writer.stats(),
+    )
+    return body, 200, {'Content-Type': METRICS_CONTENT_TYPE, 'Cache-Control': 'no-store'}
+
+
 if __name__ == '__main__':
     import os
     import sys
@@ -0,0 +1,38 @@
+"""
+ASGI entry point.
+
+Serves the Flask app from an asyncio server (uvicorn). This is not async
+request handling: the app and its storage are synchronous, so a2wsgi runs
+each request on a pool of ASGI_THREADS threads, the same model as
+gunicorn's gthread workers. uvicorn's event loop only holds the
+connections, which helps when many clients keep slow or idle keep-alive
+connections open. docs/DEPLOYMENT.md says when to use this entry point
+instead of gunicorn.
+
+uvicorn and a2wsgi are in requirements.txt.
+
+Usage:
+  uvicorn asgi:asgi_app --host 0.0.0.0 --port $PORT --workers 2
+
+DB_POOL_MAX defaults to ASGI_THREADS plus the background writer threads,
+so concurrent requests do not queue on the PostgreSQL connection pool.
+"""
+
+import os
+
+# Requests one worker process can run concurrently
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))
+
+# One PostgreSQL connection per request thread plus one per background writer
+# thread (see utils/background.py); must be set before the app opens its pool
+_background_threads = (
+    0 if os.getenv('BACKGROUND_WRITES', 'thread').lower() == 'off'
+    else int(os.getenv('BACKGROUND_WORKERS', 2))
+)
+os.environ.setdefault('DB_POOL_MAX', str(ASGI_THREADS + _background_threads))
+
+from a2wsgi import WSGIMiddleware  # noqa: E402
+
+from app import app  # noqa: E402
+
+asgi_app = WSGIMiddleware(app, workers=ASGI_THREADS)
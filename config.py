@@ -3,46 +3,102 @@ Configuration for CELPIP Test Application
 
 This module loads configuration from config.json and provides
 utility functions for accessing configuration values.
+
+The loaded configuration is a snapshot: load_config() keeps returning the
+same dict until refresh_config() (called by the content watcher, see
+utils/content_watcher.py) finds that config.json changed and replaces it.
+Snapshots are never modified in place, so a caller holding one sees a
+consistent configuration.
 """
 
+import hashlib
 import json
+import logging
 import os
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # Path to config file
 CONFIG_FILE = Path(__file__).parent / 'config.json'
 
-# Cache for loaded config
+# Default configuration if the file doesn't exist
+DEFAULT_CONFIG = {
+    'time_per_question': {
+        'reading': 1.5,
+        'writing': 30.0,
+        'speaking': 1.5,
+        'listening': 1.5
+    },
+    'default_time_per_question': 1.5,
+    'time_adjustments': {}
+}
+
+# (file modification time and size, config dict, config version) of the last load
 _config_cache = None
 
 
-def load_config():
+def _file_signature():
+    try:
+        stat = CONFIG_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def refresh_config():
     """
-    Load configuration from config.json
+    Re-read config.json if it changed since it was last loaded
+    
+    A file that cannot be parsed (e.g. saved half-way) is reported and the
+    previous configuration kept.
     
     Returns:
-        dict: Configuration dictionary
+        tuple: (configuration dict, config version: 16 hex characters)
     """
     global _config_cache
     
-    if _config_cache is None:
-        if CONFIG_FILE.exists():
+    cached = _config_cache
+    signature = _file_signature()
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+    
+    if signature is None:
+        config = DEFAULT_CONFIG
+    else:
+        try:
             with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                _config_cache = json.load(f)
-        else:
-            # Default configuration if file doesn't exist
-            _config_cache = {
-                'time_per_question': {
-                    'reading': 1.5,
-                    'writing': 30.0,
-                    'speaking': 1.5,
-                    'listening': 1.5
-                },
-                'default_time_per_question': 1.5,
-                'time_adjustments': {}
-            }
+                config = json.load(f)
+        except ValueError as exc:
+            if cached is None:
+                raise
+            logger.error("Keeping the previous configuration: %s is invalid: %s", CONFIG_FILE, exc)
+            return cached[1], cached[2]
     
-    return _config_cache
+    version = hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    _config_cache = (signature, config, version)
+    return config, version
+
+
+def load_config():
+    """
+    Load configuration from config.json
+    
+    Returns:
+        dict: Configuration dictionary (the current snapshot; treat as read-only)
+    """
+    cached = _config_cache
+    if cached is None:
+        return refresh_config()[0]
+    return cached[1]
+
+
+def config_version():
+    """Short hash of the current configuration, for cache keys and ETags"""
+    cached = _config_cache
+    if cached is None:
+        return refresh_config()[1]
+    return cached[2]
 
 
 def reload_config():
@@ -82,30 +138,33 @@ def get_config_value(key_path, default=None):
     return value
 
 
-def get_time_per_question(skill):
+def get_time_per_question(skill, config=None):
     """
     Get the time allocation per question for a specific skill
     
     Args:
         skill: Skill name ('reading', 'writing', 'speaking', 'listening')
+        config: Configuration snapshot to use (default: the current one)
         
     Returns:
         float: Minutes per question
     """
-    config = load_config()
+    if config is None:
+        config = load_config()
     time_per_q = config.get('time_per_question', {})
     default = config.get('default_time_per_question', 1.5)
     
     return time_per_q.get(skill.lower(), default)
 
 
-def calculate_timeout(num_questions, skill='reading'):
+def calculate_timeout(num_questions, skill='reading', config=None):
     """
     Calculate timeout for a test part
     
     Args:
         num_questions: Number of questions in the part
         skill: Skill name (default: 'reading')
+        config: Configuration snapshot to use (default: the current one)
         
     Returns:
         float: Total timeout in minutes
@@ -116,11 +175,11 @@ def calculate_timeout(num_questions, skill='reading'):
         >>> calculate_timeout(8, 'reading')
         12.0
     """
-    time_per_q = get_time_per_question(skill)
+    time_per_q = get_time_per_question(skill, config)
     return num_questions * time_per_q
 
 
-def get_timeout(test_num, skill, part_num, num_questions):
+def get_timeout(test_num, skill, part_num, num_questions, config=None):
     """
     Get timeout for a specific test part
     
@@ -132,13 +191,15 @@ def get_timeout(test_num, skill, part_num, num_questions):
         skill: Skill name
         part_num: Part number
         num_questions: Number of questions
+        config: Configuration snapshot to use (default: the current one)
         
     Returns:
         float: Timeout in minutes
     """
-    base_timeout = calculate_timeout(num_questions, skill)
+    if config is None:
+        config = load_config()
+    base_timeout = calculate_timeout(num_questions, skill, config)
     
-    config = load_config()
     adjustments = config.get('time_adjustments', {})
     
     key = f"{skill}_part{part_num}"
@@ -0,0 +1,122 @@
+"""
+Gunicorn configuration.
+
+Picks a worker profile with GUNICORN_PROFILE and sizes it from the CPUs
+available to the process:
+
+  sync (default)     workers = 2 x CPUs + 1, one request at a time each.
+                     Fastest in scripts/bench_exam_flow.py runs on file
+                     storage, where requests are CPU-bound.
+  gthread            workers = CPUs + 1, GUNICORN_THREADS threads each (default 4).
+                     Threads overlap the blocking file / PostgreSQL I/O of
+                     autosaves and submissions; benchmark it against your
+                     database before switching.
+  gevent             workers = CPUs, GUNICORN_WORKER_CONNECTIONS greenlets each
+                     (default 200). Needs `pip install gevent psycogreen`.
+
+WEB_CONCURRENCY overrides the worker count. The app is preloaded in the
+master (GUNICORN_PRELOAD=0 disables) and every test part is parsed before
+forking, so workers share the parsed content copy-on-write. Workers are
+recycled after GUNICORN_MAX_REQUESTS requests (plus random jitter) to bound
+memory growth, and get GUNICORN_GRACEFUL_TIMEOUT seconds to finish
+in-flight requests on restart.
+
+Usage:
+  gunicorn app:app -c gunicorn.conf.py
+  GUNICORN_PROFILE=gthread gunicorn app:app -c gunicorn.conf.py
+"""
+
+import gc
+import os
+import sys
+
+profile = os.getenv('GUNICORN_PROFILE', 'sync').lower()
+if profile not in ('gthread', 'gevent', 'sync'):
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE {profile!r} (expected gthread, gevent or sync)")
+
+if profile == 'gevent':
+    # Patch before the app (and requests/ssl) is imported by preload_app
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def _background_threads():
+    """Threads the BackgroundWriter runs in each worker (see utils/background.py)"""
+    if os.getenv('BACKGROUND_WRITES', 'thread').lower() == 'off':
+        return 0
+    return int(os.getenv('BACKGROUND_WORKERS', 2))
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+_cpus = _cpu_count()
+_default_workers = {'gthread': _cpus + 1, 'gevent': _cpus, 'sync': 2 * _cpus + 1}[profile]
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', _default_workers))
+
+if profile == 'gthread':
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+    _request_threads = threads
+elif profile == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+else:
+    worker_class = 'sync'
+    _request_threads = 1
+
+if profile != 'gevent':
+    # One PostgreSQL connection per request thread plus one per background
+    # writer thread, so requests never queue on the pool behind background writes
+    os.environ.setdefault('DB_POOL_MAX', str(_request_threads + _background_threads()))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+# Recycle workers to bound memory growth; jitter avoids restarting them all at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout; off by default
+errorlog = '-'
+
+
+def when_ready(server):
+    """Warm the shared content (parsed parts or mapped store) before workers fork."""
+    if not server.cfg.preload_app:
+        return
+    import app as app_module
+
+    parts = app_module.data_loader.preload()
+    # Connections must not be shared across processes; workers reopen their own
+    app_module.results_tracker.close_connections()
+    # Keep the warmed objects out of the collector so gc passes in workers
+    # do not write to (and un-share) their pages
+    gc.freeze()
+    server.log.info("Preloaded %d test parts (profile=%s, workers=%d)", parts, profile, workers)
+
+
+def post_fork(server, worker):
+    if profile == 'gevent':
+        try:
+            # psycopg2 blocks the whole worker unless made gevent-aware
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen not installed: PostgreSQL calls block gevent workers")
+
+
+def worker_exit(server, worker):
+    """Finish queued background writes before the worker process exits."""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.background_writer.drain()
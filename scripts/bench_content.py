@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for TestDataLoader and the view-model builders.
+
+Times, for every part under data/ and for synthetic scaled-up parts:
+  TestDataLoader.load_test_part
+  TestDataLoader.load_part
+  Part.from_dict (building a part's model, done once per load)
+  TestDataLoader.get_all_questions
+  TestDataLoader.get_correct_answers
+  TestDataLoader.build_question_dropdown_html
+  TestDataLoader.process_dropdown_content
+  app.prepare_test_data
+  app.prepare_answer_key_data
+
+"corpus" cases run the function once over every real part (one call = the
+whole data/ tree); "synthetic" cases use copies of test 1's parts scaled to
+--questions questions with passages repeated --passage-factor times, written
+to a temporary data directory.  Each case reports the best and median time
+per call over --repeat timing rounds.
+
+Results can be saved as a baseline and later compared, so loader and
+rendering optimizations are judged by numbers:
+
+Usage:
+  python scripts/bench_content.py
+
+  # Only the prepare_* builders
+  python scripts/bench_content.py --filter prepare_
+
+  # Save a baseline, then compare after a change (fails above x1.10 median)
+  python scripts/bench_content.py --save bench/content_baseline.json
+  python scripts/bench_content.py --compare bench/content_baseline.json --threshold 1.1
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.content_model import Part  # noqa: E402
+from utils.data_loader import TestDataLoader  # noqa: E402
+
+
+SKILLS = ('reading', 'listening')
+
+# Test number used for the synthetic parts (well clear of real content)
+SYNTHETIC_TEST = 9001
+
+DROPDOWN_PATTERN = re.compile(r'__DROPDOWN_(\d+)__')
+
+
+# ============================================================================
+# SYNTHETIC CONTENT
+# ============================================================================
+
+def scale_part(data, min_questions, passage_factor):
+    """
+    Scale a part up to at least *min_questions* questions
+
+    Every questions list is repeated with fresh sequential ids, dropdown
+    placeholders are renumbered to match, sub_parts are repeated alongside,
+    and passages/transcripts without placeholders are repeated
+    *passage_factor* times.
+
+    Args:
+        data: Original part JSON
+        min_questions: Minimum number of questions in the result
+        passage_factor: Repetitions of plain passage text
+
+    Returns:
+        dict: New part JSON
+    """
+    data = copy.deepcopy(data)
+    sections = data.get('sections', [])
+    total = sum(len(s.get('questions', [])) for s in sections) or 1
+    factor = max(1, math.ceil(min_questions / total))
+
+    # id_maps[r][old_id] -> new id in repetition r
+    id_maps = [{} for _ in range(factor)]
+    next_id = 1
+    for section in sections:
+        for r in range(factor):
+            for question in section.get('questions', []):
+                id_maps[r][question['id']] = next_id
+                next_id += 1
+
+    def renumber(questions, r):
+        renumbered = []
+        for question in questions:
+            question = copy.deepcopy(question)
+            question['id'] = id_maps[r].get(question['id'], question['id'])
+            renumbered.append(question)
+        return renumbered
+
+    for section in sections:
+        if 'questions' in section:
+            original = section['questions']
+            section['questions'] = [q for r in range(factor) for q in renumber(original, r)]
+        content = section.get('content')
+        if content:
+            if DROPDOWN_PATTERN.search(content):
+                section['content'] = '\n\n'.join(
+                    DROPDOWN_PATTERN.sub(
+                        lambda m, r=r: f"__DROPDOWN_{id_maps[r].get(int(m.group(1)), m.group(1))}__",
+                        content,
+                    )
+                    for r in range(factor)
+                )
+            else:
+                section['content'] = '\n\n'.join([content] * passage_factor)
+
+    if data.get('sub_parts'):
+        original = data['sub_parts']
+        data['sub_parts'] = [
+            dict(sp, id=f"{sp['id']}.{r + 1}", questions=renumber(sp.get('questions', []), r))
+            for r in range(factor) for sp in original
+        ]
+
+    if isinstance(data.get('transcript'), str):
+        data['transcript'] = '\n\n'.join([data['transcript']] * passage_factor)
+
+    return data
+
+
+def write_synthetic_data(source_loader, target_dir, source_test, min_questions, passage_factor):
+    """
+    Write scaled copies of *source_test*'s parts under target_dir/test_<SYNTHETIC_TEST>/
+
+    Returns:
+        list: [(skill, part_num), ...] written
+    """
+    written = []
+    for skill in SKILLS:
+        for part_num in source_loader.list_available_parts(source_test, skill):
+            data = source_loader.load_test_part(source_test, skill, part_num)
+            scaled = scale_part(data, min_questions, passage_factor)
+            out_dir = Path(target_dir) / f'test_{SYNTHETIC_TEST}' / skill
+            out_dir.mkdir(parents=True, exist_ok=True)
+            with open(out_dir / f'part{part_num}.json', 'w', encoding='utf-8') as f:
+                json.dump(scaled, f, ensure_ascii=False, indent=2)
+            written.append((skill, part_num))
+    return written
+
+
+# ============================================================================
+# CASES
+# ============================================================================
+
+def dropdown_inputs(part):
+    """Sections of a reading part that the two dropdown builders operate on"""
+    if part.type == 'listening':
+        return [], []
+    placeholder_sections = [
+        s for s in part.sections
+        if s.questions and DROPDOWN_PATTERN.search(s.content)
+    ]
+    questions_section = part.section('questions')
+    standalone = questions_section.questions if questions_section else ()
+    return placeholder_sections, standalone
+
+
+def make_cases(loader, parts, label):
+    """
+    Build benchmark callables for a set of parts
+
+    Args:
+        loader: TestDataLoader whose data_dir holds *parts*
+        parts: [(test_num, skill, part_num), ...]
+        label: Dataset label used in case names
+
+    Returns:
+        dict: {case name: zero-argument callable}
+    """
+    import app as app_module
+
+    loaded = [(t, s, p, loader.load_test_part(t, s, p)) for t, s, p in parts]
+    models = [(t, s, p, loader.load_part(t, s, p)) for t, s, p in parts]
+    inputs = [(part, *dropdown_inputs(part)) for _, _, _, part in models]
+
+    def load_all():
+        for t, s, p in parts:
+            loader.load_test_part(t, s, p)
+
+    def load_models():
+        for t, s, p in parts:
+            loader.load_part(t, s, p)
+
+    def build_models():
+        for _, _, _, data in loaded:
+            Part.from_dict(data)
+
+    def all_questions():
+        for _, _, _, data in loaded:
+            loader.get_all_questions(data)
+
+    def correct_answers():
+        for _, _, _, data in loaded:
+            loader.get_correct_answers(data)
+
+    def question_dropdowns():
+        for part, _, standalone in inputs:
+            if standalone:
+                test_type = 'information' if part.type == 'information' else 'default'
+                loader.build_question_dropdown_html(standalone, test_type=test_type)
+
+    def dropdown_content():
+        for _, placeholder_sections, _ in inputs:
+            for section in placeholder_sections:
+                loader.process_dropdown_content(section.content, section.questions)
+
+    def prepare_test():
+        for t, s, p, part in models:
+            app_module.prepare_test_data(part, s, p, test_num=t)
+
+    def prepare_answer_key():
+        for t, s, p, part in models:
+            app_module.prepare_answer_key_data(part, s, p, test_num=t)
+
+    cases = {
+        f'load_test_part [{label}]': load_all,
+        f'load_part [{label}]': load_models,
+        f'Part.from_dict [{label}]': build_models,
+        f'get_all_questions [{label}]': all_questions,
+        f'get_correct_answers [{label}]': correct_answers,
+        f'build_question_dropdown_html [{label}]': question_dropdowns,
+        f'process_dropdown_content [{label}]': dropdown_content,
+        f'prepare_test_data [{label}]': prepare_test,
+        f'prepare_answer_key_data [{label}]': prepare_answer_key,
+    }
+    # Drop builders with nothing to do for these parts (e.g. listening)
+    if not any(standalone for _, _, standalone in inputs):
+        del cases[f'build_question_dropdown_html [{label}]']
+    if not any(placeholders for _, placeholders, _ in inputs):
+        del cases[f'process_dropdown_content [{label}]']
+    return cases
+
+
+def measure(func, repeat, min_time):
+    """
+    Time *func* with timeit
+
+    Returns:
+        dict: best_us, median_us (per call) and number of calls per round
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(number, int(math.ceil(number * min_time / max(elapsed, 1e-9))))
+    rounds = timer.repeat(repeat=repeat, number=number)
+    per_call = [t / number * 1e6 for t in rounds]
+    return {
+        'best_us': round(min(per_call), 2),
+        'median_us': round(statistics.median(per_call), 2),
+        'calls': number,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark TestDataLoader and the view-model builders",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--data-dir', default=str(PROJECT_ROOT / 'data'),
+                        help='Content to benchmark (default: ./data)')
+    parser.add_argument('--questions', type=int, default=120,
+                        help='Minimum questions per synthetic part (default: 120)')
+    parser.add_argument('--passage-factor', type=int, default=20,
+                        help='Repetitions of passage text in synthetic parts (default: 20)')
+    parser.add_argument('--source-test', type=int, default=1,
+                        help='Test whose parts are scaled up (default: 1)')
+    parser.add_argument('--no-synthetic', action='store_true', help='Only benchmark real content')
+    parser.add_argument('--filter', help='Only run cases whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing rounds per case (default: 5)')
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='Minimum seconds per timing round (default: 0.1)')
+    parser.add_argument('--save', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', help='Baseline JSON to compare median times against')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='Fail if a median exceeds baseline by this factor (default: 1.1)')
+    args = parser.parse_args()
+
+    # app.py resolves templates/, data/ and users/ relative to the working directory
+    os.chdir(PROJECT_ROOT)
+
+    loader = TestDataLoader(data_dir=args.data_dir)
+    corpus = [
+        (t, s, p)
+        for t in loader.list_available_tests()
+        for s in SKILLS
+        for p in loader.list_available_parts(t, s)
+    ]
+    cases = make_cases(loader, corpus, f'corpus, {len(corpus)} parts')
+
+    synthetic_dir = None
+    if not args.no_synthetic:
+        synthetic_dir = tempfile.mkdtemp(prefix='celpip-bench-content-')
+        written = write_synthetic_data(
+            loader, synthetic_dir, args.source_test, args.questions, args.passage_factor
+        )
+        synthetic_loader = TestDataLoader(data_dir=synthetic_dir)
+        for skill, part_num in written:
+            cases.update(make_cases(
+                synthetic_loader, [(SYNTHETIC_TEST, skill, part_num)],
+                f'synthetic {skill} part{part_num}'
+            ))
+
+    if args.filter:
+        cases = {name: func for name, func in cases.items() if args.filter in name}
+
+    print(f"{'Case':70s} {'best µs':>11s} {'median µs':>11s} {'calls':>7s}")
+    print("-" * 102)
+    results = {}
+    try:
+        for name, func in cases.items():
+            results[name] = measure(func, args.repeat, args.min_time)
+            row = results[name]
+            print(f"{name:70s} {row['best_us']:11.1f} {row['median_us']:11.1f} {row['calls']:7d}")
+    finally:
+        if synthetic_dir:
+            shutil.rmtree(synthetic_dir, ignore_errors=True)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'questions': args.questions,
+                    'passage_factor': args.passage_factor,
+                    'source_test': args.source_test,
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        print(f"\n{'Case':70s} {'baseline':>11s} {'now':>11s} {'ratio':>7s}")
+        print("-" * 102)
+        regressions = []
+        for name, row in results.items():
+            base = baseline.get(name)
+            if not base or not base['median_us']:
+                continue
+            ratio = row['median_us'] / base['median_us']
+            flag = '  REGRESSION' if ratio > args.threshold else ''
+            print(f"{name:70s} {base['median_us']:11.1f} {row['median_us']:11.1f} {ratio:6.2f}x{flag}")
+            if flag:
+                regressions.append(name)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than x{args.threshold} baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Load-test / benchmark harness for the Test Mode (exam) flow.
+
+Each simulated session replays what a candidate does:
+  POST /set_user_email                          (results are persisted)
+  GET  /test/N/exam                             (start exam, reading part 1)
+  for every reading and listening part:
+    GET  /test/N/exam/<skill>/part<P>
+    POST /save_test_mode_answer                 (autosave, once per question)
+    POST /submit_test_mode
+  GET  /test/N/<skill>/answer-key               (comprehensive answer key)
+
+Latency is recorded per route and reported as p50/p95/p99 plus requests
+per second, so a change can be compared against a saved baseline before
+deploy.
+
+Two drivers:
+  • in-process (default) — Flask test client, no network or server needed.
+    Storage is chosen here: a throwaway file-storage directory, or
+    PostgreSQL via --database-url (use a local scratch database).
+  • --url — drives a running server (gunicorn, Render preview) over HTTP
+    with `requests`; storage is whatever that server is configured with.
+Both can fan out over several worker processes with --processes.
+
+Usage:
+  # File storage, 20 sessions of test 1
+  python scripts/bench_exam_flow.py --sessions 20
+
+  # Local PostgreSQL
+  python scripts/bench_exam_flow.py --storage postgres \\
+      --database-url postgresql://localhost/celpip_bench
+
+  # 4 processes x 25 sessions against a running server
+  gunicorn app:app --workers 4 --bind 127.0.0.1:8000 &
+  python scripts/bench_exam_flow.py --url http://127.0.0.1:8000 --processes 4 --sessions 25
+
+  # Save a baseline, later fail if any route's p95 regresses by more than 20%
+  python scripts/bench_exam_flow.py --output bench/baseline.json
+  python scripts/bench_exam_flow.py --compare bench/baseline.json --threshold 1.2
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.data_loader import TestDataLoader  # noqa: E402
+
+
+SKILLS = ('reading', 'listening')
+
+# Only the p95 of routes with at least this many samples is compared to a baseline
+MIN_SAMPLES_FOR_COMPARE = 5
+
+
+# ============================================================================
+# SESSION PLAN
+# ============================================================================
+
+def build_plan(data_dir, test_num):
+    """
+    List the parts and question ids a session walks through
+
+    Returns:
+        list: [(skill, part_num, [question_id, ...]), ...] in exam order
+    """
+    loader = TestDataLoader(data_dir=str(data_dir))
+    plan = []
+    for skill in SKILLS:
+        for part_num in loader.list_available_parts(test_num, skill):
+            test_data = loader.load_test_part(test_num, skill, part_num)
+            question_ids = sorted(loader.get_correct_answers(test_data))
+            plan.append((skill, part_num, question_ids))
+    return plan
+
+
+def run_session(client, plan, test_num, session_id, rng):
+    """
+    Replay one exam session
+
+    Args:
+        client: Object with get(label, path) / post(label, path, json) methods
+        plan: Output of build_plan()
+        test_num: Test number
+        session_id: Used to build a unique candidate email
+        rng: random.Random for reproducible answers
+    """
+    client.post('POST /set_user_email', '/set_user_email',
+                {'email': f'bench-{session_id}@example.com'})
+    client.get('GET /test/<n>/exam', f'/test/{test_num}/exam')
+
+    skill_parts = defaultdict(list)
+    for skill, part_num, _ in plan:
+        skill_parts[skill].append(part_num)
+
+    for skill, part_num, question_ids in plan:
+        client.get('GET /test/<n>/exam/<skill>/part<p>',
+                   f'/test/{test_num}/exam/{skill}/part{part_num}')
+        answers = {}
+        for question_id in question_ids:
+            answer = rng.randrange(4)
+            answers[str(question_id)] = answer
+            client.post('POST /save_test_mode_answer', '/save_test_mode_answer', {
+                'test_num': test_num, 'skill': skill, 'part_num': part_num,
+                'question_id': question_id, 'answer': answer,
+            })
+        client.post('POST /submit_test_mode', '/submit_test_mode', {
+            'answers': answers, 'test_num': test_num, 'skill': skill, 'part_num': part_num,
+            'is_last_part': part_num == skill_parts[skill][-1],
+        })
+
+    for skill in skill_parts:
+        client.get('GET /test/<n>/<skill>/answer-key', f'/test/{test_num}/{skill}/answer-key')
+
+
+# ============================================================================
+# DRIVERS
+# ============================================================================
+
+class TimedClient:
+    """Wraps a test client or requests.Session and records latency per route label"""
+
+    def __init__(self, get, post):
+        self._get = get
+        self._post = post
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def _timed(self, label, call):
+        start = time.perf_counter()
+        status = call()
+        self.samples[label].append(time.perf_counter() - start)
+        if status >= 400:
+            self.errors[label] += 1
+
+    def get(self, label, path):
+        self._timed(label, lambda: self._get(path))
+
+    def post(self, label, path, payload):
+        self._timed(label, lambda: self._post(path, payload))
+
+
+def inprocess_client_factory(storage, database_url, users_dir):
+    """
+    Import the app with the selected storage
+
+    Storage is configured through the environment before the import, so the
+    results tracker, the login user loader and the background writer all use
+    it. Background writes are switched off: every save runs inside the
+    request being timed and nothing is left running once the temporary
+    users directory is removed.
+
+    Returns:
+        callable: Creates a TimedClient around a fresh test client (new cookie jar)
+    """
+    os.environ['USERS_DIR'] = users_dir
+    os.environ['BACKGROUND_WRITES'] = 'off'
+    if storage == 'postgres':
+        os.environ['DATABASE_URL'] = database_url
+    else:
+        os.environ.pop('DATABASE_URL', None)
+
+    import app as app_module
+
+    app_module.app.config['TESTING'] = True
+
+    def factory():
+        client = app_module.app.test_client()
+        return TimedClient(
+            get=lambda path: client.get(path).status_code,
+            post=lambda path, payload: client.post(path, json=payload).status_code,
+        )
+    return factory
+
+
+def http_client_factory(base_url):
+    """
+    Returns:
+        callable: Creates a TimedClient around a new requests.Session for *base_url*
+    """
+    import requests
+
+    base_url = base_url.rstrip('/')
+
+    def factory():
+        http = requests.Session()
+        return TimedClient(
+            get=lambda path: http.get(base_url + path).status_code,
+            post=lambda path, payload: http.post(base_url + path, json=payload).status_code,
+        )
+    return factory
+
+
+def worker(args):
+    """
+    Run a batch of sessions in one process
+
+    Returns:
+        tuple: (samples {label: [seconds]}, errors {label: count}, wall seconds)
+    """
+    (worker_id, options, plan) = args
+    if options['url']:
+        client_factory = http_client_factory(options['url'])
+    else:
+        client_factory = inprocess_client_factory(
+            options['storage'], options['database_url'], options['users_dir']
+        )
+
+    # Each session gets a fresh client (new cookie jar = new candidate)
+    rng = random.Random(options['seed'] + worker_id)
+    for i in range(options['warmup']):
+        run_session(client_factory(), plan, options['test_num'],
+                    f'{options["run_id"]}-warmup-{worker_id}-{i}', rng)
+
+    start = time.perf_counter()
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    for i in range(options['sessions']):
+        timed = client_factory()
+        run_session(timed, plan, options['test_num'], f'{options["run_id"]}-{worker_id}-{i}', rng)
+        for label, values in timed.samples.items():
+            samples[label].extend(values)
+        for label, count in timed.errors.items():
+            errors[label] += count
+    return dict(samples), dict(errors), time.perf_counter() - start
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, errors, wall_seconds):
+    """
+    Build per-route statistics
+
+    Returns:
+        dict: {label: {count, errors, p50_ms, p95_ms, p99_ms, mean_ms, rps}}
+    """
+    report = {}
+    all_values = []
+    for label, values in sorted(samples.items()):
+        ordered = sorted(values)
+        all_values.extend(ordered)
+        report[label] = {
+            'count': len(ordered),
+            'errors': errors.get(label, 0),
+            'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+            'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+            'rps': round(len(ordered) / wall_seconds, 1) if wall_seconds else 0.0,
+        }
+    all_values.sort()
+    report['ALL'] = {
+        'count': len(all_values),
+        'errors': sum(errors.values()),
+        'p50_ms': round(percentile(all_values, 50) * 1000, 2),
+        'p95_ms': round(percentile(all_values, 95) * 1000, 2),
+        'p99_ms': round(percentile(all_values, 99) * 1000, 2),
+        'mean_ms': round(sum(all_values) / len(all_values) * 1000, 2) if all_values else 0.0,
+        'rps': round(len(all_values) / wall_seconds, 1) if wall_seconds else 0.0,
+    }
+    return report
+
+
+def print_report(report):
+    print(f"{'Route':42s} {'count':>6s} {'err':>4s} {'p50 ms':>8s} {'p95 ms':>8s} "
+          f"{'p99 ms':>8s} {'mean ms':>8s} {'req/s':>8s}")
+    print("-" * 98)
+    for label, row in report.items():
+        if label == 'ALL':
+            print("-" * 98)
+        print(f"{label:42s} {row['count']:6d} {row['errors']:4d} {row['p50_ms']:8.2f} "
+              f"{row['p95_ms']:8.2f} {row['p99_ms']:8.2f} {row['mean_ms']:8.2f} {row['rps']:8.1f}")
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare p95 latency per route with a baseline report
+
+    Returns:
+        list: Descriptions of routes whose p95 grew by more than *threshold*
+    """
+    regressions = []
+    for label, row in report.items():
+        base = baseline.get(label)
+        if not base or row['count'] < MIN_SAMPLES_FOR_COMPARE or not base['p95_ms']:
+            continue
+        ratio = row['p95_ms'] / base['p95_ms']
+        if ratio > threshold:
+            regressions.append(f"{label}: p95 {base['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Test Mode flow and report latency per route",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--test', type=int, default=1, help='Test number to replay (default: 1)')
+    parser.add_argument('--sessions', type=int, default=10, help='Measured sessions per process (default: 10)')
+    parser.add_argument('--warmup', type=int, default=1, help='Unmeasured sessions per process first (default: 1)')
+    parser.add_argument('--processes', type=int, default=1, help='Worker processes (default: 1)')
+    parser.add_argument('--storage', choices=['file', 'postgres'], default='file',
+                        help='Storage for the in-process driver (default: file, in a temp dir)')
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help='PostgreSQL URL for --storage postgres (or BENCH_DATABASE_URL)')
+    parser.add_argument('--url', help='Benchmark a running server at this base URL instead')
+    parser.add_argument('--data-dir', default=str(PROJECT_ROOT / 'data'),
+                        help='Test content used to build the answers (default: ./data)')
+    parser.add_argument('--seed', type=int, default=1234, help='Random seed for answers (default: 1234)')
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    parser.add_argument('--compare', help='Baseline JSON report to compare p95 latency against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Fail if a route p95 exceeds baseline by this factor (default: 1.2)')
+    args = parser.parse_args()
+
+    if args.storage == 'postgres' and not args.database_url and not args.url:
+        print("ERROR: --storage postgres needs --database-url")
+        sys.exit(1)
+
+    # The app resolves data/, templates/ and users/ relative to the working directory
+    os.chdir(PROJECT_ROOT)
+
+    plan = build_plan(args.data_dir, args.test)
+    if not plan:
+        print(f"ERROR: Test {args.test} has no reading or listening parts in {args.data_dir}")
+        sys.exit(1)
+
+    users_dir = tempfile.mkdtemp(prefix='celpip-bench-users-')
+    options = {
+        'url': args.url,
+        'storage': args.storage,
+        'database_url': args.database_url,
+        'users_dir': users_dir,
+        'test_num': args.test,
+        'sessions': args.sessions,
+        'warmup': args.warmup,
+        'seed': args.seed,
+        'run_id': f'{int(time.time())}',
+    }
+
+    requests_per_session = 2 + len(SKILLS) + sum(2 + len(q) for _, _, q in plan)
+    target = args.url or (f'in-process, {args.storage} storage'
+                          + (f' ({users_dir})' if args.storage == 'file' else ''))
+    print(f"Benchmarking test {args.test}: {len(plan)} parts, ~{requests_per_session} requests/session")
+    print(f"Target:    {target}")
+    print(f"Load:      {args.processes} process(es) x {args.sessions} sessions (+{args.warmup} warmup)")
+    print("=" * 98)
+
+    jobs = [(worker_id, options, plan) for worker_id in range(args.processes)]
+    start = time.perf_counter()
+    try:
+        if args.processes == 1:
+            results = [worker(jobs[0])]
+        else:
+            with multiprocessing.get_context('spawn').Pool(args.processes) as pool:
+                results = pool.map(worker, jobs)
+    finally:
+        shutil.rmtree(users_dir, ignore_errors=True)
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    for worker_samples, worker_errors, _ in results:
+        for label, values in worker_samples.items():
+            samples[label].extend(values)
+        for label, count in worker_errors.items():
+            errors[label] += count
+    # Processes run concurrently, so throughput is measured against the slowest one
+    wall_seconds = max(r[2] for r in results) if results else time.perf_counter() - start
+
+    report = summarize(samples, errors, wall_seconds)
+    print_report(report)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {k: v for k, v in options.items() if k != 'users_dir'},
+                       'routes': report}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    exit_code = 1 if report['ALL']['errors'] else 0
+    if report['ALL']['errors']:
+        print(f"\n{report['ALL']['errors']} requests failed (HTTP >= 400)")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['routes']
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nREGRESSIONS (p95 > x{args.threshold} baseline):")
+            for line in regressions:
+                print(f"  {line}")
+            exit_code = 1
+        else:
+            print(f"\nNo p95 regressions against {args.compare} (threshold x{args.threshold})")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
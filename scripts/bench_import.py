@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for app.py.
+
+Starts a fresh Python interpreter --runs times and measures, in each:
+  import   — `import app` (module imports plus startup wiring)
+  first    — the first GET request through the Flask test client
+  total    — interpreter start to first response
+then reports the median and best of each, and the modules that contribute
+most to import time (from `python -X importtime`).
+
+Cold start matters on free-tier instances that spin down when idle: the
+first visitor waits for the whole import before seeing a page.
+
+Usage:
+  python scripts/bench_import.py
+  python scripts/bench_import.py --runs 20 --path /login
+
+  # Save a baseline, then compare after a change (fails above x1.10 median)
+  python scripts/bench_import.py --save bench/import_baseline.json
+  python scripts/bench_import.py --compare bench/import_baseline.json --threshold 1.1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside each fresh interpreter; prints one JSON line
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+response = app_module.app.test_client().get(sys.argv[1])
+t2 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'first_ms': (t2 - t1) * 1000,
+    'status': response.status_code,
+    'modules': len(sys.modules),
+}))
+"""
+
+
+def run_probe(path, env):
+    """Run the probe in a fresh interpreter and return its measurements"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, path],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(1)
+    row = json.loads(result.stdout.strip().splitlines()[-1])
+    row['total_ms'] = elapsed
+    return row
+
+
+def import_offenders(env, top):
+    """
+    Modules with the largest cumulative import time under `import app`
+
+    Returns:
+        list: [(module, cumulative ms), ...] for top-level imports of app.py
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        try:
+            cumulative_us = int(cumulative.strip())
+        except ValueError:
+            continue  # header line
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        # depth 1: imported directly by app.py (or by the interpreter itself)
+        if depth == 1:
+            rows.append((name.strip(), cumulative_us / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top]
+
+
+def summarize(rows, key):
+    values = [row[key] for row in rows]
+    return {'median_ms': round(statistics.median(values), 2), 'best_ms': round(min(values), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure cold import and first-request time of app.py",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters to start (default: 10)')
+    parser.add_argument('--path', default='/', help='Path of the first request (default: /)')
+    parser.add_argument('--top', type=int, default=10, help='Import offenders to list (default: 10)')
+    parser.add_argument('--save', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', help='Baseline JSON to compare median times against')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='Fail if a median exceeds baseline by this factor (default: 1.1)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+
+    # One untimed run so .pyc files exist, as they do on a deployed instance
+    run_probe(args.path, env)
+    rows = [run_probe(args.path, env) for _ in range(args.runs)]
+
+    results = {key: summarize(rows, f'{key}_ms') for key in ('import', 'first', 'total')}
+    print(f"Cold start of app.py over {args.runs} fresh interpreters "
+          f"(first request: GET {args.path} -> {rows[-1]['status']}, {rows[-1]['modules']} modules loaded)")
+    print(f"{'Phase':10s} {'median ms':>11s} {'best ms':>11s}")
+    print("-" * 34)
+    for key, row in results.items():
+        print(f"{key:10s} {row['median_ms']:11.1f} {row['best_ms']:11.1f}")
+
+    print("\nLargest imports (cumulative ms, one run):")
+    for name, ms in import_offenders(env, args.top):
+        print(f"  {ms:8.1f}  {name}")
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {'runs': args.runs, 'path': args.path}, 'results': results}, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        print(f"\n{'Phase':10s} {'baseline':>11s} {'now':>11s} {'ratio':>7s}")
+        print("-" * 42)
+        regressions = []
+        for key, row in results.items():
+            base = baseline.get(key)
+            if not base or not base['median_ms']:
+                continue
+            ratio = row['median_ms'] / base['median_ms']
+            flag = '  REGRESSION' if ratio > args.threshold else ''
+            print(f"{key:10s} {base['median_ms']:11.1f} {row['median_ms']:11.1f} {ratio:6.2f}x{flag}")
+            if flag:
+                regressions.append(key)
+        if regressions:
+            print(f"\n{len(regressions)} phase(s) slower than x{args.threshold} baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
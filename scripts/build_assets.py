@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, precompressed copies of everything under static/.
+
+For each file in static/ (diagrams, listening images, icons) this writes
+  static/dist/<dir>/<name>.<hash>.<ext>        content-hashed copy
+  static/dist/<dir>/<name>.<hash>.<ext>.gz     gzip -9 variant
+  static/dist/<dir>/<name>.<hash>.<ext>.br     brotli variant (if installed)
+and static/dist/manifest.json mapping each original path to its copy.
+
+The app's asset_url() helper and test-data image URLs resolve through the
+manifest, and fingerprinted files are served with
+"Cache-Control: public, max-age=31536000, immutable" plus the .br/.gz
+variant the browser accepts.  Compressed variants are only kept when they
+are meaningfully smaller (PNG/JPEG usually are not).
+
+static/dist/ is generated — run this as part of the deploy build.
+
+Usage:
+  python scripts/build_assets.py
+
+  # Remove static/dist/ first (drops copies of deleted/renamed files)
+  python scripts/build_assets.py --clean
+
+Prerequisites (optional, for .br variants):
+  pip install brotli
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / 'static'
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Keep a compressed variant only if it is at most this fraction of the original
+MAX_COMPRESSED_RATIO = 0.9
+
+
+def fingerprint(data):
+    """Short content hash used in fingerprinted file names"""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def fingerprinted_name(rel_path, digest):
+    """'images/a/b.png' -> 'dist/images/a/b.<digest>.png'"""
+    path = Path(rel_path)
+    return (Path(DIST_DIR) / path.parent / f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def write_if_changed(path, data):
+    """Write bytes unless an identical file is already there; return True if written"""
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
+def compressed_variants(data):
+    """
+    Yield (suffix, bytes) for each encoding worth keeping for *data*
+    """
+    limit = len(data) * MAX_COMPRESSED_RATIO
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) <= limit:
+        yield '.gz', gz
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) <= limit:
+            yield '.br', br
+
+
+def build(static_dir):
+    """
+    Fingerprint and precompress every source file under *static_dir*
+
+    Returns:
+        dict: Manifest data ({"version": ..., "files": {original: fingerprinted}})
+    """
+    dist_root = static_dir / DIST_DIR
+    files = {}
+    written = compressed = 0
+    bytes_in = bytes_out = 0
+
+    sources = sorted(
+        p for p in static_dir.rglob('*')
+        if p.is_file() and dist_root not in p.parents
+    )
+
+    for src in sources:
+        rel = src.relative_to(static_dir).as_posix()
+        data = src.read_bytes()
+        target_rel = fingerprinted_name(rel, fingerprint(data))
+        target = static_dir / target_rel
+        files[rel] = target_rel
+
+        if write_if_changed(target, data):
+            written += 1
+
+        best = len(data)
+        for suffix, variant in compressed_variants(data):
+            write_if_changed(target.with_name(target.name + suffix), variant)
+            compressed += 1
+            best = min(best, len(variant))
+        bytes_in += len(data)
+        bytes_out += best
+
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    manifest = {'version': version, 'files': files}
+    write_if_changed(
+        dist_root / MANIFEST_NAME,
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'),
+    )
+
+    print(f"Assets:      {len(files)} files ({written} new copies)")
+    print(f"Compressed:  {compressed} variants{'' if brotli else ' (gzip only — pip install brotli for .br)'}")
+    if bytes_in:
+        print(f"Transfer:    {bytes_in / 1024:.0f} KB -> {bytes_out / 1024:.0f} KB "
+              f"with best encoding ({100 * bytes_out / bytes_in:.0f}%)")
+    print(f"Manifest:    {dist_root / MANIFEST_NAME} (version {version})")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fingerprint and precompress static assets into static/dist/",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--static-dir', default=str(STATIC_DIR),
+        help=f'Static directory to process (default: {STATIC_DIR})'
+    )
+    parser.add_argument(
+        '--clean', action='store_true',
+        help='Delete the existing dist/ directory before building'
+    )
+    args = parser.parse_args()
+
+    static_dir = Path(args.static_dir).resolve()
+    if not static_dir.is_dir():
+        print(f"ERROR: Static directory not found: {static_dir}")
+        sys.exit(1)
+
+    if args.clean and (static_dir / DIST_DIR).exists():
+        shutil.rmtree(static_dir / DIST_DIR)
+
+    build(static_dir)
+    print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
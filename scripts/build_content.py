@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Validate test content and build what the app derives from it.
+
+Every part under data/ is checked against the content schema
+(utils/content_build.py): required fields, answer indices within the
+options, question ids unique across a part's sections, one
+__DROPDOWN_N__ placeholder per question of the passage holding them, and
+the audio each listening layout plays. Tests are validated in parallel,
+one process per test (--jobs).
+
+When everything is valid, the build writes into a versioned directory
+(see utils/content_build.py for the layout):
+
+  catalog.json       tests, skills and parts; title, type, question count
+  answer_keys.json   correct answers of every part, for scoring
+  fragments/         processed section + rendered HTML of each part's
+                     practice and Test Mode content partials
+  content.store      every part and fragment in one file that workers
+                     memory-map and share (utils/content_store.py)
+
+and then points build/content_build/CURRENT at it, so running instances
+pick it up on restart. The app only uses a build whose content and
+template versions match what it serves: run this after every content or
+template change (e.g. in the deploy build command, after build_assets.py).
+
+Builds are incremental. Each build records the size, modification time
+and SHA-256 of its input files (inputs.json); the next run re-hashes only
+files whose size or mtime changed. It then re-validates and re-renders
+only the parts whose hash changed. Other fragments are hard-linked from
+the previous build, and their entries are copied into the new
+content.store without re-encoding. Aggregates are updated to match:
+  - the catalog and answer keys get the changed parts' entries;
+  - adding or removing a part re-renders that test's Test Mode fragments,
+    whose navigation depends on the test's part list;
+  - a template or config.json change re-renders every fragment, but
+    unchanged parts are not re-validated.
+--full ignores the previous build.
+
+Usage:
+  python scripts/build_content.py
+
+  # Validate only (e.g. in CI or a pre-commit hook); exit 1 on problems
+  python scripts/build_content.py --check
+
+  python scripts/build_content.py --data-dir data --out build/content_build --jobs 4
+
+  # Rebuild everything from scratch
+  python scripts/build_content.py --full
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import config  # noqa: E402
+from utils.content_build import (  # noqa: E402
+    BUILD_DIR, BUILD_FORMAT, CURRENT_NAME, SKILL_ORDER, STORE_NAME, answer_key, exam_navigation,
+    store_key, validate_part,
+)
+from utils.content_model import Part  # noqa: E402
+from utils.content_source import LocalContentSource, part_path  # noqa: E402
+from utils.content_store import ContentStore, write_store  # noqa: E402
+
+MODES = ('practice', 'exam')
+INPUTS_NAME = 'inputs.json'
+
+
+def list_part_files(source):
+    """Every part in the source as (test, skill, part, relative path), in test order"""
+    return [
+        (test_num, skill, part_num, part_path(test_num, skill, part_num))
+        for test_num in source.list_tests()
+        for skill in SKILL_ORDER
+        for part_num in source.list_parts(test_num, skill)
+    ]
+
+
+def check_parts(data_dir, items):
+    """
+    Parse and validate parts (runs in a worker process)
+
+    Args:
+        items: (test, skill, part, relative path) of the parts to check
+
+    Returns:
+        list: One dict per part: rel_path, data (None if the file is not
+        valid JSON) and problems
+    """
+    source = LocalContentSource(data_dir)
+    results = []
+    for test_num, skill, part_num, rel_path in items:
+        try:
+            data = json.loads(source.read(test_num, skill, part_num))
+        except ValueError as exc:
+            results.append({'rel_path': rel_path, 'data': None, 'problems': [f"invalid JSON: {exc}"]})
+            continue
+        results.append({'rel_path': rel_path, 'data': data,
+                        'problems': validate_part(data, skill, part_num)})
+    return results
+
+
+def check_all(data_dir, items, jobs):
+    """
+    Validate parts, one test per worker process
+
+    Returns:
+        dict: relative path -> check_parts result
+    """
+    by_test = OrderedDict()
+    for item in items:
+        by_test.setdefault(item[0], []).append(item)
+    groups = list(by_test.values())
+    if jobs <= 1 or len(groups) <= 1:
+        results = [check_parts(data_dir, group) for group in groups]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(groups))) as pool:
+            results = list(pool.map(check_parts, [data_dir] * len(groups), groups))
+    return {result['rel_path']: result for group in results for result in group}
+
+
+def load_previous(out_dir):
+    """
+    The build CURRENT points at, as raw JSON, or None
+
+    Returns:
+        dict: name, path, meta, inputs, catalog and answer_keys
+    """
+    try:
+        name = (out_dir / CURRENT_NAME).read_text(encoding='utf-8').strip()
+        path = out_dir / name
+        previous = {'name': name, 'path': path}
+        for key, file_name in (('meta', 'build.json'), ('inputs', INPUTS_NAME),
+                               ('catalog', 'catalog.json'), ('answer_keys', 'answer_keys.json')):
+            with open(path / file_name, 'r', encoding='utf-8') as f:
+                previous[key] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if previous['meta'].get('format') != BUILD_FORMAT or not (path / STORE_NAME).is_file():
+        return None
+    return previous
+
+
+def build_catalog(items, checked, previous):
+    """
+    catalog.json and answer_keys.json contents
+
+    Parts in *checked* are derived from their data; the others are copied
+    from the previous build.
+    """
+    catalog = {'tests': {}, 'parts': {}}
+    answer_keys = {}
+    for test_num, skill, part_num, rel_path in items:
+        catalog['tests'].setdefault(str(test_num), {}).setdefault(skill, []).append(part_num)
+        if rel_path in checked:
+            data = checked[rel_path]['data']
+            key = answer_key(data)
+            catalog['parts'][rel_path] = {
+                'title': data['title'],
+                'type': data['type'],
+                'num_questions': len(key),
+            }
+            answer_keys[rel_path] = {str(q_id): answer for q_id, answer in key.items()}
+        else:
+            catalog['parts'][rel_path] = previous['catalog']['parts'][rel_path]
+            answer_keys[rel_path] = previous['answer_keys'][rel_path]
+    return catalog, answer_keys
+
+
+def render_fragments(app_module, items, catalog):
+    """
+    Render the practice and Test Mode content partials of parts
+
+    Uses the app's own prepare_test_data and templates, in a request
+    context, exactly as render_part_content would at request time.
+
+    Args:
+        items: (test, skill, part, relative path, parsed data) of each part
+
+    Returns:
+        dict: rel_path -> {mode: {'context', 'section', 'html'}}
+    """
+    def list_parts(test_num, skill):
+        return catalog['tests'].get(str(test_num), {}).get(skill, [])
+
+    fragments = {}
+    with app_module.app.test_request_context():
+        for test_num, skill, part_num, rel_path, data in items:
+            family = 'listening' if skill == 'listening' else 'reading'
+            part = Part.from_dict(data)
+            entry = {}
+            for mode in MODES:
+                context = exam_navigation(list_parts, test_num, skill, part_num) if mode == 'exam' else {}
+                section = app_module.prepare_test_data(
+                    part, skill, part_num, require_answers=(mode == 'exam'), test_num=test_num
+                )
+                html = app_module.render_template(
+                    app_module.CONTENT_PARTIALS[(mode, family)],
+                    section=section, test_num=test_num, skill=skill, part_num=part_num, **context
+                )
+                entry[mode] = {'context': context, 'section': section, 'html': str(html)}
+            fragments[rel_path] = entry
+    return fragments
+
+
+def store_entries(items, checked, fragments, previous):
+    """
+    (key, value) pairs of content.store: every part and its fragments
+
+    Parts that were not re-checked and fragments that were not re-rendered
+    are copied from the previous build's store as encoded bytes.
+    """
+    previous_store = ContentStore(previous['path'] / STORE_NAME) if previous is not None else None
+    try:
+        for _, _, _, rel_path in items:
+            key = store_key('part', rel_path)
+            yield key, checked[rel_path]['data'] if rel_path in checked else previous_store.raw(key)
+            for mode in MODES:
+                key = store_key(mode, rel_path)
+                yield key, fragments[rel_path][mode] if rel_path in fragments else previous_store.raw(key)
+    finally:
+        if previous_store is not None:
+            previous_store.close()
+
+
+def write_json(path, value):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def link_or_copy(src, dst):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def write_build(out_dir, name, meta, inputs, catalog, answer_keys, fragments, reused, previous, store):
+    """
+    Write a build directory next to the others and make it CURRENT
+
+    Args:
+        fragments: Newly rendered fragments, by relative path
+        reused: Relative paths whose fragment files are linked from *previous*
+        store: (key, value) pairs of content.store
+    """
+    target = out_dir / name
+    tmp = out_dir / f'.{name}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp, ignore_errors=True)
+    write_json(tmp / 'catalog.json', catalog)
+    write_json(tmp / 'answer_keys.json', answer_keys)
+    write_json(tmp / INPUTS_NAME, inputs)
+    for rel_path, entry in fragments.items():
+        write_json(tmp / 'fragments' / rel_path, entry)
+    for rel_path in reused:
+        link_or_copy(previous['path'] / 'fragments' / rel_path, tmp / 'fragments' / rel_path)
+    write_store(tmp / STORE_NAME, store)
+    # build.json last: a directory without it is never opened
+    write_json(tmp / 'build.json', meta)
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp, target)
+    point_current(out_dir, name)
+
+
+def point_current(out_dir, name):
+    pointer_tmp = out_dir / f'.{CURRENT_NAME}.tmp-{os.getpid()}'
+    pointer_tmp.write_text(name + '\n', encoding='utf-8')
+    os.replace(pointer_tmp, out_dir / CURRENT_NAME)
+
+
+def prune(out_dir, keep, current):
+    """Remove all but the *keep* newest builds (never the current one)"""
+    builds = sorted(
+        (path for path in out_dir.iterdir()
+         if path.is_dir() and not path.name.startswith('.') and path.name != current),
+        key=lambda path: path.stat().st_mtime, reverse=True,
+    )
+    for path in builds[max(keep - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate test content and build catalog, answer keys and rendered fragments",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--data-dir', default=str(PROJECT_ROOT / 'data'),
+                        help='Directory with test_*/ content (default: data/)')
+    parser.add_argument('--out', default=str(PROJECT_ROOT / BUILD_DIR),
+                        help=f'Build directory (default: {BUILD_DIR}/)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Tests validated in parallel (default: CPU count)')
+    parser.add_argument('--check', action='store_true', help='Validate only; write nothing')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore the previous build: re-validate and re-render every part')
+    parser.add_argument('--keep', type=int, default=3, help='Builds to keep, the current one included (default: 3)')
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    data_dir = Path(args.data_dir)
+    out_dir = Path(args.out)
+    previous = None if args.full else load_previous(out_dir)
+
+    source = LocalContentSource(data_dir)
+    if previous is not None:
+        source.seed(previous['inputs']['files'])
+    inputs = {'files': source.file_digests()}
+    content_version = source.version()
+    items = list_part_files(source)
+
+    # Parts whose bytes differ from the previous build's (all of them without one)
+    previous_files = previous['inputs']['files'] if previous is not None else {}
+    changed = [
+        item for item in items
+        if item[3] not in previous_files or previous_files[item[3]][2] != inputs['files'][item[3]][2]
+    ]
+    removed = sorted(set(previous['catalog']['parts']) - {item[3] for item in items}) if previous else []
+
+    checked = check_all(str(data_dir), changed, args.jobs)
+    invalid = [result for result in checked.values() if result['problems']]
+    for result in invalid:
+        for problem in result['problems']:
+            print(f"❌ {result['rel_path']}: {problem}")
+    if invalid:
+        print(f"\n❌ {len(invalid)} of {len(items)} parts invalid")
+        sys.exit(1)
+    unchanged = len(items) - len(changed)
+    print(f"✅ {len(items)} parts in {len(source.list_tests())} tests valid "
+          f"({len(changed)} checked, {unchanged} unchanged, {len(removed)} removed)")
+    if args.check:
+        return
+
+    # Imported only to build: renders with the app's own templates and view-model builders
+    import app as app_module
+
+    template_version = app_module.TEMPLATE_VERSION
+    config_version = config.refresh_config()[1]
+    name = f"{content_version}-{template_version}-{config_version[:8]}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if previous is not None and previous['name'] == name:
+        # Same content and templates: only modification times moved
+        write_json(previous['path'] / INPUTS_NAME, inputs)
+        point_current(out_dir, name)
+        print(f"✅ {out_dir / name} is up to date ({time.monotonic() - started:.2f}s)")
+        return
+
+    catalog, answer_keys = build_catalog(items, checked, previous)
+
+    # Test Mode fragments depend on their test's part list; templates and config on everything
+    if (previous is None or previous['meta']['template_version'] != template_version
+            or previous['meta']['config_version'] != config_version):
+        stale = {item[3] for item in items}
+    else:
+        reshaped = {
+            test for test, skills in catalog['tests'].items()
+            if previous['catalog']['tests'].get(test) != skills
+        }
+        stale = {item[3] for item in items if item[3] in checked or str(item[0]) in reshaped}
+
+    to_render = []
+    for test_num, skill, part_num, rel_path in items:
+        if rel_path not in stale:
+            continue
+        if rel_path in checked:
+            data = checked[rel_path]['data']
+        else:
+            data = json.loads(source.read(test_num, skill, part_num))
+        to_render.append((test_num, skill, part_num, rel_path, data))
+    fragments = render_fragments(app_module, to_render, catalog)
+    reused = [item[3] for item in items if item[3] not in stale]
+
+    if source.version() != content_version:
+        print("❌ Content changed during the build; run it again")
+        sys.exit(1)
+
+    meta = {
+        'format': BUILD_FORMAT,
+        'content_version': content_version,
+        'template_version': template_version,
+        'config_version': config_version,
+        'parts': len(items),
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    store = store_entries(items, checked, fragments, previous)
+    write_build(out_dir, name, meta, inputs, catalog, answer_keys, fragments, reused, previous, store)
+    prune(out_dir, args.keep, name)
+
+    print(f"✅ Built {out_dir / name} ({len(items)} parts: {len(fragments)} rendered, "
+          f"{len(reused)} reused) in {time.monotonic() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Build resized WebP/AVIF variants of the diagram and listening images.
+
+static/images/test_*/ holds full-size PNG/JPG originals referenced by
+`diagram_image` (reading part 2) and `imageUrl` (listening).  For each one
+this writes, at every configured width not larger than the original,
+  static/dist/images/.../<name>.<hash>.<width>w.webp
+  static/dist/images/.../<name>.<hash>.<width>w.avif   (if Pillow supports AVIF)
+and static/dist/images.json:
+
+  {"images": {"images/test_1/reading/part2_diagram.png": {
+      "width": 1650, "height": 1275,
+      "variants": {"image/avif": [["dist/images/...480w.avif", 480], ...],
+                   "image/webp": [...]}}}}
+
+prepare_test_data turns the manifest into <picture> sources, so browsers
+and the iOS web view download a variant sized for the screen instead of the
+original.  Variants that come out larger than the original are dropped.
+
+Run after scripts/build_assets.py (its --clean removes static/dist/).
+Unchanged images are skipped: variant names contain the source hash.
+
+Usage:
+  python scripts/build_images.py
+
+  # Custom widths / quality
+  python scripts/build_images.py --widths 400 800 1200 --webp-quality 75
+
+Prerequisites:
+  pip install -r requirements.txt    (Pillow; AVIF needs Pillow >= 11.3 or pillow-avif-plugin)
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF plugin on older Pillow)
+except ImportError:
+    pass
+
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / 'static'
+IMAGES_DIR = 'images'
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'images.json'
+
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+DEFAULT_WIDTHS = (480, 960, 1600)
+
+
+def avif_supported():
+    """Whether the installed Pillow can encode AVIF"""
+    try:
+        return bool(features.check('avif'))
+    except (ValueError, AttributeError):
+        return 'AVIF' in Image.SAVE
+
+
+def encode(image, fmt, quality):
+    """Encode a Pillow image to bytes"""
+    buffer = io.BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, fmt, quality=quality, method=6)
+    else:
+        image.save(buffer, fmt, quality=quality, speed=6)
+    return buffer.getvalue()
+
+
+def build_variants(src, rel, static_dir, widths, formats):
+    """
+    Write the resized variants of one image
+
+    Args:
+        src: Source image path
+        rel: Path of the source relative to static/
+        static_dir: Static directory
+        widths: Candidate widths in pixels
+        formats: [(mime_type, pillow_format, extension, quality), ...]
+
+    Returns:
+        tuple: (manifest entry, number of files written, bytes of original, bytes of largest variant)
+    """
+    data = src.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    rel_path = Path(rel)
+    out_dir = static_dir / DIST_DIR / rel_path.parent
+
+    with Image.open(io.BytesIO(data)) as original:
+        original.load()
+        width, height = original.size
+        mode = 'RGBA' if original.mode in ('RGBA', 'LA', 'P') else 'RGB'
+        base = original.convert(mode)
+
+    targets = sorted({w for w in widths if w < width} | {width})
+    entry = {'width': width, 'height': height, 'variants': {}}
+    written = 0
+    largest = 0
+
+    for mime_type, pil_format, extension, quality in formats:
+        variants = []
+        for target_width in targets:
+            name = f"{rel_path.stem}.{digest}.{target_width}w.{extension}"
+            out_path = out_dir / name
+
+            if not out_path.exists():
+                if target_width == width:
+                    resized = base
+                else:
+                    target_height = max(1, round(height * target_width / width))
+                    resized = base.resize((target_width, target_height), Image.LANCZOS)
+                encoded = encode(resized, pil_format, quality)
+                if len(encoded) >= len(data):
+                    continue
+                out_dir.mkdir(parents=True, exist_ok=True)
+                tmp = out_path.with_name(name + '.tmp')
+                tmp.write_bytes(encoded)
+                os.replace(tmp, out_path)
+                written += 1
+
+            if target_width == targets[-1]:
+                largest = max(largest, out_path.stat().st_size)
+            variants.append([(Path(DIST_DIR) / rel_path.parent / name).as_posix(), target_width])
+
+        if variants:
+            entry['variants'][mime_type] = variants
+
+    return entry, written, len(data), largest or len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build responsive WebP/AVIF variants of static/images/",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--static-dir', default=str(STATIC_DIR),
+        help=f'Static directory to process (default: {STATIC_DIR})'
+    )
+    parser.add_argument(
+        '--widths', nargs='+', type=int, default=list(DEFAULT_WIDTHS),
+        help=f'Variant widths in pixels (default: {" ".join(map(str, DEFAULT_WIDTHS))})'
+    )
+    parser.add_argument('--webp-quality', type=int, default=80, help='WebP quality (default: 80)')
+    parser.add_argument('--avif-quality', type=int, default=55, help='AVIF quality (default: 55)')
+    parser.add_argument('--no-avif', action='store_true', help='Only build WebP variants')
+    args = parser.parse_args()
+
+    if Image is None:
+        print("ERROR: Pillow is required: pip install -r requirements.txt")
+        sys.exit(1)
+
+    static_dir = Path(args.static_dir).resolve()
+    images_dir = static_dir / IMAGES_DIR
+    if not images_dir.is_dir():
+        print(f"ERROR: Images directory not found: {images_dir}")
+        sys.exit(1)
+
+    formats = []
+    if not args.no_avif:
+        if avif_supported():
+            formats.append(('image/avif', 'AVIF', 'avif', args.avif_quality))
+        else:
+            print("WARNING: Pillow has no AVIF encoder — building WebP only")
+    formats.append(('image/webp', 'WEBP', 'webp', args.webp_quality))
+
+    sources = sorted(
+        p for p in images_dir.rglob('*')
+        if p.is_file() and p.suffix.lower() in SOURCE_EXTENSIONS
+    )
+
+    images = {}
+    total_written = 0
+    bytes_original = bytes_largest = 0
+    for src in sources:
+        rel = src.relative_to(static_dir).as_posix()
+        entry, written, original_size, largest_size = build_variants(
+            src, rel, static_dir, args.widths, formats
+        )
+        total_written += written
+        bytes_original += original_size
+        bytes_largest += largest_size
+        if entry['variants']:
+            images[rel] = entry
+        print(f"  {rel:55s} {entry['width']}x{entry['height']}  "
+              f"{original_size / 1024:.0f} KB -> {largest_size / 1024:.0f} KB (full width)")
+
+    manifest_path = static_dir / DIST_DIR / MANIFEST_NAME
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = manifest_path.with_name(MANIFEST_NAME + '.tmp')
+    tmp.write_text(json.dumps({'images': images}, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, manifest_path)
+
+    print("\n" + "=" * 70)
+    print(f"Images:    {len(sources)} ({len(images)} with variants, {total_written} files written)")
+    print(f"Formats:   {', '.join(f[0] for f in formats)}")
+    if bytes_original:
+        print(f"Bytes:     {bytes_original / 1024:.0f} KB originals -> {bytes_largest / 1024:.0f} KB "
+              f"at full width ({100 * bytes_largest / bytes_original:.0f}%); smaller widths serve less")
+    print(f"Manifest:  {manifest_path}")
+    print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
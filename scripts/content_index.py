@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Publish test content for CONTENT_SOURCE=http.
+
+Copies every JSON file under the data directory to an output directory and
+writes index.json (content version plus the sha256 and size of each file)
+next to them. Upload the output directory to any static host or object
+store and point CONTENT_URL at it; app instances poll index.json and
+re-fetch only the parts whose hash changed.
+
+index.json is written last, after every file it lists, so an instance that
+reads the new index never finds a part missing. Upload it last too.
+
+Usage:
+  python scripts/content_index.py --out build/content
+  python scripts/content_index.py --data-dir data --out build/content --index-only
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.content_source import INDEX_NAME, LocalContentSource  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Copy test content and write index.json for CONTENT_SOURCE=http",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--data-dir', default=str(PROJECT_ROOT / 'data'),
+                        help='Directory with test_*/ content (default: data/)')
+    parser.add_argument('--out', required=True, help='Directory to publish')
+    parser.add_argument('--index-only', action='store_true',
+                        help='Only write index.json (files are already in --out)')
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    out_dir = Path(args.out)
+    index = LocalContentSource(data_dir).build_index()
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if not args.index_only:
+        for rel_path in index['files']:
+            target = out_dir / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(data_dir / rel_path, target)
+
+    tmp_path = out_dir / f'.{INDEX_NAME}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, out_dir / INDEX_NAME)
+
+    total = sum(entry['size'] for entry in index['files'].values())
+    print(f"{len(index['files'])} files ({total / 1024:.0f} KB), version {index['version']}")
+    print(f"Index written to {out_dir / INDEX_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -36,6 +36,24 @@ Usage:
   # Specify a Cloudinary folder
   python scripts/gdrive_to_cloudinary.py --url "URL" --cloudinary-folder "celpip/test_3/listening"
 
+  # More parallelism; an interrupted run resumes from the manifest when re-run
+  python scripts/gdrive_to_cloudinary.py --file urls.txt --cloudinary-folder celpip/test_3/listening \\
+      --download-workers 8 --upload-workers 8
+
+  # Try the pipeline without Google Drive or Cloudinary (file:// URLs, local "uploads")
+  python scripts/gdrive_to_cloudinary.py --file local_urls.txt --upload-to-dir /tmp/fake_cloudinary
+
+Downloads and uploads run on separate bounded thread pools, so files upload
+while others are still downloading. Failed downloads/uploads are retried
+with exponential backoff. Every finished upload is recorded in a manifest
+(instance/media_ingest_manifest.json by default); re-runs skip stems and
+Drive URLs already recorded for the same Cloudinary folder.
+
+Files are hashed (BLAKE2b, see media_hash.py) before upload: unchanged
+stems are skipped, changed ones overwrite the old asset, and bytes already
+uploaded under another name or folder reuse that URL instead of being
+uploaded again (instance/media_index.json).
+
 Prerequisites:
   pip install cloudinary gdown
 
@@ -49,12 +67,21 @@ import argparse
 import json
 import os
 import re
+import shutil
 import sys
 import tempfile
+import threading
+import time
 import glob as globmod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from media_hash import MediaIndex  # noqa: E402
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -301,8 +328,13 @@ def validate_filenames(file_paths):
     return valid, warnings
 
 
-def upload_to_cloudinary(local_path, folder=None):
-    """Upload a file to Cloudinary. Returns the result dict with secure_url."""
+def upload_to_cloudinary(local_path, folder=None, overwrite=False):
+    """
+    Upload a file to Cloudinary. Returns the result dict with secure_url.
+
+    overwrite=True replaces an existing asset with the same public_id (and
+    invalidates its CDN copy); used when a file's content has changed.
+    """
     filename = Path(local_path).stem
     ext = Path(local_path).suffix.lower()
 
@@ -313,12 +345,14 @@ def upload_to_cloudinary(local_path, folder=None):
     upload_options = {
         "resource_type": resource_type,
         "public_id": filename,
-        "overwrite": False,
+        "overwrite": overwrite,
         "unique_filename": False,
         "use_filename": True,
     }
     if folder:
         upload_options["folder"] = folder
+    if overwrite:
+        upload_options["invalidate"] = True
 
     cl = _require_cloudinary()
     try:
@@ -458,6 +492,292 @@ def update_json_files(json_dir, url_mapping):
     print(f"  {updated_count} JSON file(s) updated, {url_count} URL(s) filled")
 
 
+# ---------------------------------------------------------------------------
+# Concurrent, resumable ingest
+# ---------------------------------------------------------------------------
+
+MEDIA_EXTENSIONS = {'.m4a', '.mp3', '.wav', '.ogg', '.flac', '.aac',
+                    '.mp4', '.webm', '.mov', '.mkv'}
+
+DEFAULT_MANIFEST = os.path.join("instance", "media_ingest_manifest.json")
+DEFAULT_MEDIA_INDEX = os.path.join("instance", "media_index.json")
+
+_print_lock = threading.Lock()
+
+
+def log(message):
+    """Print from worker threads without interleaving lines."""
+    with _print_lock:
+        print(message, flush=True)
+
+
+class IngestManifest:
+    """
+    Completed uploads per Cloudinary folder, saved after every upload.
+
+    An interrupted run keeps everything it finished, and the next run skips
+    stems (and Google Drive sources) already recorded for the folder.
+
+    Layout:
+        {"folders": {folder: {stem: {"url", "public_id", "source", "size", "digest", "uploaded_at"}}}}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {"folders": {}}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self._data = json.load(f)
+
+    def _entries(self, folder):
+        return self._data["folders"].get(folder or "", {})
+
+    def completed(self, folder, stem):
+        """Manifest entry for a finished stem, or None."""
+        with self._lock:
+            return self._entries(folder).get(stem)
+
+    def completed_source(self, folder, source):
+        """(stem, entry) for a finished Google Drive URL or local path, or None."""
+        with self._lock:
+            for stem, entry in self._entries(folder).items():
+                if entry.get("source") == source:
+                    return stem, entry
+        return None
+
+    def record(self, folder, stem, entry):
+        """Add a finished upload and write the manifest atomically."""
+        with self._lock:
+            self._data["folders"].setdefault(folder or "", {})[stem] = entry
+            if not self.path:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def with_retries(operation, *args, retries=3, backoff=1.0, label="", **kwargs):
+    """
+    Call operation until it returns something other than None.
+
+    The download/upload helpers print their own errors and return None on
+    failure; each retry waits twice as long as the one before.
+    """
+    delay = backoff
+    for attempt in range(retries + 1):
+        result = operation(*args, **kwargs)
+        if result is not None:
+            return result
+        if attempt < retries:
+            log(f"  RETRY {attempt + 1}/{retries} in {delay:.1f}s: {label}")
+            time.sleep(delay)
+            delay *= 2
+    return None
+
+
+def fetch_source(source, output_dir):
+    """
+    Download one source into output_dir.
+
+    file:// URLs (and plain paths) are copied from the local file system,
+    which makes the pipeline testable without Google Drive.
+    """
+    if source.startswith("file://") or os.path.exists(source):
+        local_path = urlparse(source).path if source.startswith("file://") else source
+        if not os.path.isfile(local_path):
+            log(f"  ERROR: Local file not found: {local_path}")
+            return None
+        target = os.path.join(output_dir, os.path.basename(local_path))
+        shutil.copyfile(local_path, target)
+        log(f"  Copied: {os.path.basename(local_path)} ({os.path.getsize(target)} bytes)")
+        return target
+    return download_from_gdrive(source, output_dir)
+
+
+class LocalDirUploader:
+    """
+    Upload backend that copies files into a directory instead of Cloudinary.
+
+    Mirrors upload_to_cloudinary: files land in <root>/<folder>/<name>, an
+    existing file is reported as skipped, and the result has secure_url and
+    public_id. Used for testing the pipeline and for staging media locally.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def __call__(self, local_path, folder=None, overwrite=False):
+        filename = os.path.basename(local_path)
+        public_id = f"{folder}/{Path(local_path).stem}" if folder else Path(local_path).stem
+        target = os.path.join(self.root, folder or "", filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target) and not overwrite:
+            log(f"  SKIPPED (already exists): {filename}")
+            return {"secure_url": Path(target).as_uri(), "public_id": public_id, "skipped": True}
+        shutil.copyfile(local_path, target)
+        log(f"  Uploaded: {Path(target).as_uri()}")
+        return {"secure_url": Path(target).as_uri(), "public_id": public_id}
+
+
+def dry_run_upload(local_path, folder=None, overwrite=False):
+    """Upload backend for --dry-run: uploads nothing."""
+    filename = os.path.basename(local_path)
+    log(f"  [DRY RUN] Would upload: {filename}")
+    return {"secure_url": f"[dry-run] {filename}", "dry_run": True}
+
+
+def ingest(sources, local_paths, download_dir, folder, upload, manifest,
+           download_workers=4, upload_workers=4, retries=3, backoff=1.0, resume=True,
+           index=None, target=""):
+    """
+    Download and upload media concurrently.
+
+    Downloads run on one bounded thread pool and each finished download is
+    handed straight to a second pool for upload, so uploads start while
+    other files are still downloading.
+
+    Each file is hashed before upload. A stem already in the manifest with
+    the same digest is skipped, one whose digest changed is re-uploaded
+    over the old asset, and bytes already uploaded to *target* under any
+    name (e.g. a clip shared by two tests) reuse the existing URL.
+
+    Args:
+        sources: Google Drive URLs / file:// URLs still to download
+        local_paths: Files already on disk (--local, --folder)
+        download_dir: Where downloads are written
+        folder: Cloudinary folder (manifest key)
+        upload: upload_to_cloudinary or a compatible backend
+        manifest: IngestManifest of completed stems
+        download_workers / upload_workers: Pool sizes
+        retries / backoff: Retries per file and the first retry delay (doubling)
+        resume: Skip stems and sources already recorded in the manifest
+        index: MediaIndex of digests and uploaded URLs (None: in-memory only)
+        target: Upload destination the index's URLs belong to (e.g. 'cloudinary:<cloud>')
+
+    Returns:
+        list: One result dict per file (filename, cloudinary_url, source, ...)
+    """
+    if index is None:
+        index = MediaIndex(None)
+    results = []
+    results_lock = threading.Lock()
+
+    def add_result(result):
+        with results_lock:
+            results.append(result)
+
+    def resumed(stem, entry, source):
+        log(f"  RESUMED (in manifest): {stem}")
+        add_result({
+            'filename': os.path.basename(entry.get('url', stem)),
+            'stem': stem,
+            'cloudinary_url': entry['url'],
+            'public_id': entry.get('public_id'),
+            'resumed': True,
+            'source': source,
+        })
+
+    def push(path, source):
+        filename = os.path.basename(path)
+        stem = Path(path).stem
+        if Path(path).suffix.lower() not in MEDIA_EXTENSIONS:
+            log(f"  Skipping non-media file: {filename}")
+            return
+        digest = index.digest(path)
+        overwrite = False
+        if resume:
+            entry = manifest.completed(folder, stem)
+            if entry and entry.get('digest', digest) == digest:
+                resumed(stem, entry, source)
+                return
+            # Same stem, different bytes: replace the uploaded asset
+            overwrite = entry is not None
+
+        previous = None if overwrite else index.upload_for(target, digest)
+        if previous:
+            log(f"  DEDUPLICATED (same bytes as {previous['url']}): {filename}")
+            add_result({
+                'filename': filename,
+                'stem': stem,
+                'cloudinary_url': previous['url'],
+                'public_id': previous.get('public_id'),
+                'deduplicated': True,
+                'source': source,
+            })
+            manifest.record(folder, stem, {
+                'url': previous['url'],
+                'public_id': previous.get('public_id'),
+                'source': source,
+                'size': os.path.getsize(path),
+                'digest': digest,
+                'uploaded_at': datetime.now().isoformat(timespec='seconds'),
+            })
+            return
+
+        log(f"Processing: {filename}{' (changed)' if overwrite else ''}")
+        result = with_retries(upload, path, folder=folder, overwrite=overwrite, retries=retries,
+                              backoff=backoff, label=f"upload {filename}")
+        if result is None:
+            add_result({'filename': filename, 'stem': stem, 'cloudinary_url': None,
+                        'error': 'Upload failed', 'source': source})
+            return
+        add_result({
+            'filename': filename,
+            'stem': stem,
+            'cloudinary_url': result['secure_url'],
+            'public_id': result.get('public_id'),
+            'skipped': result.get('skipped', False),
+            'source': source,
+        })
+        if not result.get('dry_run'):
+            index.record_upload(target, digest, result['secure_url'], result.get('public_id'))
+            index.save()
+            manifest.record(folder, stem, {
+                'url': result['secure_url'],
+                'public_id': result.get('public_id'),
+                'source': source,
+                'size': os.path.getsize(path),
+                'digest': digest,
+                'uploaded_at': datetime.now().isoformat(timespec='seconds'),
+            })
+
+    def pull(source):
+        return with_retries(fetch_source, source, download_dir, retries=retries,
+                            backoff=backoff, label=f"download {source}")
+
+    with ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix='upload') as uploads, \
+            ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix='download') as downloads:
+        pending_uploads = [uploads.submit(push, path, path) for path in local_paths]
+
+        pending_downloads = {}
+        for source in sources:
+            done = manifest.completed_source(folder, source) if resume else None
+            if done:
+                resumed(done[0], done[1], source)
+                continue
+            pending_downloads[downloads.submit(pull, source)] = source
+
+        for future in as_completed(pending_downloads):
+            source = pending_downloads[future]
+            path = future.result()
+            if path is None:
+                add_result({'filename': source, 'cloudinary_url': None,
+                            'error': 'Download failed', 'source': source})
+                continue
+            pending_uploads.append(uploads.submit(push, path, source))
+
+        for future in as_completed(pending_uploads):
+            future.result()
+
+    index.save()
+    return sorted(results, key=lambda r: r['filename'])
+
+
 def load_urls_from_file(filepath):
     """Load Google Drive URLs from a text file (one per line)."""
     urls = []
@@ -482,7 +802,12 @@ def print_summary(results):
         print(f"\nSuccessfully migrated ({len(success)}):")
         print("-" * 70)
         for r in success:
-            status = " (already existed)" if r.get('skipped') else ""
+            status = (
+                " (already existed)" if r.get('skipped')
+                else " (resumed from manifest)" if r.get('resumed')
+                else " (same bytes already uploaded)" if r.get('deduplicated')
+                else ""
+            )
             print(f"  {r['filename']}")
             print(f"    -> {r['cloudinary_url']}{status}")
 
@@ -560,6 +885,38 @@ Examples:
         '--skip-validation', action='store_true',
         help='Skip filename validation (by default, warns about non-standard names)'
     )
+    parser.add_argument(
+        '--download-workers', type=int, default=4,
+        help='Concurrent Google Drive downloads (default: 4)'
+    )
+    parser.add_argument(
+        '--upload-workers', type=int, default=4,
+        help='Concurrent Cloudinary uploads (default: 4)'
+    )
+    parser.add_argument(
+        '--retries', type=int, default=3,
+        help='Retries per download/upload, with exponential backoff (default: 3)'
+    )
+    parser.add_argument(
+        '--retry-backoff', type=float, default=1.0,
+        help='Seconds before the first retry; doubles each retry (default: 1.0)'
+    )
+    parser.add_argument(
+        '--manifest', default=DEFAULT_MANIFEST,
+        help=f'Manifest of completed uploads used to resume (default: {DEFAULT_MANIFEST})'
+    )
+    parser.add_argument(
+        '--no-resume', action='store_true',
+        help='Upload everything again, ignoring stems already in the manifest'
+    )
+    parser.add_argument(
+        '--media-index', default=DEFAULT_MEDIA_INDEX,
+        help=f'Content-hash index of uploaded media, for deduplication (default: {DEFAULT_MEDIA_INDEX})'
+    )
+    parser.add_argument(
+        '--upload-to-dir', metavar='DIR',
+        help='Copy files into DIR instead of uploading to Cloudinary (testing / staging)'
+    )
 
     args = parser.parse_args()
 
@@ -587,9 +944,21 @@ Examples:
         print("\nDone!")
         return
 
-    if not args.dry_run:
+    if args.upload_to_dir:
+        upload = LocalDirUploader(args.upload_to_dir)
+        target = f"dir:{upload.root}"
+        print(f"Uploading to local directory: {upload.root}")
+    elif args.dry_run:
+        upload = dry_run_upload
+        target = "dry-run"
+    else:
         configure_cloudinary()
+        upload = upload_to_cloudinary
+        target = f"cloudinary:{os.environ.get('CLOUDINARY_CLOUD_NAME')}"
 
+    manifest = IngestManifest(None if args.dry_run else args.manifest)
+    index = MediaIndex(None if args.dry_run else args.media_index)
+    sources = []
     local_files = []
     download_dir = None
 
@@ -614,44 +983,19 @@ Examples:
         print(f"Download directory: {download_dir}\n")
 
         if args.url:
-            print(f"Downloading {len(args.url)} file(s) from Google Drive...")
-            for url in args.url:
-                path = download_from_gdrive(url, download_dir)
-                if path:
-                    local_files.append(path)
-
+            sources = args.url
         elif args.folder:
             print("Downloading folder from Google Drive...")
             local_files = download_folder_from_gdrive(args.folder, download_dir)
-
         elif args.file:
-            urls = load_urls_from_file(args.file)
-            print(f"Downloading {len(urls)} file(s) from URL list...")
-            for url in urls:
-                path = download_from_gdrive(url, download_dir)
-                if path:
-                    local_files.append(path)
-
-    if not local_files:
-        print("\nNo files were downloaded. Nothing to upload.")
-        sys.exit(1)
-
-    audio_video_exts = {'.m4a', '.mp3', '.wav', '.ogg', '.flac', '.aac',
-                        '.mp4', '.webm', '.mov', '.mkv'}
-    media_files = [f for f in local_files
-                   if Path(f).suffix.lower() in audio_video_exts]
-    non_media = [f for f in local_files if f not in media_files]
-
-    if non_media:
-        print(f"\nSkipping {len(non_media)} non-media file(s):")
-        for f in non_media:
-            print(f"  {os.path.basename(f)}")
+            sources = load_urls_from_file(args.file)
 
-    if not media_files:
-        print("\nNo audio/video files found to upload.")
+    if not sources and not local_files:
+        print("\nNo files were downloaded. Nothing to upload.")
         sys.exit(1)
 
-    if not args.skip_validation:
+    if local_files and not args.skip_validation:
+        media_files = [f for f in local_files if Path(f).suffix.lower() in MEDIA_EXTENSIONS]
         _, name_warnings = validate_filenames(media_files)
         if name_warnings:
             print("\nFilename validation warnings:")
@@ -662,42 +1006,21 @@ Examples:
             print("Expected pattern: p{1-6}-pas.m4a, p{1-6}-q{N}.m4a, p1-{1-3}-pas.m4a")
             print("Use --skip-validation to ignore these warnings.\n")
 
-    print(f"\n{'DRY RUN - ' if args.dry_run else ''}Uploading {len(media_files)} file(s) to Cloudinary...\n")
-
-    results = []
-    url_mapping = {}
-
-    for filepath in sorted(media_files):
-        filename = os.path.basename(filepath)
-        stem = Path(filepath).stem
-        print(f"Processing: {filename}")
-
-        if args.dry_run:
-            print(f"  [DRY RUN] Would upload: {filename}")
-            results.append({
-                'filename': filename,
-                'cloudinary_url': f'[dry-run] {filename}',
-                'source': filepath
-            })
-            continue
+    total = len(sources) + len(local_files)
+    print(f"\n{'DRY RUN - ' if args.dry_run else ''}Ingesting {total} file(s) "
+          f"({args.download_workers} download / {args.upload_workers} upload workers)...\n")
 
-        result = upload_to_cloudinary(filepath, folder=args.cloudinary_folder)
-        if result:
-            results.append({
-                'filename': filename,
-                'cloudinary_url': result['secure_url'],
-                'public_id': result.get('public_id'),
-                'skipped': result.get('skipped', False),
-                'source': filepath
-            })
-            url_mapping[stem] = result['secure_url']
-        else:
-            results.append({
-                'filename': filename,
-                'cloudinary_url': None,
-                'error': 'Upload failed',
-                'source': filepath
-            })
+    results = ingest(
+        sources, local_files, download_dir, args.cloudinary_folder, upload, manifest,
+        download_workers=args.download_workers, upload_workers=args.upload_workers,
+        retries=args.retries, backoff=args.retry_backoff, resume=not args.no_resume,
+        index=index, target=target,
+    )
+    url_mapping = {
+        r['stem']: r['cloudinary_url']
+        for r in results
+        if r.get('cloudinary_url') and 'stem' in r and not args.dry_run
+    }
 
     print_summary(results)
 
@@ -706,7 +1029,6 @@ Examples:
         update_json_files(args.update_json, url_mapping)
 
     if download_dir and not args.keep_downloads and download_dir.startswith(tempfile.gettempdir()):
-        import shutil
         shutil.rmtree(download_dir, ignore_errors=True)
         print(f"\nCleaned up temp downloads.")
 
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Content hashing for the media scripts.
+
+Shared by gdrive_to_cloudinary.py and organize_listening_audio.py so media
+whose bytes have not changed is never copied or uploaded twice:
+
+  file_digest()  BLAKE2b over the file, streamed in 1 MB chunks
+  MediaIndex     Persisted JSON index of
+                   files         path -> size, mtime and digest (a file is only
+                                 re-hashed when its size or mtime changes)
+                   uploads       upload target -> digest -> URL / public_id
+                   destinations  organized file -> digest
+
+Identical clips shared between tests hash the same, so they are uploaded
+once and the second test reuses the first URL.
+
+Usage (inspect an index, or hash files by hand):
+  python scripts/media_hash.py --index instance/media_index.json
+  python scripts/media_hash.py organized/test_3/*.m4a
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+
+CHUNK_SIZE = 1024 * 1024
+DIGEST_SIZE = 20  # 160-bit BLAKE2b: ample for deduplicating a media library
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE):
+    """
+    Hash a file without reading it into memory at once.
+
+    Returns:
+        str: Hex BLAKE2b digest of the file's bytes
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaIndex:
+    """
+    Digest cache plus digest -> upload and destination -> digest maps.
+
+    Thread-safe; save() writes the index atomically. With path=None the
+    index lives in memory only (dry runs).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {"files": {}, "uploads": {}, "destinations": {}}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self._data.update(json.load(f))
+
+    # -- hashing ---------------------------------------------------------
+
+    def digest(self, path):
+        """Digest of a file, re-hashed only when its size or mtime changed."""
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._data["files"].get(key)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["digest"]
+        value = file_digest(path)
+        with self._lock:
+            self._data["files"][key] = {
+                "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": value,
+            }
+        return value
+
+    # -- uploads ---------------------------------------------------------
+
+    def upload_for(self, target, digest):
+        """{'url', 'public_id'} of bytes already uploaded to *target*, or None."""
+        with self._lock:
+            return self._data["uploads"].get(target, {}).get(digest)
+
+    def record_upload(self, target, digest, url, public_id=None):
+        with self._lock:
+            self._data["uploads"].setdefault(target, {})[digest] = {
+                "url": url, "public_id": public_id,
+            }
+
+    # -- organized destinations -----------------------------------------
+
+    def destination_digest(self, path):
+        """Digest last written to an organized destination, or None."""
+        with self._lock:
+            return self._data["destinations"].get(os.path.abspath(path))
+
+    def destination_for(self, digest):
+        """An existing organized file with these bytes, or None."""
+        with self._lock:
+            candidates = [
+                path for path, value in self._data["destinations"].items() if value == digest
+            ]
+        for path in sorted(candidates):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def record_destination(self, path, digest):
+        with self._lock:
+            self._data["destinations"][os.path.abspath(path)] = digest
+
+    # -- persistence -----------------------------------------------------
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._data["files"]),
+                "uploads": sum(len(v) for v in self._data["uploads"].values()),
+                "destinations": len(self._data["destinations"]),
+                "unique_destinations": len(set(self._data["destinations"].values())),
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Hash media files or summarize a media index",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('files', nargs='*', help='Files to hash')
+    parser.add_argument('--index', help='Media index JSON to summarize')
+    args = parser.parse_args()
+
+    if not args.files and not args.index:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.index:
+        stats = MediaIndex(args.index).stats()
+        print(f"{args.index}: {stats['files']} hashed files, {stats['uploads']} uploads, "
+              f"{stats['destinations']} organized files ({stats['unique_destinations']} unique)")
+
+    for path in args.files:
+        print(f"{file_digest(path)}  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Migrate legacy user data into the configured storage backend.
+
+Reads either legacy format and writes users, test histories and summaries
+through the repositories' bulk API (import_profiles / import_histories), so
+the same command fills users/ folders or PostgreSQL:
+
+  data/test_results.json   The original single-file store,
+                           {"users": {email: {"created_at", "tests"}}}.
+                           Streamed one user at a time, so the file never has
+                           to fit in memory.
+  reports/                 One <email>.json per user (the intermediate
+                           format written by migrate_results.py).
+
+Users are grouped into batches (--batch-size) that a pool of workers
+(--workers) writes concurrently: one transaction per batch on PostgreSQL,
+per-user locked writes on file storage. A batch that fails is retried user
+by user, so one bad record does not hold back the rest.
+
+Progress is checkpointed (instance/migrate_checkpoint.json by default)
+after every batch. Re-running the same command skips users already written
+and retries the ones that failed. Writes merge by attempt id (see
+utils/storage/bulk.py), so migrating a user twice, or into a user who has
+used the app since, never duplicates or loses attempts.
+
+The backend is chosen like the app's: PostgreSQL when DATABASE_URL (or
+--database-url) is set, users/ folders otherwise.
+
+Usage:
+  python scripts/migrate.py                               # data/test_results.json
+  python scripts/migrate.py reports/
+  python scripts/migrate.py data/test_results.json --database-url postgresql://...
+  python scripts/migrate.py --workers 8 --batch-size 500
+  python scripts/migrate.py --dry-run                     # parse and convert only
+  python scripts/migrate.py --restart                     # ignore the checkpoint
+"""
+
+import argparse
+import codecs
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from urllib.parse import urlparse
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.storage import make_repositories  # noqa: E402
+
+DEFAULT_SOURCE = PROJECT_ROOT / 'data' / 'test_results.json'
+DEFAULT_CHECKPOINT = PROJECT_ROOT / 'instance' / 'migrate_checkpoint.json'
+CHUNK_SIZE = 1024 * 1024
+PROGRESS_SECONDS = 2.0
+
+_print_lock = threading.Lock()
+
+
+def log(message):
+    """Print from worker threads without interleaving lines."""
+    with _print_lock:
+        print(message, flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+class JsonObjectStream:
+    """
+    Incremental reader for the members of one object inside a JSON document.
+
+    Only the value being returned is held in memory: the document is read in
+    chunks and each member is decoded with json's raw_decode as soon as it
+    is complete, e.g. every user under "users" in test_results.json.
+    """
+
+    def __init__(self, fh, chunk_size=CHUNK_SIZE):
+        self._fh = fh
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    def _fill(self, size):
+        """Append up to *size* bytes to the buffer; False at end of file."""
+        if self._eof:
+            return False
+        data = self._fh.read(size)
+        self.bytes_read += len(data)
+        if not data:
+            self._eof = True
+            self._buf = self._buf[self._pos:] + self._utf8.decode(b'', final=True)
+        else:
+            self._buf = self._buf[self._pos:] + self._utf8.decode(data)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character, without consuming it ('' at end)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(self._chunk_size):
+                return ''
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at byte ~{self.bytes_read}, found {found or 'end of file'!r}")
+        self._pos += 1
+
+    def _value(self):
+        """Decode the next complete JSON value."""
+        self._peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                size *= 2  # grow reads so a huge value is not re-decoded per chunk
+                continue
+            # A value ending the buffer, or a number cut before its fraction
+            # or exponent ("12" of "12.5"), may continue in the next chunk
+            if not self._eof and (
+                end == len(self._buf)
+                or (self._buf[end] in '.eE' and type(value) in (int, float))
+            ):
+                self._fill(size)
+                continue
+            self._pos = end
+            return value
+
+    def items(self, *path):
+        """
+        Yield (key, value) for each member of the object at *path*
+
+        Args:
+            *path: Keys leading from the top-level object to the one to
+                stream (none: the top-level object itself)
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if not path:
+                yield key, self._value()
+            elif key == path[0]:
+                yield from self.items(*path[1:])
+            else:
+                self._value()
+            separator = self._peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' at byte ~{self.bytes_read}, found {separator!r}")
+
+
+class LegacyFileSource:
+    """Users of data/test_results.json, streamed"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.total_bytes = self.path.stat().st_size
+        self._stream = None
+
+    def identity(self):
+        stat = self.path.stat()
+        return {'path': str(self.path.resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def progress(self):
+        if not self._stream or not self.total_bytes:
+            return ''
+        return f"{self._stream.bytes_read / self.total_bytes:.0%}"
+
+    def __iter__(self):
+        with open(self.path, 'rb') as fh:
+            self._stream = JsonObjectStream(fh)
+            yield from self._stream.items('users')
+
+
+class ReportsDirSource:
+    """Users of a reports/ directory, one JSON file each"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.files = sorted(self.path.glob('*.json'))
+        self._read = 0
+
+    def identity(self):
+        return {'path': str(self.path.resolve()), 'files': len(self.files)}
+
+    def progress(self):
+        return f"{self._read / len(self.files):.0%}" if self.files else ''
+
+    def __iter__(self):
+        for path in self.files:
+            self._read += 1
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            if not record.get('email'):
+                log(f"   ⚠️  Skipping {path.name}: no email")
+                continue
+            yield record['email'], record
+
+
+def open_source(path):
+    return ReportsDirSource(path) if Path(path).is_dir() else LegacyFileSource(path)
+
+
+def convert(email, record):
+    """
+    Legacy user record -> (profile, tests) for the bulk repository API
+
+    Raises:
+        ValueError: The record is not in a legacy format
+    """
+    if not isinstance(record, dict) or not isinstance(record.get('tests', {}), dict):
+        raise ValueError("not a legacy user record")
+    profile = {
+        'email': email,
+        'created_at': record.get('created_at'),
+        'last_accessed': record.get('last_accessed'),
+    }
+    return profile, record.get('tests', {})
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+
+class Checkpoint:
+    """
+    How far a migration of one source into one target got.
+
+    done    Number of users, in source order, that are all written (or
+            failed); a re-run skips them
+    failed  Emails that could not be written; a re-run retries them
+    """
+
+    def __init__(self, path, source, target, restart=False):
+        self.path = Path(path)
+        self.key = {'source': source, 'target': target}
+        self.done = 0
+        self.failed = {}
+        if self.path.exists() and not restart:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('key') == self.key:
+                self.done = data['done']
+                self.failed = data['failed']
+            else:
+                log(f"   Checkpoint {self.path} is for another source or target; starting over")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f'.{self.path.name}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': self.key, 'done': self.done, 'failed': self.failed}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def describe_target(users_dir, database_url):
+    """Stable, password-free name of the migration target"""
+    if database_url:
+        url = urlparse(database_url)
+        return f"postgres://{url.hostname}:{url.port or 5432}{url.path}"
+    return f"file:{Path(users_dir).resolve()}"
+
+
+# ---------------------------------------------------------------------------
+# Migration
+# ---------------------------------------------------------------------------
+
+def import_batch(user_repo, test_repo, batch):
+    """
+    Write one batch of (email, profile, tests); on error, retry user by user
+
+    Returns:
+        dict: email -> error message, for users that could not be written
+    """
+    try:
+        user_repo.import_profiles([profile for _, profile, _ in batch])
+        test_repo.import_histories({email: tests for email, _, tests in batch})
+        return {}
+    except Exception:
+        pass
+
+    failed = {}
+    for email, profile, tests in batch:
+        try:
+            user_repo.import_profiles([profile])
+            test_repo.import_histories({email: tests})
+        except Exception as exc:
+            failed[email] = f"{type(exc).__name__}: {exc}"
+    return failed
+
+
+def migrate(source, user_repo, test_repo, checkpoint, batch_size=200, workers=4, dry_run=False):
+    """
+    Stream *source* into the repositories
+
+    Returns:
+        dict: Counts of users migrated, skipped (already done) and failed
+    """
+    counts = {'migrated': 0, 'skipped': 0, 'failed': 0}
+    retry = set(checkpoint.failed)
+    started = time.monotonic()
+    last_report = started
+
+    # Batches finish out of order; the checkpoint only advances past a batch
+    # once every batch before it has finished too
+    finished = {}
+    next_batch = 0
+
+    def settle(future, batch_index, end, emails):
+        nonlocal next_batch
+        failed = future.result() if future is not None else {}
+        for email in emails:
+            checkpoint.failed.pop(email, None)
+        checkpoint.failed.update(failed)
+        counts['failed'] += len(failed)
+        counts['migrated'] += len(emails) - len(failed)
+        finished[batch_index] = end
+        while next_batch in finished:
+            checkpoint.done = max(checkpoint.done, finished.pop(next_batch))
+            next_batch += 1
+        if not dry_run:
+            checkpoint.save()
+
+    def report(force=False):
+        nonlocal last_report
+        now = time.monotonic()
+        if force or now - last_report >= PROGRESS_SECONDS:
+            last_report = now
+            rate = counts['migrated'] / max(now - started, 1e-9)
+            log(f"   {counts['migrated']:,} migrated, {counts['skipped']:,} skipped, "
+                f"{counts['failed']:,} failed  {source.progress():>4}  ({rate:,.0f} users/s)")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def drain(limit):
+            while len(pending) > limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    settle(future, *pending.pop(future))
+
+        batch = []
+        batch_index = 0
+        position = 0
+        for email, record in source:
+            position += 1
+            if position <= checkpoint.done and email not in retry:
+                counts['skipped'] += 1
+                continue
+            try:
+                profile, tests = convert(email, record)
+            except ValueError as exc:
+                checkpoint.failed[email] = str(exc)
+                counts['failed'] += 1
+                continue
+            batch.append((email, profile, tests))
+
+            if len(batch) >= batch_size:
+                emails = [item[0] for item in batch]
+                if dry_run:
+                    settle(None, batch_index, position, emails)
+                else:
+                    # Bound the batches held in memory while workers write
+                    drain(workers * 2 - 1)
+                    future = pool.submit(import_batch, user_repo, test_repo, batch)
+                    pending[future] = (batch_index, position, emails)
+                batch = []
+                batch_index += 1
+                report()
+
+        if batch:
+            emails = [item[0] for item in batch]
+            if dry_run:
+                settle(None, batch_index, position, emails)
+            else:
+                future = pool.submit(import_batch, user_repo, test_repo, batch)
+                pending[future] = (batch_index, position, emails)
+        drain(0)
+
+    # Users skipped or rejected after the last batch still count as done
+    checkpoint.done = max(checkpoint.done, position)
+    if not dry_run:
+        checkpoint.save()
+    report(force=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrate legacy user data (test_results.json or reports/) into the storage backend",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('source', nargs='?', default=str(DEFAULT_SOURCE),
+                        help='Legacy test_results.json or reports/ directory (default: data/test_results.json)')
+    parser.add_argument('--users-dir', default=str(PROJECT_ROOT / 'users'),
+                        help='users/ directory for file storage (default: users/)')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'),
+                        help='PostgreSQL URL (default: $DATABASE_URL; file storage when unset)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Batches written concurrently (default: 4; keep <= DB_POOL_MAX on PostgreSQL)')
+    parser.add_argument('--batch-size', type=int, default=200, help='Users per batch (default: 200)')
+    parser.add_argument('--checkpoint', default=str(DEFAULT_CHECKPOINT),
+                        help='Checkpoint file (default: instance/migrate_checkpoint.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and migrate every user')
+    parser.add_argument('--dry-run', action='store_true', help='Read and convert only; write nothing')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"Nothing to migrate: {args.source} not found")
+        return
+
+    source = open_source(args.source)
+    target = describe_target(args.users_dir, args.database_url)
+    checkpoint = Checkpoint(args.checkpoint, source.identity(), target, restart=args.restart)
+
+    user_repo = test_repo = None
+    if not args.dry_run:
+        try:
+            user_repo, test_repo, _ = make_repositories(
+                users_dir=args.users_dir, database_url=args.database_url,
+                backend='postgres' if args.database_url else 'file',
+            )
+        except RuntimeError:
+            print(f"❌ Could not connect to {target}; nothing migrated")
+            sys.exit(1)
+
+    print(f"Source: {args.source}")
+    print(f"Target: {target}{'  (dry run)' if args.dry_run else ''}")
+    if checkpoint.done:
+        print(f"Resuming after {checkpoint.done:,} users ({len(checkpoint.failed)} to retry)")
+    print()
+
+    started = time.monotonic()
+    try:
+        counts = migrate(
+            source, user_repo, test_repo, checkpoint,
+            batch_size=args.batch_size, workers=args.workers, dry_run=args.dry_run,
+        )
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {checkpoint.done:,} users; re-run the same command to resume")
+        sys.exit(130)
+    finally:
+        if user_repo is not None:
+            user_repo.close()
+            test_repo.close()
+
+    print(f"\n{'=' * 60}")
+    print(f"  {'Checked: ' if args.dry_run else 'Migrated:'} {counts['migrated']:,}")
+    print(f"  Skipped:  {counts['skipped']:,} (already migrated)")
+    print(f"  Failed:   {counts['failed']:,}")
+    print(f"  Time:     {time.monotonic() - started:.1f}s")
+    print(f"{'=' * 60}")
+    if checkpoint.failed:
+        for email, error in sorted(checkpoint.failed.items())[:20]:
+            print(f"   ❌ {email}: {error}")
+        if len(checkpoint.failed) > 20:
+            print(f"   ... and {len(checkpoint.failed) - 20} more (see {args.checkpoint})")
+        print("Re-run the same command to retry them.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
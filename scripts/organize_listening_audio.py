@@ -40,6 +40,24 @@ Usage:
 
   # Custom source and output directories
   python scripts/organize_listening_audio.py --source /path/to/materials --output /path/to/output
+
+  # Force plain copies, one test at a time
+  python scripts/organize_listening_audio.py --link-mode copy --jobs 1
+
+Tests are hashed and their files placed on --jobs threads (default: CPU
+count). The report is printed in test order once all the work is done, so
+it is the same for any number of jobs. With --link-mode auto (the
+default) files are cloned copy-on-write (reflink) where the file system
+supports it. Otherwise they are hard-linked to the source when source and
+output share a file system, and copied when they do not. A hard-linked
+file shares its bytes with the source material, so edit sources by
+replacing files, not in place.
+
+Re-runs only copy what changed: every file is hashed (BLAKE2b, see
+media_hash.py) and the digests are kept in <output>/.media_index.json.
+A destination already holding the same bytes is left alone, and a clip
+identical to one already organized for another test is hard-linked to it
+instead of stored twice. --force copies everything again.
 """
 
 import argparse
@@ -47,8 +65,17 @@ import os
 import re
 import shutil
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from media_hash import MediaIndex  # noqa: E402
+
+INDEX_NAME = ".media_index.json"
+
 
 SOURCE_DIR = "/data/celpip-materials-1"
 OUTPUT_DIR = "/data/celpip-materials-1/organized"
@@ -147,10 +174,79 @@ def rename_question_file(filename, listening_num):
     return f"p{part_num}-q{question_num}{ext}", ext
 
 
-def process_test(listening_num, listening_dir, output_dir, dry_run=False):
+LINK_MODES = ('auto', 'copy', 'hardlink', 'reflink')
+
+
+def _reflink(src, dst):
     """
-    Process one test's listening directory.
-    Returns list of (src, dst, status) tuples.
+    Clone src to dst copy-on-write (Linux FICLONE: Btrfs, XFS, ...).
+    Raises OSError when the platform or file system cannot.
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError("reflink is only supported on Linux")
+    import fcntl
+
+    ficlone = getattr(fcntl, 'FICLONE', 0x40049409)
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), ficlone, s.fileno())
+    shutil.copystat(src, dst)
+
+
+def _materialize(src, tmp, mode):
+    """Create tmp with src's bytes as cheaply as mode allows. Returns the method used."""
+    if mode in ('auto', 'reflink'):
+        try:
+            _reflink(src, tmp)
+            return 'reflink'
+        except OSError:
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+    if mode in ('auto', 'hardlink'):
+        try:
+            os.link(src, tmp)
+            return 'hardlink'
+        except OSError:
+            pass  # different file system
+    shutil.copy2(src, tmp)
+    return 'copy'
+
+
+def place_file(src, dst, link_to=None, mode='copy'):
+    """
+    Write dst with src's bytes, or as a hard link to link_to (same bytes).
+
+    mode picks how src is materialized: 'copy', 'hardlink' (shares the
+    source file's inode), 'reflink' (copy-on-write clone) or 'auto'
+    (reflink, else hardlink, else copy). Falls back to a plain copy when
+    the requested method is not possible (e.g. across file systems).
+
+    Goes through a temp file and a rename so an existing dst, which may be
+    hard-linked to another file, is replaced rather than written through.
+
+    Returns:
+        str: Method used ('copy', 'hardlink', 'reflink' or 'dedup-link')
+    """
+    tmp = f"{dst}.tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    if link_to:
+        try:
+            os.link(link_to, tmp)
+            method = 'dedup-link'
+        except OSError:
+            shutil.copy2(link_to, tmp)
+            method = 'copy'
+    else:
+        method = _materialize(src, tmp, mode)
+    os.replace(tmp, dst)
+    return method
+
+
+def plan_test(listening_num, listening_dir, output_dir, index):
+    """
+    Map one test's files to their standardized destinations and hash them.
+    Returns list of (src, dst, status, digest) tuples; status is "OK" for
+    files to place, or a SKIPPED/DUPLICATE message.
     """
     results = []
     dest_dir = os.path.join(output_dir, f"test_{listening_num}")
@@ -181,24 +277,110 @@ def process_test(listening_num, listening_dir, output_dir, dry_run=False):
                 new_name, _ = result
 
         if not new_name:
-            results.append((src, None, f"SKIPPED (unrecognized): {filename}"))
+            results.append((src, None, f"SKIPPED (unrecognized): {filename}", None))
             continue
 
         dst = os.path.join(dest_dir, new_name)
 
         if new_name in seen_destinations:
-            results.append((src, dst, f"DUPLICATE (already mapped from {seen_destinations[new_name]}): {filename} -> {new_name}"))
+            results.append((src, dst, f"DUPLICATE (already mapped from {seen_destinations[new_name]}): {filename} -> {new_name}", None))
             continue
 
         seen_destinations[new_name] = filename
+        results.append((src, dst, "OK", index.digest(src)))
 
-        if not dry_run:
-            os.makedirs(dest_dir, exist_ok=True)
-            shutil.copy2(src, dst)
+    return results
 
-        results.append((src, dst, "OK"))
 
-    return results
+def resolve_plans(plans, output_dir, index, force=False):
+    """
+    Decide which planned files are unchanged, which are hard-linked to an
+    identical clip and which are placed from their source.
+
+    Tests are resolved in the order given, so the outcome (and the report)
+    is the same however many jobs planned them.
+
+    Args:
+        plans: [(test_id, plan_test() results)] in report order
+
+    Returns:
+        dict: {test_id: [(src, dst, status, digest, link_to)]}
+    """
+    planned = {
+        os.path.abspath(dst): digest
+        for _, entries in plans for _, dst, status, digest in entries if status == "OK"
+    }
+    first_by_digest = {}
+    resolved = {}
+    for test_id, entries in plans:
+        rows = resolved[test_id] = []
+        for src, dst, status, digest in entries:
+            if status != "OK":
+                rows.append((src, dst, status, digest, None))
+                continue
+            if not force and os.path.isfile(dst) and index.destination_digest(dst) == digest:
+                first_by_digest.setdefault(digest, dst)
+                rows.append((src, dst, "UNCHANGED", digest, None))
+                continue
+
+            existing = index.destination_for(digest)
+            if existing and planned.get(existing, digest) != digest:
+                existing = None  # about to be replaced with other bytes
+            existing = existing or first_by_digest.get(digest)
+            if existing and os.path.abspath(existing) != os.path.abspath(dst):
+                label = os.path.relpath(existing, output_dir)
+                rows.append((src, dst, f"LINKED (same bytes as {label})", digest, existing))
+            else:
+                first_by_digest.setdefault(digest, dst)
+                rows.append((src, dst, "OK", digest, None))
+    return resolved
+
+
+def place_files(resolved, index, mode='copy', jobs=1):
+    """
+    Write every resolved file, on a pool of `jobs` threads.
+
+    Files placed from their source go first, then the links to them.
+
+    Returns:
+        Counter: Files placed per method
+    """
+    placed = [row for rows in resolved.values() for row in rows if row[2] == "OK"]
+    linked = [row for rows in resolved.values() for row in rows if row[2].startswith("LINKED")]
+
+    def apply(row):
+        src, dst, _, digest, link_to = row
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        method = place_file(src, dst, link_to=link_to, mode=mode)
+        index.record_destination(dst, digest)
+        return method
+
+    methods = Counter()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for batch in (placed, linked):
+            methods.update(pool.map(apply, batch))
+    return methods
+
+
+def process_test(listening_num, listening_dir, output_dir, dry_run=False, index=None,
+                 force=False, link_mode='copy'):
+    """
+    Process one test's listening directory.
+    Returns list of (src, dst, status) tuples.
+
+    Status is "OK" (placed), "UNCHANGED" (dst already holds these bytes),
+    "LINKED ..." (hard-linked to an identical organized clip), or a
+    SKIPPED/DUPLICATE message.
+    """
+    if index is None:
+        index = MediaIndex(None)
+    resolved = resolve_plans(
+        [(listening_num, plan_test(listening_num, listening_dir, output_dir, index))],
+        output_dir, index, force=force,
+    )
+    if not dry_run:
+        place_files(resolved, index, mode=link_mode)
+    return [(src, dst, status) for src, dst, status, _, _ in resolved[listening_num]]
 
 
 def main():
@@ -222,6 +404,19 @@ def main():
         '--dry-run', action='store_true',
         help='Show what would be copied without actually copying'
     )
+    parser.add_argument(
+        '--force', action='store_true',
+        help='Copy every file again, even when the destination is unchanged'
+    )
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=os.cpu_count() or 1,
+        help='Tests hashed and files placed in parallel (default: CPU count)'
+    )
+    parser.add_argument(
+        '--link-mode', choices=LINK_MODES, default='auto',
+        help='How files are placed: auto (reflink, else hardlink, else copy), '
+             'copy, hardlink or reflink (default: auto)'
+    )
 
     args = parser.parse_args()
 
@@ -261,7 +456,27 @@ def main():
     print(f"Tests:   {', '.join(sorted_tests)}")
     print("=" * 70)
 
+    # Read in dry runs too (so unchanged files are reported), but only saved after real runs
+    index = MediaIndex(os.path.join(args.output, INDEX_NAME))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {
+            test_id: pool.submit(plan_test, test_id, listening_dirs[test_id], args.output, index)
+            for test_id in sorted_tests
+        }
+        plans = [(test_id, futures[test_id].result()) for test_id in sorted_tests]
+    resolved = resolve_plans(plans, args.output, index, force=args.force)
+
+    methods = Counter()
+    if not args.dry_run:
+        methods = place_files(resolved, index, mode=args.link_mode, jobs=args.jobs)
+        index.save()
+    elapsed = time.perf_counter() - started
+
     total_ok = 0
+    total_unchanged = 0
+    total_linked = 0
     total_skipped = 0
     total_dup = 0
     empty_tests = []
@@ -271,19 +486,23 @@ def main():
         print(f"\nTest {test_id}: {src_dir}")
         print("-" * 50)
 
-        results = process_test(test_id, src_dir, args.output, dry_run=args.dry_run)
-
+        results = resolved[test_id]
         if not results:
             print("  (no audio/video files found)")
             empty_tests.append(test_id)
             continue
 
-        for src, dst, status in results:
+        for src, dst, status, _, _ in results:
             src_name = os.path.basename(src)
             if status == "OK":
                 dst_name = os.path.basename(dst)
                 print(f"  {src_name:30s} -> {dst_name}")
                 total_ok += 1
+            elif status == "UNCHANGED":
+                total_unchanged += 1
+            elif status.startswith("LINKED"):
+                print(f"  {src_name:30s} -> {os.path.basename(dst)} {status}")
+                total_linked += 1
             elif status.startswith("SKIPPED"):
                 print(f"  {status}")
                 total_skipped += 1
@@ -294,13 +513,19 @@ def main():
     print("\n" + "=" * 70)
     print("SUMMARY")
     print("=" * 70)
-    print(f"  Copied:     {total_ok} files")
+    print(f"  Placed:     {total_ok} files")
+    print(f"  Unchanged:  {total_unchanged} files (already organized, not copied)")
+    print(f"  Linked:     {total_linked} files (identical to a clip in another test)")
     print(f"  Skipped:    {total_skipped} files (unrecognized names)")
     print(f"  Duplicates: {total_dup} files")
     if empty_tests:
         print(f"  Empty tests: {', '.join(empty_tests)} (no audio files)")
+    if methods:
+        placed = ", ".join(f"{count} {method}" for method, count in sorted(methods.items()))
+        print(f"  Placed by:  {placed}")
+    print(f"  Time:       {elapsed:.2f}s ({args.jobs} job(s), link mode {args.link_mode})")
 
-    if total_ok > 0 and not args.dry_run:
+    if total_ok + total_linked > 0 and not args.dry_run:
         print(f"\nOrganized files are in: {args.output}")
         print("\nNext step — upload to Cloudinary:")
         print(f"  python scripts/gdrive_to_cloudinary.py \\")
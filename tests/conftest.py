@@ -0,0 +1,22 @@
+"""
+Shared pytest setup.
+
+Run from the project root:
+
+  pip install -r requirements-dev.txt
+  python -m pytest -q
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture(autouse=True)
+def file_storage_only(monkeypatch):
+    """Keep tests on file storage even when DATABASE_URL is set"""
+    monkeypatch.delenv('DATABASE_URL', raising=False)
@@ -0,0 +1,90 @@
+"""
+BackgroundWriter ordering, flush and failure handling.
+
+A user's writes must land in submission order even when the queue is full
+and a write runs inline; flush() waits only for the given user's writes and
+for a bounded time; a write that fails in storage is retried and counted.
+"""
+
+import threading
+
+import pytest
+
+from utils.background import BackgroundWriter
+from utils.results_tracker import ResultsTracker
+from utils.storage import file_storage
+
+EMAIL = 'candidate@example.com'
+
+
+class _Target:
+    """Records calls; block() holds the worker until released"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def block(self):
+        self.started.set()
+        assert self.release.wait(10)
+
+    def record(self, value):
+        self.calls.append(value)
+
+
+@pytest.fixture
+def target():
+    target = _Target()
+    yield target
+    target.release.set()
+
+
+def test_inline_write_waits_for_the_same_key(target):
+    writer = BackgroundWriter(target, workers=1, max_queue=1, submit_timeout=0.05, max_retries=0)
+    writer.submit(EMAIL, 'block')
+    assert target.started.wait(5)
+    assert writer.submit(EMAIL, 'record', value=1)
+
+    # The queue is full: value 2 runs inline, but only after value 1
+    timer = threading.Timer(0.2, target.release.set)
+    timer.start()
+    assert not writer.submit(EMAIL, 'record', value=2)
+    timer.join()
+
+    assert writer.flush(EMAIL)
+    assert target.calls == [1, 2]
+    assert writer.stats()['inline'] == 1
+
+
+def test_flush_waits_for_one_key_only(target):
+    # One worker, so both users share a shard
+    writer = BackgroundWriter(target, workers=1, max_retries=0)
+    writer.submit('other@example.com', 'block')
+    assert target.started.wait(5)
+
+    assert writer.flush(EMAIL, timeout=0.1)
+    assert not writer.flush('other@example.com', timeout=0.1)
+
+    target.release.set()
+    assert writer.flush('other@example.com')
+
+
+def test_failed_file_write_is_retried_and_counted(tmp_path, monkeypatch):
+    tracker = ResultsTracker(users_dir=str(tmp_path))
+    writer = BackgroundWriter(tracker, workers=1, max_retries=2, retry_backoff=0)
+
+    def fail_dump(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(file_storage.json, 'dump', fail_dump)
+    writer.submit(EMAIL, 'save_test_result', user_email=EMAIL, test_num=1, skill='reading', part_num=1,
+                  answers={1: 0}, correct_answers={1: 0}, score=1, max_score=1, attempt_id='attempt-1')
+    assert writer.flush(EMAIL)
+
+    stats = writer.stats()
+    assert stats['retried'] == 2
+    assert stats['failed'] == 1
+    assert stats['succeeded'] == 0
+    # The temp files were cleaned up
+    assert not list(tmp_path.rglob('*.tmp'))
@@ -0,0 +1,49 @@
+"""
+Smoke test for scripts/bench_content.py.
+
+Runs every micro-benchmark case once, over real parts and a small synthetic
+part, so the script keeps up with loader and view-model changes. Timing is
+left to the script itself (baselines with --save / --compare).
+"""
+
+import importlib.util
+
+import pytest
+
+from conftest import PROJECT_ROOT
+
+
+@pytest.fixture(scope='module')
+def bench(tmp_path_factory):
+    # make_cases imports app, which resolves templates/ and data/ relative to
+    # the working directory and writes users under USERS_DIR
+    patch = pytest.MonkeyPatch()
+    patch.chdir(PROJECT_ROOT)
+    patch.setenv('USERS_DIR', str(tmp_path_factory.mktemp('users')))
+    patch.delenv('DATABASE_URL', raising=False)
+    spec = importlib.util.spec_from_file_location('bench_content', PROJECT_ROOT / 'scripts' / 'bench_content.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    patch.undo()
+
+
+def _run_all(cases):
+    assert cases
+    for func in cases.values():
+        func()
+
+
+def test_corpus_cases_run(bench):
+    loader = bench.TestDataLoader(data_dir=str(PROJECT_ROOT / 'data'))
+    parts = [(1, skill, part_num) for skill in bench.SKILLS for part_num in loader.list_available_parts(1, skill)]
+    _run_all(bench.make_cases(loader, parts, 'test 1'))
+
+
+def test_synthetic_cases_run(bench, tmp_path):
+    loader = bench.TestDataLoader(data_dir=str(PROJECT_ROOT / 'data'))
+    written = bench.write_synthetic_data(loader, tmp_path, 1, min_questions=30, passage_factor=2)
+    assert written
+    synthetic = bench.TestDataLoader(data_dir=str(tmp_path))
+    for skill, part_num in written:
+        _run_all(bench.make_cases(synthetic, [(bench.SYNTHETIC_TEST, skill, part_num)], 'synthetic'))
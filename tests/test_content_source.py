@@ -0,0 +1,113 @@
+"""
+LocalContentSource / HttpContentSource parity.
+
+Instances reading the published copy (scripts/content_index.py served over
+HTTP) must see the same tests, parts, bytes and content version as instances
+reading data/ directly, so their pages and ETags agree.
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import PROJECT_ROOT
+from utils import data_loader
+from utils.content_source import INDEX_NAME, HttpContentSource, LocalContentSource
+
+SKILLS = ('reading', 'listening', 'writing', 'speaking')
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # A copy, so tests can change files without touching data/
+    target = tmp_path / 'data'
+    shutil.copytree(PROJECT_ROOT / 'data', target)
+    return target
+
+
+def _publish(data_dir, out_dir, *extra):
+    subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / 'scripts' / 'content_index.py'),
+         '--data-dir', str(data_dir), '--out', str(out_dir), *extra],
+        check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def published(data_dir, tmp_path):
+    """(output directory, base URL) of data_dir published and served over HTTP"""
+    out_dir = tmp_path / 'published'
+    _publish(data_dir, out_dir)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(_QuietHandler, directory=str(out_dir)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield out_dir, f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+def test_sources_agree(data_dir, published):
+    _, url = published
+    local = LocalContentSource(data_dir)
+    http = HttpContentSource(url)
+
+    assert http.version() == local.version()
+    assert http.list_tests() == local.list_tests()
+    assert local.list_tests()
+    for test_num in local.list_tests():
+        for skill in SKILLS:
+            parts = local.list_parts(test_num, skill)
+            assert http.list_parts(test_num, skill) == parts
+            for part_num in parts:
+                assert http.read(test_num, skill, part_num) == local.read(test_num, skill, part_num)
+
+
+def test_loaders_agree(data_dir, published):
+    _, url = published
+    local = data_loader.TestDataLoader(data_dir=str(data_dir), source=LocalContentSource(data_dir))
+    http = data_loader.TestDataLoader(data_dir=str(data_dir), source=HttpContentSource(url))
+
+    assert http.get_content_version() == local.get_content_version()
+    for test_num in local.list_available_tests():
+        for skill in SKILLS:
+            for part_num in local.list_available_parts(test_num, skill):
+                assert (http.load_test_part(test_num, skill, part_num)
+                        == local.load_test_part(test_num, skill, part_num))
+
+
+def test_republished_change_reaches_http_source(data_dir, published):
+    out_dir, url = published
+    http = HttpContentSource(url, refresh_seconds=0)
+    before = http.version()
+
+    part_file = data_dir / 'test_1' / 'reading' / 'part1.json'
+    part = json.loads(part_file.read_text(encoding='utf-8'))
+    part['title'] = 'Changed title'
+    part_file.write_text(json.dumps(part), encoding='utf-8')
+    _publish(data_dir, out_dir)
+
+    assert http.version() == LocalContentSource(data_dir).version() != before
+    assert json.loads(http.read(1, 'reading', 1))['title'] == 'Changed title'
+
+
+def test_file_not_matching_index_is_rejected(published):
+    out_dir, url = published
+    http = HttpContentSource(url)
+    http.version()
+
+    # A part uploaded ahead of its index entry
+    (out_dir / 'test_1' / 'reading' / 'part1.json').write_text('{"title": "mid-publish"}', encoding='utf-8')
+
+    with pytest.raises(ValueError, match=INDEX_NAME):
+        http.read(1, 'reading', 1)
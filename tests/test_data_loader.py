@@ -0,0 +1,52 @@
+"""
+TestDataLoader's dropdown helpers accept both question forms.
+
+The dict API (get_all_questions, get_questions_by_section) and the content
+model (load_part) must render the same HTML.
+"""
+
+import pytest
+
+from conftest import PROJECT_ROOT
+from utils import data_loader
+
+SKILLS = ('reading', 'listening', 'writing', 'speaking')
+
+
+@pytest.fixture(scope='module')
+def loader():
+    return data_loader.TestDataLoader(data_dir=str(PROJECT_ROOT / 'data'))
+
+
+def _parts(loader):
+    for test_num in loader.list_available_tests():
+        for skill in SKILLS:
+            for part_num in loader.list_available_parts(test_num, skill):
+                yield test_num, skill, part_num
+
+
+def test_question_dropdowns_match_for_dicts_and_models(loader):
+    checked = 0
+    for key in _parts(loader):
+        questions = loader.get_all_questions(loader.load_test_part(*key))
+        if not questions:
+            continue
+        models = loader.load_part(*key).questions
+        for test_type in ('default', 'information'):
+            assert (loader.build_question_dropdown_html(questions, test_type, require_answers=True)
+                    == loader.build_question_dropdown_html(models, test_type, require_answers=True))
+        checked += 1
+    assert checked
+
+
+def test_inline_dropdowns_match_for_dicts_and_models(loader):
+    checked = 0
+    for key in _parts(loader):
+        raw_sections = loader.load_test_part(*key).get('sections', [])
+        for raw, section in zip(raw_sections, loader.load_part(*key).sections):
+            if '__DROPDOWN_' not in section.content:
+                continue
+            assert (loader.process_dropdown_content(raw['content'], raw['questions'])
+                    == loader.process_dropdown_content(section.content, section.questions))
+            checked += 1
+    assert checked
@@ -0,0 +1,69 @@
+"""
+File storage read-modify-write locking.
+
+Every instance sharing one users/ volume must keep both of two concurrent
+save_test_result calls: _user_lock serializes them with a thread lock
+inside a process and flock across processes.
+"""
+
+import multiprocessing
+import threading
+
+import pytest
+
+from utils.results_tracker import ResultsTracker
+from utils.storage import file_storage
+
+EMAIL = 'candidate@example.com'
+ATTEMPT = 'attempt-1'
+PARTS_PER_WRITER = 8
+
+
+def _save_parts(users_dir, skill, barrier=None):
+    tracker = ResultsTracker(users_dir=users_dir)
+    if barrier is not None:
+        barrier.wait()
+    for part_num in range(1, PARTS_PER_WRITER + 1):
+        tracker.save_test_result(
+            EMAIL, 1, skill, part_num,
+            answers={1: 0}, correct_answers={1: 0},
+            score=1, max_score=1, attempt_id=ATTEMPT,
+        )
+
+
+def _saved_parts(users_dir):
+    tracker = ResultsTracker(users_dir=users_dir)
+    tracker.complete_test_attempt(EMAIL, 1, ATTEMPT)
+    (attempt,) = tracker.get_user_test_history(EMAIL, 1)['all_attempts']
+    return {skill: sorted(int(p) for p in data['parts']) for skill, data in attempt['skills'].items()}
+
+
+def test_concurrent_threads_keep_both_parts(tmp_path):
+    users_dir = str(tmp_path)
+    barrier = threading.Barrier(2)
+    threads = [threading.Thread(target=_save_parts, args=(users_dir, skill, barrier))
+               for skill in ('reading', 'listening')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    expected = list(range(1, PARTS_PER_WRITER + 1))
+    assert _saved_parts(users_dir) == {'reading': expected, 'listening': expected}
+
+
+@pytest.mark.skipif(file_storage.fcntl is None, reason="flock is not available on this platform")
+def test_concurrent_processes_keep_both_parts(tmp_path):
+    users_dir = str(tmp_path)
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(2)
+    processes = [context.Process(target=_save_parts, args=(users_dir, skill, barrier))
+                 for skill in ('reading', 'listening')]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    expected = list(range(1, PARTS_PER_WRITER + 1))
+    assert _saved_parts(users_dir) == {'reading': expected, 'listening': expected}
@@ -0,0 +1,152 @@
+"""
+Server-side session stores and ServerSideSessionInterface.
+
+The Redis store runs against TEST_REDIS_URL when it is set, otherwise against
+fakeredis; the test is skipped when neither is available.
+"""
+
+import os
+import time
+
+import pytest
+from flask import Flask, session
+
+from utils import sessions
+from utils.sessions import RedisSessionStore, ServerSideSessionInterface, SqliteSessionStore
+
+
+class _Clock:
+    """Stand-in for the time module inside utils.sessions"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(sessions, 'time', clock)
+
+    def advance(seconds):
+        clock.now += seconds
+
+    return SqliteSessionStore(str(tmp_path / 'sessions.sqlite3')), advance
+
+
+@pytest.fixture
+def redis_store(monkeypatch):
+    redis = pytest.importorskip('redis')
+    url = os.getenv('TEST_REDIS_URL')
+    if url is None:
+        fakeredis = pytest.importorskip('fakeredis')
+        monkeypatch.setattr(redis.Redis, 'from_url', fakeredis.FakeRedis.from_url)
+        url = 'redis://localhost:6379/0'
+    store = RedisSessionStore(url, prefix=f'celpip-test:{os.getpid()}:{time.monotonic_ns()}:')
+    # Redis expires keys on its own clock
+    return store, time.sleep
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def store(request):
+    return request.getfixturevalue(f'{request.param}_store')
+
+
+def test_round_trip(store):
+    store, _ = store
+    assert store.get('sid-1') is None
+
+    store.set('sid-1', b'{"a": 1}', ttl=60)
+    assert store.get('sid-1') == b'{"a": 1}'
+
+    store.set('sid-1', b'{"a": 2}', ttl=60)
+    assert store.get('sid-1') == b'{"a": 2}'
+    assert store.get('sid-2') is None
+
+    store.delete('sid-1')
+    assert store.get('sid-1') is None
+
+
+def test_expiry(store):
+    store, advance = store
+    store.set('short', b'x', ttl=1)
+    store.set('touched', b'y', ttl=1)
+    store.touch('touched', ttl=30)
+
+    advance(1.5)
+
+    assert store.get('short') is None
+    assert store.get('touched') == b'y'
+
+
+def _app(store):
+    app = Flask(__name__)
+    app.secret_key = 'test-secret'
+    app.session_interface = ServerSideSessionInterface(store)
+
+    @app.route('/set/<key>/<value>')
+    def set_value(key, value):
+        session[key] = value
+        return 'ok'
+
+    @app.route('/get/<key>')
+    def get_value(key):
+        return session.get(key, '')
+
+    @app.route('/clear')
+    def clear():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+def _sid(client, store):
+    cookie = client.get_cookie('session')
+    return ServerSideSessionInterface(store)._signer(client.application).unsign(cookie.value).decode('utf-8')
+
+
+def test_interface_keeps_data_on_the_server(sqlite_store):
+    store, _ = sqlite_store
+    client = _app(store).test_client()
+
+    client.get('/set/answer/42')
+    assert client.get('/get/answer').get_data(as_text=True) == '42'
+    # The cookie carries the signed id only
+    assert '42' not in client.get_cookie('session').value
+    assert store.get(_sid(client, store)) is not None
+
+    sid = _sid(client, store)
+    client.get('/clear')
+    assert store.get(sid) is None
+
+
+def test_tampered_cookie_starts_a_new_session(sqlite_store):
+    store, _ = sqlite_store
+    client = _app(store).test_client()
+    client.get('/set/answer/42')
+
+    client.set_cookie('session', 'forged-sid.bad-signature')
+    assert client.get('/get/answer').get_data(as_text=True) == ''
+
+
+def test_login_rotates_session_id(sqlite_store):
+    store, _ = sqlite_store
+    app = _app(store)
+    victim = app.test_client()
+    victim.get('/set/progress/part1')
+    planted_sid = _sid(victim, store)
+
+    # An attacker who knows the pre-login id must not share the logged-in session
+    victim.get('/set/user_email/candidate@example.com')
+    logged_in_sid = _sid(victim, store)
+
+    assert logged_in_sid != planted_sid
+    assert store.get(planted_sid) is None
+    assert victim.get('/get/progress').get_data(as_text=True) == 'part1'
+
+    # Requests that leave the user unchanged keep the id
+    victim.get('/set/progress/part2')
+    assert _sid(victim, store) == logged_in_sid
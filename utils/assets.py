@@ -0,0 +1,196 @@
+"""
+Static asset helpers — fingerprinted URLs, precompressed files, gzip.
+
+scripts/build_assets.py copies every file under static/ to static/dist/
+with a content hash in its name and writes .gz/.br siblings plus a manifest.
+At runtime:
+  • asset_url() maps a static path to its fingerprinted copy (when built),
+    so those URLs can be cached as immutable;
+  • send_static_asset() serves the .br/.gz sibling the client accepts;
+  • compress_response() gzips large dynamic HTML/JSON responses.
+scripts/build_images.py adds resized WebP/AVIF variants of static/images/
+(static/dist/images.json); image_sources() turns them into <picture> sources.
+Without a build everything falls back to the plain static files.
+"""
+
+import gzip
+import json
+import mimetypes
+import os
+
+from flask import request, send_from_directory, url_for
+
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMAGE_MANIFEST_NAME = 'images.json'
+
+# <source> elements are emitted in this order; browsers pick the first they support
+IMAGE_SOURCE_TYPES = ('image/avif', 'image/webp')
+
+# Fingerprinted files never change under the same name
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+}
+
+# Preferred order when the client accepts several encodings
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class AssetManifest:
+    """Mapping of original static paths to their fingerprinted copies"""
+
+    def __init__(self, static_folder):
+        """
+        Load static/dist/manifest.json if the asset build has been run
+
+        Args:
+            static_folder: Absolute path of the Flask static folder
+        """
+        self.static_folder = static_folder
+        self.path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+        self.image_path = os.path.join(static_folder, DIST_DIR, IMAGE_MANIFEST_NAME)
+        self.files = {}
+        self.images = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        if os.path.exists(self.image_path):
+            with open(self.image_path, 'r', encoding='utf-8') as f:
+                self.images = json.load(f).get('images', {})
+
+    def resolve(self, filename):
+        """
+        Get the static-relative path to serve for *filename*
+
+        Args:
+            filename: Path relative to static/ (e.g. 'images/test_1/reading/part2_diagram.png')
+
+        Returns:
+            str: Fingerprinted path under dist/, or *filename* unchanged if not built
+        """
+        return self.files.get(filename, filename)
+
+    def asset_url(self, filename):
+        """URL for a static file, fingerprinted when the asset build is present"""
+        return url_for('static', filename=self.resolve(filename))
+
+    def rewrite_url(self, url):
+        """
+        Rewrite an absolute '/static/...' URL (as used in test JSON) to its fingerprinted copy
+
+        Args:
+            url: URL from test data; anything not under /static/ is returned unchanged
+
+        Returns:
+            str: Rewritten URL
+        """
+        prefix = '/static/'
+        if not url or not url.startswith(prefix):
+            return url
+        return prefix + self.resolve(url[len(prefix):])
+
+    def image_sources(self, filename):
+        """
+        Get <picture> sources for the resized variants of an image
+
+        Args:
+            filename: Path relative to static/ or an absolute '/static/...' URL
+                      (rewritten fingerprinted URLs are not recognised)
+
+        Returns:
+            list: [{'type': 'image/avif', 'srcset': '/static/... 480w, ...'}, ...];
+                  empty when no variants were built for the image
+        """
+        if not filename:
+            return []
+        if filename.startswith('/static/'):
+            filename = filename[len('/static/'):]
+        entry = self.images.get(filename)
+        if not entry:
+            return []
+
+        sources = []
+        for mime_type in IMAGE_SOURCE_TYPES:
+            variants = entry['variants'].get(mime_type)
+            if variants:
+                srcset = ', '.join(f"/static/{path} {width}w" for path, width in variants)
+                sources.append({'type': mime_type, 'srcset': srcset})
+        return sources
+
+
+def send_static_asset(static_folder, filename, max_age):
+    """
+    Serve a static file, preferring a precompressed sibling the client accepts
+
+    Args:
+        static_folder: Absolute path of the static folder
+        filename: Requested path relative to static/
+        max_age: Cache lifetime for files that are not fingerprinted
+
+    Returns:
+        Response
+    """
+    fingerprinted = filename.startswith(DIST_DIR + '/')
+    cache_age = None if fingerprinted else max_age
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = None
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        if os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            response = send_from_directory(
+                static_folder, filename + suffix, mimetype=mimetype, max_age=cache_age
+            )
+            response.headers['Content-Encoding'] = encoding
+            break
+
+    if response is None:
+        response = send_from_directory(static_folder, filename, max_age=cache_age)
+
+    response.vary.add('Accept-Encoding')
+    if fingerprinted:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def compress_response(response, min_size=1024, level=6):
+    """
+    Gzip a dynamic response in place when it is large and the client accepts it
+
+    Args:
+        response: Flask response (from an after_request hook)
+        min_size: Smallest body in bytes worth compressing
+        level: gzip compression level
+
+    Returns:
+        Response: The same response object
+    """
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or not request.accept_encodings['gzip']
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=level))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+
+    # The encoded bytes differ from the identity representation, so a strong
+    # validator would be wrong; weak comparison still yields 304s.
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    return response
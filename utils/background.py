@@ -0,0 +1,438 @@
+"""
+Background writer for non-critical storage writes.
+
+Routes hand writes whose result the response does not need (part results,
+attempt completion, last_accessed touches, vocabulary saves) to a
+BackgroundWriter and return as soon as the session is updated. Jobs are
+named ResultsTracker operations with keyword arguments, executed on worker
+threads with retry and exponential backoff.
+
+Jobs are sharded by key (the user's email) so one user's writes run in
+submission order on a single thread. Routes that read a user's data call
+flush(email) first so users see their own writes. flush waits only for that
+key's pending jobs, and for at most BACKGROUND_FLUSH_TIMEOUT seconds; after
+that the route reads anyway. When a shard's queue is full, submit() runs the
+write inline (backpressure: the request pays instead of memory growing),
+after the key's queued jobs, so order is kept. drain() — registered with
+atexit and gunicorn's worker_exit — finishes queued jobs before the process
+exits.
+
+With a journal path (BACKGROUND_WRITES=sqlite), every job is also recorded
+in a local SQLite database until it succeeds, and jobs left behind by a
+process that died are replayed on start-up. Arguments are pickled so a
+replayed job gets the same values (int dict keys included) as a live one.
+
+A job may run more than once (a retry after a write that committed but
+raised, or a replay after a crash), so every operation submitted here must
+be idempotent: results and completions are keyed by attempt_id, and
+vocabulary notes by their pre-assigned note_id.
+"""
+
+import atexit
+import logging
+import os
+import pickle
+import queue
+import threading
+import time
+import zlib
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _Journal:
+    """SQLite record of pending jobs, so they survive a crash or restart"""
+
+    def __init__(self, path):
+        import sqlite3  # only needed in BACKGROUND_WRITES=sqlite mode
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_key    TEXT NOT NULL,
+                operation  TEXT NOT NULL,
+                payload    BLOB NOT NULL,
+                owner_pid  INTEGER NOT NULL,
+                status     TEXT NOT NULL DEFAULT 'pending',
+                error      TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+
+    def add(self, key, operation, kwargs):
+        payload = pickle.dumps(kwargs, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO jobs (job_key, operation, payload, owner_pid, created_at) VALUES (?, ?, ?, ?, ?)',
+                (key, operation, payload, os.getpid(), time.time()),
+            )
+            return cursor.lastrowid
+
+    def remove(self, job_id):
+        with self._lock:
+            self._conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def fail(self, job_id, error):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = 'failed', error = ? WHERE id = ?", (error, job_id))
+
+    def recover(self):
+        """
+        Claim pending jobs whose owning process no longer exists
+
+        Each claim is a compare-and-set on owner_pid, so when several
+        workers start together every orphaned job goes to exactly one.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, job_key, operation, payload, owner_pid FROM jobs WHERE status = 'pending' ORDER BY id"
+            ).fetchall()
+            claimed = []
+            for job_id, key, operation, payload, owner_pid in rows:
+                if owner_pid != os.getpid() and _pid_alive(owner_pid):
+                    continue
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET owner_pid = ? WHERE id = ? AND owner_pid = ? AND status = 'pending'",
+                    (os.getpid(), job_id, owner_pid),
+                )
+                if cursor.rowcount != 1:
+                    continue  # another process claimed it first
+                claimed.append((job_id, key, operation, pickle.loads(payload)))
+            return claimed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _Shard:
+    """One worker thread with its own bounded FIFO queue"""
+
+    def __init__(self, max_queue):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+
+
+class _KeyJobs:
+    """Jobs submitted and finished for one key since it last had none pending"""
+
+    __slots__ = ('submitted', 'finished')
+
+    def __init__(self):
+        self.submitted = 0
+        self.finished = 0
+
+
+class BackgroundWriter:
+    """Bounded, sharded queue of deferred storage writes"""
+
+    def __init__(self, target, enabled=True, workers=2, max_queue=1000, journal_path=None,
+                 max_retries=3, retry_backoff=0.5, submit_timeout=0.5, drain_timeout=10.0,
+                 flush_timeout=5.0):
+        """
+        Args:
+            target: Object whose methods the jobs call (ResultsTracker)
+            enabled: False runs every write inline
+            workers: Worker threads (jobs are sharded across them by key)
+            max_queue: Queued jobs per worker before submit() runs jobs inline
+            journal_path: SQLite file recording pending jobs (None: memory only)
+            max_retries: Retries after the first failed attempt
+            retry_backoff: Seconds before the first retry; doubles each retry
+            submit_timeout: Seconds submit() waits for queue space
+            drain_timeout: Seconds drain() waits for queued jobs at shutdown
+            flush_timeout: Default seconds flush() waits before the caller reads anyway
+        """
+        self.target = target
+        self.enabled = enabled
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.submit_timeout = submit_timeout
+        self.drain_timeout = drain_timeout
+        self.flush_timeout = flush_timeout
+        self.journal_path = journal_path
+        self._shards = [_Shard(max_queue) for _ in range(max(1, workers))]
+        # {key: _KeyJobs} for keys with jobs pending; entries go once they finish
+        self._key_jobs: Dict[str, _KeyJobs] = {}
+        self._key_jobs_cond = threading.Condition()
+        self._journal = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stopping = False
+        self._counts = {'queued': 0, 'inline': 0, 'succeeded': 0, 'retried': 0, 'failed': 0, 'recovered': 0}
+        self._counts_lock = threading.Lock()
+        if enabled:
+            atexit.register(self.drain)
+
+    @classmethod
+    def from_env(cls, target):
+        """
+        Build a writer configured from the environment
+
+        Environment:
+            BACKGROUND_WRITES: 'thread' (default), 'sqlite' (durable journal) or 'off'
+            BACKGROUND_WORKERS: Worker threads (default 2)
+            BACKGROUND_MAX_QUEUE: Queued jobs per worker before writes run inline (default 1000)
+            BACKGROUND_JOURNAL: SQLite journal path for 'sqlite' (default 'instance/background_jobs.sqlite3')
+            BACKGROUND_MAX_RETRIES: Retries per job (default 3)
+            BACKGROUND_DRAIN_TIMEOUT: Seconds to finish queued jobs at shutdown (default 10)
+            BACKGROUND_FLUSH_TIMEOUT: Seconds a read waits for the user's pending writes (default 5)
+        """
+        mode = os.getenv('BACKGROUND_WRITES', 'thread').lower()
+        if mode not in ('thread', 'sqlite', 'off'):
+            logger.warning("Unknown BACKGROUND_WRITES=%r; writing inline", mode)
+            mode = 'off'
+        return cls(
+            target,
+            enabled=mode != 'off',
+            workers=int(os.getenv('BACKGROUND_WORKERS', 2)),
+            max_queue=int(os.getenv('BACKGROUND_MAX_QUEUE', 1000)),
+            journal_path=(
+                os.getenv('BACKGROUND_JOURNAL', os.path.join('instance', 'background_jobs.sqlite3'))
+                if mode == 'sqlite' else None
+            ),
+            max_retries=int(os.getenv('BACKGROUND_MAX_RETRIES', 3)),
+            drain_timeout=float(os.getenv('BACKGROUND_DRAIN_TIMEOUT', 10)),
+            flush_timeout=float(os.getenv('BACKGROUND_FLUSH_TIMEOUT', 5)),
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, key, operation, **kwargs):
+        """
+        Queue target.<operation>(**kwargs)
+
+        Args:
+            key: Ordering key (user email); jobs with the same key run in order
+            operation: Method name on the target
+            **kwargs: Method arguments
+
+        Returns:
+            bool: True if queued, False if it ran inline (disabled, queue full, or shutting down)
+        """
+        if not self.enabled:
+            self._run_inline(operation, kwargs)
+            return False
+        if self._stopping:
+            # Shutting down: still let the key's queued jobs go first
+            if self._pid == os.getpid() and self._shard(key).thread.is_alive():
+                self._wait(key, self.drain_timeout)
+            self._run_inline(operation, kwargs)
+            return False
+
+        self._ensure_started()
+        shard = self._shard(key)
+        job_id = self._journal.add(key, operation, kwargs) if self._journal else None
+        self._track(key)
+        try:
+            shard.queue.put((job_id, key, operation, kwargs), timeout=self.submit_timeout)
+        except queue.Full:
+            self._finish(key)
+            logger.warning("Background queue full; running %s inline", operation)
+            # Not bounded: running ahead of the key's queued jobs would reorder its writes
+            self._wait(key, None)
+            self._run_inline(operation, kwargs)
+            if job_id is not None:
+                self._journal.remove(job_id)
+            return False
+        self._count('queued')
+        return True
+
+    def flush(self, key=None, timeout=None):
+        """
+        Wait until jobs already submitted for *key* (or all keys) have run
+
+        Only jobs with the same key are waited for, not the whole shard, so
+        one user's read does not queue behind other users' writes.
+
+        Args:
+            key: Ordering key, or None for every key
+            timeout: Seconds to wait (default flush_timeout)
+
+        Returns:
+            bool: False if the timeout expired first; the caller reads anyway
+        """
+        if not self.enabled or self._pid != os.getpid():
+            return True
+        timeout = self.flush_timeout if timeout is None else timeout
+        if self._wait(key, timeout):
+            return True
+        logger.warning("Background flush%s timed out after %.1fs; reading before pending writes",
+                       '' if key is None else ' for one user', timeout)
+        return False
+
+    def drain(self, timeout=None):
+        """Stop accepting jobs (new writes run inline) and finish the queued ones"""
+        if self._stopping or self._pid != os.getpid():
+            return
+        self._stopping = True
+        timeout = self.drain_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        stopping = []
+        for shard in self._shards:
+            try:
+                shard.queue.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                # Never got room behind the queued jobs: leave the daemon thread
+                logger.warning("Background writer did not drain within %.0fs; %d job(s) left%s",
+                               timeout, shard.queue.qsize(),
+                               " in the journal" if self._journal else "")
+                continue
+            stopping.append(shard)
+        for shard in stopping:
+            shard.thread.join(max(0.0, deadline - time.monotonic()))
+            if shard.thread.is_alive():
+                logger.warning("Background writer did not drain within %.0fs; %d job(s) left%s",
+                               timeout, shard.queue.qsize(),
+                               " in the journal" if self._journal else "")
+
+    def stats(self) -> Dict:
+        """
+        Queue depth and job outcome counts
+
+        Returns:
+            dict: enabled, durable, depth, and counts of queued/inline/succeeded/retried/failed/recovered jobs
+        """
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {
+            'enabled': self.enabled,
+            'durable': self.journal_path is not None,
+            'depth': sum(shard.queue.qsize() for shard in self._shards),
+            **counts,
+        }
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        # Threads do not survive fork: start them in the process that uses them
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self.journal_path:
+                self._journal = _Journal(self.journal_path)
+            for index, shard in enumerate(self._shards):
+                shard.queue = queue.Queue(maxsize=shard.queue.maxsize)
+                shard.thread = threading.Thread(
+                    target=self._work, args=(shard,), name=f'background-writer-{index}', daemon=True
+                )
+                shard.thread.start()
+            self._pid = os.getpid()
+            with self._key_jobs_cond:
+                self._key_jobs = {}
+            if self._journal:
+                self._recover()
+
+    def _recover(self):
+        for job_id, key, operation, kwargs in self._journal.recover():
+            self._track(key)
+            self._shard(key).queue.put((job_id, key, operation, kwargs))
+            self._count('recovered')
+        if self._counts['recovered']:
+            logger.info("Replaying %d background job(s) from %s", self._counts['recovered'], self.journal_path)
+
+    def _work(self, shard):
+        while True:
+            job = shard.queue.get()
+            if job is _STOP:
+                return
+            job_id, key, operation, kwargs = job
+            try:
+                self._execute(job_id, operation, kwargs)
+            finally:
+                self._finish(key)
+
+    def _execute(self, job_id, operation, kwargs):
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                getattr(self.target, operation)(**kwargs)
+            except Exception as exc:
+                if attempt < self.max_retries:
+                    self._count('retried')
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                logger.exception("Background %s failed after %d attempt(s)", operation, attempt + 1)
+                self._count('failed')
+                if job_id is not None:
+                    self._journal.fail(job_id, repr(exc))
+                return
+            self._count('succeeded')
+            if job_id is not None:
+                self._journal.remove(job_id)
+            return
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _run_inline(self, operation, kwargs):
+        self._count('inline')
+        getattr(self.target, operation)(**kwargs)
+
+    def _track(self, key):
+        with self._key_jobs_cond:
+            jobs = self._key_jobs.get(key)
+            if jobs is None:
+                jobs = self._key_jobs[key] = _KeyJobs()
+            jobs.submitted += 1
+
+    def _finish(self, key):
+        with self._key_jobs_cond:
+            jobs = self._key_jobs[key]
+            jobs.finished += 1
+            if jobs.finished == jobs.submitted:
+                del self._key_jobs[key]
+            self._key_jobs_cond.notify_all()
+
+    def _wait(self, key, timeout) -> bool:
+        """Wait for the jobs *key* (or every key) has pending now; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._key_jobs_cond:
+            if key is None:
+                pending = [(jobs, jobs.submitted) for jobs in self._key_jobs.values()]
+            elif key in self._key_jobs:
+                jobs = self._key_jobs[key]
+                pending = [(jobs, jobs.submitted)]
+            else:
+                pending = []
+            for jobs, target in pending:
+                while jobs.finished < target:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._key_jobs_cond.wait(remaining)
+        return True
+
+    def _shard(self, key) -> _Shard:
+        return self._shards[zlib.crc32(str(key).encode('utf-8')) % len(self._shards)]
+
+    def _count(self, name):
+        with self._counts_lock:
+            self._counts[name] += 1
@@ -0,0 +1,366 @@
+"""
+Validated, pre-rendered test content (scripts/build_content.py).
+
+The build command checks every part under data/ against the schema below
+and writes what the web process would otherwise derive per request into a
+versioned directory:
+
+  build/content_build/
+    CURRENT                      name of the build in use
+    <content>-<templates>-<config>/
+                                 one directory per content, template and
+                                 config.json version
+      build.json                 content, template and config versions,
+                                 part count, build time
+      catalog.json               tests -> skill -> parts; per-part title,
+                                 type and question count
+      answer_keys.json           part path -> {question id: answer index}
+      fragments/test_N/<skill>/partN.json
+                                 processed section and rendered HTML of the
+                                 practice and exam content partials
+      content.store              every part and fragment in one file that
+                                 workers memory-map (utils/content_store.py)
+
+TestDataLoader serves parts, answer keys, question counts and fragments
+from the build while its content and config versions match what it
+serves, and falls back to parsing and rendering when they do not (content
+edited without rebuilding), so a stale build is never served. Parts and
+fragments are read from content.store; the fragment files are kept for
+the next incremental build to link.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.content_model import Part
+from utils.content_source import part_path
+from utils.content_store import ContentStore
+
+logger = logging.getLogger(__name__)
+
+BUILD_DIR = os.path.join('build', 'content_build')
+CURRENT_NAME = 'CURRENT'
+BUILD_FORMAT = 4
+STORE_NAME = 'content.store'
+
+SKILL_ORDER = ('reading', 'listening', 'writing', 'speaking')
+
+# Part type -> section types it must contain
+PART_TYPES = {
+    'reading': {
+        'correspondence': ('passage', 'questions', 'response_passage'),
+        'diagram': ('diagram_email', 'questions'),
+        'information': ('passage', 'questions'),
+        'viewpoints': ('passage', 'questions', 'response_passage'),
+    },
+    'listening': {
+        'listening': ('questions',),
+    },
+}
+SECTION_TYPES = ('passage', 'response_passage', 'questions', 'diagram_email')
+# Sections whose content embeds a dropdown for each of their questions
+PLACEHOLDER_SECTIONS = ('response_passage', 'diagram_email')
+LISTENING_LAYOUTS = ('split', 'per_question_audio', 'full_questions')
+
+PLACEHOLDER_PATTERN = re.compile(r'__DROPDOWN_(\d+)__')
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _nonempty_str(value) -> bool:
+    return isinstance(value, str) and value.strip() != ''
+
+
+def _check_question(question, where, problems, require_text):
+    if not isinstance(question, dict):
+        problems.append(f"{where}: question is not an object")
+        return
+    q_id = question.get('id')
+    label = f"{where} question {q_id}"
+    if not _is_int(q_id):
+        problems.append(f"{where}: question id {q_id!r} is not an integer")
+    text = question.get('text', question.get('question'))
+    if require_text and not isinstance(question.get('text'), str):
+        problems.append(f"{label}: missing 'text'")
+    elif not isinstance(text, str):
+        problems.append(f"{label}: missing 'text' or 'question'")
+    options = question.get('options')
+    if not isinstance(options, list) or len(options) < 2 or not all(_nonempty_str(o) for o in options):
+        problems.append(f"{label}: 'options' must be a list of at least 2 non-empty strings")
+        return
+    answer = question.get('answer')
+    if not _is_int(answer) or not 0 <= answer < len(options):
+        problems.append(f"{label}: answer {answer!r} is not an index into its {len(options)} options")
+
+
+def _check_audio(data, questions, problems):
+    layout = data.get('layout', 'split')
+    if layout not in LISTENING_LAYOUTS:
+        problems.append(f"unknown layout {layout!r} (expected one of {', '.join(LISTENING_LAYOUTS)})")
+        return
+    sub_parts = data.get('sub_parts') or []
+    if layout == 'per_question_audio' and sub_parts:
+        sub_ids = []
+        for sp in sub_parts:
+            where = f"sub_part {sp.get('id', '?')}"
+            if not _nonempty_str(sp.get('passageAudioUrl')):
+                problems.append(f"{where}: missing passageAudioUrl")
+            for q in sp.get('questions', []):
+                sub_ids.append(q.get('id'))
+                if not _nonempty_str(q.get('audioUrl')):
+                    problems.append(f"{where} question {q.get('id')}: missing audioUrl")
+        if sorted(sub_ids, key=str) != sorted((q.get('id') for q in questions), key=str):
+            problems.append("sub_parts questions do not match the questions section")
+        return
+    if not _nonempty_str(data.get('mediaUrl')):
+        problems.append("missing mediaUrl")
+    if layout == 'per_question_audio':
+        for q in questions:
+            if not _nonempty_str(q.get('audioUrl')):
+                problems.append(f"question {q.get('id')}: missing audioUrl")
+
+
+def validate_part(data, skill, part_num=None) -> List[str]:
+    """
+    Check a parsed part against the content schema
+
+    Covers the fields the app reads, answer indices, question ids (unique
+    across all sections), __DROPDOWN_N__ placeholders (exactly one per
+    question of the section whose content holds them) and, for listening,
+    the audio each layout plays.
+
+    Args:
+        data: Parsed part JSON
+        skill: Skill the part belongs to
+        part_num: Expected 'part' value (from the file name), if known
+
+    Returns:
+        list: Problems found (empty when the part is valid)
+    """
+    if not isinstance(data, dict):
+        return ["part is not a JSON object"]
+    problems = []
+
+    if not _is_int(data.get('part')):
+        problems.append("missing integer 'part'")
+    elif part_num is not None and data['part'] != part_num:
+        problems.append(f"'part' is {data['part']} but the file is part{part_num}.json")
+    for field in ('title', 'instructions'):
+        if not _nonempty_str(data.get(field)):
+            problems.append(f"missing '{field}'")
+    timeout = data.get('timeout_minutes')
+    if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0):
+        problems.append(f"timeout_minutes {timeout!r} is not a positive number")
+
+    part_types = PART_TYPES.get(skill)
+    if part_types is None:
+        return problems + [f"unknown skill {skill!r}"]
+    part_type = data.get('type')
+    if part_type not in part_types:
+        problems.append(f"type {part_type!r} is not a {skill} part type ({', '.join(part_types)})")
+
+    sections = data.get('sections')
+    if not isinstance(sections, list) or not sections:
+        return problems + ["missing 'sections'"]
+
+    seen_ids = {}
+    section_types = []
+    all_questions = []
+    for index, section in enumerate(sections):
+        if not isinstance(section, dict):
+            problems.append(f"section {index} is not an object")
+            continue
+        section_type = section.get('section_type')
+        where = f"section {index} ({section_type})"
+        section_types.append(section_type)
+        if section_type not in SECTION_TYPES:
+            problems.append(f"{where}: unknown section_type")
+            continue
+        if section_type != 'questions' and not isinstance(section.get('content'), str):
+            problems.append(f"{where}: missing 'content'")
+
+        questions = section.get('questions', [])
+        if section_type in ('questions',) + PLACEHOLDER_SECTIONS and not questions:
+            problems.append(f"{where}: no questions")
+        if not isinstance(questions, list):
+            problems.append(f"{where}: 'questions' is not a list")
+            continue
+        for question in questions:
+            _check_question(question, where, problems, require_text=(section_type == 'questions'))
+            if not isinstance(question, dict):
+                continue
+            all_questions.append(question)
+            q_id = question.get('id')
+            if q_id in seen_ids:
+                problems.append(f"{where}: question id {q_id} already used in section {seen_ids[q_id]}")
+            else:
+                seen_ids[q_id] = index
+
+        placeholders = PLACEHOLDER_PATTERN.findall(section.get('content') or '')
+        if section_type in PLACEHOLDER_SECTIONS:
+            ids = {q.get('id') for q in questions if isinstance(q, dict)}
+            found = [int(p) for p in placeholders]
+            for q_id in sorted(ids - set(found), key=str):
+                problems.append(f"{where}: no __DROPDOWN_{q_id}__ for question {q_id}")
+            for q_id in sorted(set(found) - ids):
+                problems.append(f"{where}: __DROPDOWN_{q_id}__ has no question in this section")
+            for q_id in sorted({q for q in found if found.count(q) > 1}):
+                problems.append(f"{where}: __DROPDOWN_{q_id}__ appears more than once")
+        elif placeholders:
+            problems.append(f"{where}: placeholders are only replaced in {' and '.join(PLACEHOLDER_SECTIONS)}")
+
+    for required in part_types.get(part_type, ()):
+        if required not in section_types:
+            problems.append(f"missing a '{required}' section")
+        elif section_types.count(required) > 1:
+            problems.append(f"more than one '{required}' section")
+    if part_type == 'diagram':
+        diagram = next((s for s in sections if isinstance(s, dict) and s.get('section_type') == 'diagram_email'), {})
+        if not _nonempty_str(diagram.get('diagram_image')):
+            problems.append("diagram_email section: missing diagram_image")
+    if skill == 'listening':
+        _check_audio(data, all_questions, problems)
+
+    return problems
+
+
+def answer_key(data) -> Dict[int, int]:
+    """{question id: answer index} over every section of a parsed part"""
+    return {
+        q['id']: q['answer']
+        for section in data.get('sections', [])
+        for q in section.get('questions', [])
+    }
+
+
+def exam_navigation(list_parts: Callable, test_num, skill, part_num) -> Dict:
+    """
+    Content-derived context of a Test Mode page
+
+    Args:
+        list_parts: Callable (test_num, skill) -> sorted part numbers
+
+    Returns:
+        dict: {'is_last_part_of_skill': bool, 'next_skill': str or None}
+    """
+    parts = list_parts(test_num, skill)
+    is_last = (part_num == parts[-1]) if parts else False
+    next_skill = None
+    if is_last:
+        for candidate in SKILL_ORDER[SKILL_ORDER.index(skill) + 1:]:
+            if list_parts(test_num, candidate):
+                next_skill = candidate
+                break
+    return {'is_last_part_of_skill': is_last, 'next_skill': next_skill}
+
+
+def store_key(kind, rel_path) -> str:
+    """content.store key of a part ('part') or of one of its fragments (the mode)"""
+    return f"{kind}/{rel_path}"
+
+
+class ContentBuild:
+    """Read-only view of one build directory"""
+
+    # Parts and fragments kept materialized per process; the rest stay in the store
+    CACHE_SIZE = 32
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'build.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != BUILD_FORMAT:
+            raise ValueError(f"{self.path}: build format {meta.get('format')!r}, expected {BUILD_FORMAT}")
+        self.content_version = meta['content_version']
+        self.template_version = meta['template_version']
+        self.config_version = meta['config_version']
+        with open(self.path / 'catalog.json', 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        self._parts = catalog['parts']
+        with open(self.path / 'answer_keys.json', 'r', encoding='utf-8') as f:
+            self._answer_keys = {
+                rel_path: {int(q_id): answer for q_id, answer in key.items()}
+                for rel_path, key in json.load(f).items()
+            }
+        self.store = ContentStore(self.path / STORE_NAME)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, build_dir=BUILD_DIR) -> Optional['ContentBuild']:
+        """
+        The build CURRENT points at, or None when there is no usable build
+        """
+        pointer = Path(build_dir) / CURRENT_NAME
+        try:
+            name = pointer.read_text(encoding='utf-8').strip()
+        except FileNotFoundError:
+            return None
+        try:
+            return cls(Path(build_dir) / name)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Ignoring content build %s: %s", name, exc)
+            return None
+
+    def _entry(self, test_number, skill, part_number) -> Dict:
+        rel_path = part_path(test_number, skill, part_number)
+        entry = self._parts.get(rel_path)
+        if entry is None:
+            raise FileNotFoundError(f"Test data not found: {rel_path}")
+        return entry
+
+    def _cached(self, key, build=None):
+        """
+        Materialize a store entry, keeping the most recently used ones
+
+        Args:
+            build: Turns the stored value into what is cached (e.g. Part.from_dict)
+        """
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = self.store.get(key)
+        if build is not None and value is not None:
+            value = build(value)
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return value
+
+    def question_count(self, test_number, skill, part_number) -> int:
+        return self._entry(test_number, skill, part_number)['num_questions']
+
+    def answer_key(self, test_number, skill, part_number) -> Dict[int, int]:
+        self._entry(test_number, skill, part_number)
+        return self._answer_keys[part_path(test_number, skill, part_number)]
+
+    def part(self, test_number, skill, part_number) -> Part:
+        """Model of a part (shared with other callers; never modify it)"""
+        self._entry(test_number, skill, part_number)
+        return self._cached(store_key('part', part_path(test_number, skill, part_number)), Part.from_dict)
+
+    def part_data(self, test_number, skill, part_number) -> Dict:
+        """Raw JSON of a part, decoded on each call"""
+        self._entry(test_number, skill, part_number)
+        return self.store.get(store_key('part', part_path(test_number, skill, part_number)))
+
+    def fragment(self, mode, test_number, skill, part_number) -> Optional[Dict]:
+        """
+        Pre-rendered content partial: {'context', 'section', 'html'}, or None
+        """
+        return self._cached(store_key(mode, part_path(test_number, skill, part_number)))
+
+    def preload(self) -> int:
+        """Have the OS read the store into the page cache; returns the number of parts"""
+        self.store.advise_willneed()
+        return len(self._parts)
@@ -0,0 +1,204 @@
+"""
+Read-only model of a test part, built once when the part is loaded.
+
+The JSON files leave several things to convention: a question's text may
+be in 'text' or the older 'question' field, answers sit on each question,
+and listening media fields are optional. Part.from_dict resolves all of
+that once, so code rendering a part reads attributes instead of probing
+nested dicts on every request:
+
+  Part        metadata, sections, every question in section order, the
+              answer key and (listening) layout, media and sub-parts
+  Section     one entry of 'sections'
+  SubPart     one passage of a per_question_audio listening part; it
+              inherits the part's image when it has none of its own
+  Question    id, text, options, answer, audio and image
+
+The classes use __slots__ and tuples. A loaded part is shared by every
+request that renders it (TestDataLoader.load_part): never modify one.
+"""
+
+from typing import Dict, Optional, Tuple
+
+
+class Question:
+    """One question of a section or sub-part"""
+
+    __slots__ = ('id', 'text', 'prompt', 'options', 'answer', 'audio_url', 'image_url')
+
+    def __init__(self, id, text, options, answer=None, prompt=None, audio_url='', image_url=None):
+        """
+        Args:
+            id: Question number, unique within the part
+            text: Question text (for questions embedded in a passage, the
+                blank's marker, e.g. '7.'); None if the JSON has none
+            options: Answer options, in order
+            answer: Index of the correct option
+            prompt: The JSON's 'question' field, if any
+            audio_url: Audio played before the question (per_question_audio)
+            image_url: Illustration shown with the question
+        """
+        self.id = id
+        self.text = text
+        self.prompt = prompt
+        self.options = options
+        self.answer = answer
+        self.audio_url = audio_url
+        self.image_url = image_url
+
+    @classmethod
+    def from_dict(cls, data) -> 'Question':
+        return cls(
+            id=data.get('id'),
+            text=data.get('text', data.get('question')),
+            options=tuple(data.get('options', ())),
+            answer=data.get('answer'),
+            prompt=data.get('question'),
+            audio_url=data.get('audioUrl', ''),
+            image_url=data.get('imageUrl'),
+        )
+
+    def label(self, embedded=False) -> str:
+        """
+        Text to show for the question in answer keys
+
+        Args:
+            embedded: The question is a blank in a passage, whose text is
+                only its marker: show its prompt instead
+
+        Returns:
+            str: The text (or prompt), else 'Question N'
+        """
+        text = self.prompt if embedded else self.text
+        return text if text is not None else f"Question {self.id}"
+
+
+def as_question(question) -> Question:
+    """
+    A Question, building one from a question dict of the part JSON
+
+    Lets helpers that render questions accept both the model and the raw
+    dicts returned by TestDataLoader.get_all_questions().
+    """
+    return question if isinstance(question, Question) else Question.from_dict(question)
+
+
+class Section:
+    """One entry of a part's 'sections'"""
+
+    __slots__ = ('section_type', 'content', 'questions', 'title', 'instruction_text', 'note', 'diagram_image')
+
+    def __init__(self, section_type, content='', questions=(), title=None, instruction_text='', note='',
+                 diagram_image=None):
+        self.section_type = section_type
+        self.content = content
+        self.questions = questions
+        self.title = title
+        self.instruction_text = instruction_text
+        self.note = note
+        self.diagram_image = diagram_image
+
+    @classmethod
+    def from_dict(cls, data) -> 'Section':
+        return cls(
+            section_type=data.get('section_type'),
+            content=data.get('content', ''),
+            questions=tuple(Question.from_dict(q) for q in data.get('questions', ())),
+            title=data.get('title'),
+            instruction_text=data.get('instruction_text', ''),
+            note=data.get('note', ''),
+            diagram_image=data.get('diagram_image'),
+        )
+
+
+class SubPart:
+    """One passage of a per_question_audio listening part, with its questions"""
+
+    __slots__ = ('id', 'title', 'audio_url', 'image_url', 'questions')
+
+    def __init__(self, id, title, audio_url='', image_url='', questions=()):
+        self.id = id
+        self.title = title
+        self.audio_url = audio_url
+        self.image_url = image_url
+        self.questions = questions
+
+    @classmethod
+    def from_dict(cls, data, image_url='') -> 'SubPart':
+        """
+        Args:
+            image_url: The part's image, used when the sub-part has none
+        """
+        return cls(
+            id=data.get('id'),
+            title=data.get('title', data.get('id', '')),
+            audio_url=data.get('passageAudioUrl', ''),
+            image_url=data.get('imageUrl', image_url),
+            questions=tuple(Question.from_dict(q) for q in data.get('questions', ())),
+        )
+
+
+class Part:
+    """A loaded test part (read-only)"""
+
+    __slots__ = (
+        'part', 'title', 'instructions', 'type', 'timeout_minutes', 'sections', 'questions', 'answers',
+        'layout', 'media_type', 'media_url', 'image_url', 'image_alt', 'transcript', 'sub_parts',
+    )
+
+    def __init__(self, part, title, instructions, type, sections, timeout_minutes=None, layout='split',
+                 media_type='audio', media_url='', image_url='', image_alt=None, transcript='', sub_parts=()):
+        self.part = part
+        self.title = title
+        self.instructions = instructions
+        self.type = type
+        self.timeout_minutes = timeout_minutes
+        self.sections: Tuple[Section, ...] = sections
+        # Every question, in section order
+        self.questions: Tuple[Question, ...] = tuple(q for section in sections for q in section.questions)
+        # {question id: correct option index}
+        self.answers: Dict[int, int] = {q.id: q.answer for q in self.questions}
+        self.layout = layout
+        self.media_type = media_type
+        self.media_url = media_url
+        self.image_url = image_url
+        self.image_alt = image_alt
+        self.transcript = transcript
+        self.sub_parts: Tuple[SubPart, ...] = sub_parts
+
+    @classmethod
+    def from_dict(cls, data) -> 'Part':
+        """
+        Build the model of a parsed part JSON
+
+        Missing fields get their defaults rather than raising, as the
+        schema is enforced by scripts/build_content.py.
+
+        Raises:
+            ValueError: *data* is not a JSON object
+        """
+        if not isinstance(data, dict):
+            raise ValueError("part is not a JSON object")
+        image_url = data.get('imageUrl', '')
+        return cls(
+            part=data.get('part'),
+            title=data.get('title'),
+            instructions=data.get('instructions'),
+            type=data.get('type'),
+            sections=tuple(Section.from_dict(section) for section in data.get('sections', ())),
+            timeout_minutes=data.get('timeout_minutes'),
+            layout=data.get('layout', 'split'),
+            media_type=data.get('mediaType', 'audio'),
+            media_url=data.get('mediaUrl', ''),
+            image_url=image_url,
+            image_alt=data.get('imageAlt'),
+            transcript=data.get('transcript', ''),
+            sub_parts=tuple(SubPart.from_dict(sp, image_url) for sp in data.get('sub_parts') or ()),
+        )
+
+    def section(self, section_type) -> Optional[Section]:
+        """The first section of a type, or None"""
+        for section in self.sections:
+            if section.section_type == section_type:
+                return section
+        return None
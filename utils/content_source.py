@@ -0,0 +1,319 @@
+"""
+Where TestDataLoader reads test content from.
+
+  LocalContentSource  JSON files under a data directory (default). Every app
+                      instance needs the same files: bake them into the
+                      image or mount one shared volume.
+  HttpContentSource   A published copy of the data directory plus an
+                      index.json (scripts/content_index.py), served from any
+                      static host or object store. Instances poll the index
+                      and re-fetch only the parts whose hash changed.
+
+Both report the same content version for the same files, so ETags agree
+across instances whichever source they use.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'index.json'
+
+
+def part_path(test_number, skill, part_number) -> str:
+    """Relative path of a test part, e.g. 'test_1/reading/part2.json'"""
+    return f'test_{test_number}/{skill}/part{part_number}.json'
+
+
+def file_digest(data: bytes) -> str:
+    """SHA-256 hex digest of a file's bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def digests_version(digests) -> str:
+    """
+    Hash of (relative path, file digest) pairs, in path order
+
+    Lets a version be recomputed from per-file digests, so only files that
+    changed have to be read again.
+
+    Args:
+        digests: Iterable of (relative path with '/' separators, file_digest)
+
+    Returns:
+        str: Content version (16 hex characters)
+    """
+    digest = hashlib.sha256()
+    for rel_path, file_hash in sorted(digests, key=lambda item: item[0]):
+        digest.update(rel_path.encode('utf-8'))
+        digest.update(file_hash.encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def content_version(files) -> str:
+    """
+    Hash of (relative path, bytes) pairs, in path order
+
+    Args:
+        files: Iterable of (relative path with '/' separators, bytes)
+
+    Returns:
+        str: Content version (16 hex characters)
+    """
+    return digests_version((rel_path, file_digest(data)) for rel_path, data in files)
+
+
+class ContentSource(ABC):
+    """Read-only access to test parts"""
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Human-readable location, for logs and errors"""
+
+    @abstractmethod
+    def list_tests(self) -> List[int]:
+        """Available test numbers, sorted"""
+
+    @abstractmethod
+    def list_parts(self, test_number, skill) -> List[int]:
+        """Available part numbers for a test and skill, sorted"""
+
+    @abstractmethod
+    def signature(self, test_number, skill, part_number):
+        """
+        Cheap value that changes whenever the part's content changes
+
+        Raises:
+            FileNotFoundError: The part does not exist
+        """
+
+    @abstractmethod
+    def read(self, test_number, skill, part_number) -> bytes:
+        """Raw JSON bytes of a part"""
+
+    @abstractmethod
+    def version(self) -> str:
+        """Content version of everything in the source (see content_version)"""
+
+
+class LocalContentSource(ContentSource):
+    """Test parts read from a directory"""
+
+    def __init__(self, data_dir='data'):
+        self.data_dir = Path(data_dir)
+        # relative path -> (mtime_ns, size, sha256) of every JSON file
+        self._files = {}
+        self._version_files = None
+        self._version = None
+
+    def describe(self) -> str:
+        return str(self.data_dir)
+
+    def _path(self, test_number, skill, part_number) -> Path:
+        return self.data_dir / f'test_{test_number}' / skill / f'part{part_number}.json'
+
+    def list_tests(self) -> List[int]:
+        tests = []
+        for item in self.data_dir.iterdir():
+            if item.is_dir() and item.name.startswith('test_'):
+                try:
+                    test_num = int(item.name.split('_')[1])
+                    tests.append(test_num)
+                except (ValueError, IndexError):
+                    continue
+        return sorted(tests)
+
+    def list_parts(self, test_number, skill) -> List[int]:
+        skill_dir = self.data_dir / f'test_{test_number}' / skill
+        if not skill_dir.exists():
+            return []
+
+        parts = []
+        for item in skill_dir.iterdir():
+            if item.suffix == '.json' and item.stem.startswith('part'):
+                try:
+                    part_num = int(item.stem.replace('part', ''))
+                    parts.append(part_num)
+                except ValueError:
+                    continue
+        return sorted(parts)
+
+    def signature(self, test_number, skill, part_number):
+        file_path = self._path(test_number, skill, part_number)
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Test data not found: {file_path}") from None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def read(self, test_number, skill, part_number) -> bytes:
+        return self._path(test_number, skill, part_number).read_bytes()
+
+    def file_digests(self) -> Dict[str, Tuple[int, int, str]]:
+        """
+        Modification time, size and digest of every JSON file
+
+        Files are only re-read when their modification time or size differs
+        from the last scan (or from the entries passed to seed()).
+
+        Returns:
+            dict: {relative path: (mtime_ns, size, sha256)}
+        """
+        previous = self._files
+        files = {}
+        for file_path in sorted(p for p in self.data_dir.rglob('*.json') if p.name != INDEX_NAME):
+            rel_path = file_path.relative_to(self.data_dir).as_posix()
+            stat = file_path.stat()
+            entry = previous.get(rel_path)
+            if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+                entry = (stat.st_mtime_ns, stat.st_size, file_digest(file_path.read_bytes()))
+            files[rel_path] = entry
+        self._files = files
+        return files
+
+    def seed(self, files):
+        """
+        Trust previously recorded file digests (e.g. a build's input manifest)
+
+        Args:
+            files: {relative path: (mtime_ns, size, sha256)}
+        """
+        self._files = {**{rel_path: tuple(entry) for rel_path, entry in files.items()}, **self._files}
+
+    def version(self) -> str:
+        files = self.file_digests()
+        if files != self._version_files:
+            self._version = digests_version((rel_path, entry[2]) for rel_path, entry in files.items())
+            self._version_files = files
+        return self._version
+
+    def build_index(self) -> Dict:
+        """
+        Index describing every JSON file, for publishing to an HttpContentSource
+
+        Returns:
+            dict: {'version': str, 'files': {relative path: {'sha256': str, 'size': int}}}
+        """
+        files = self.file_digests()
+        return {
+            'version': digests_version((rel_path, entry[2]) for rel_path, entry in files.items()),
+            'files': {
+                rel_path: {'sha256': entry[2], 'size': entry[1]}
+                for rel_path, entry in files.items()
+            },
+        }
+
+
+class HttpContentSource(ContentSource):
+    """Test parts fetched from a published copy of the data directory"""
+
+    def __init__(self, base_url, refresh_seconds=60.0, timeout=10.0):
+        """
+        Args:
+            base_url: URL of the directory holding index.json and test_*/
+            refresh_seconds: How long a fetched index is trusted before re-fetching
+            timeout: Seconds per HTTP request
+        """
+        self.base_url = base_url.rstrip('/')
+        self.refresh_seconds = refresh_seconds
+        self.timeout = timeout
+        self._index = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def describe(self) -> str:
+        return self.base_url
+
+    def _fetch(self, rel_path) -> bytes:
+        from urllib.request import urlopen  # only needed with CONTENT_SOURCE=http
+
+        with urlopen(f'{self.base_url}/{rel_path}', timeout=self.timeout) as response:
+            return response.read()
+
+    def _files(self) -> Dict[str, Dict]:
+        with self._lock:
+            if self._index is None or time.monotonic() - self._fetched_at >= self.refresh_seconds:
+                try:
+                    self._index = json.loads(self._fetch(INDEX_NAME))
+                except Exception as exc:
+                    if self._index is None:
+                        raise
+                    # Keep serving the last index we saw until the host is back
+                    logger.warning("Could not refresh %s/%s: %s", self.base_url, INDEX_NAME, exc)
+                self._fetched_at = time.monotonic()
+            return self._index['files']
+
+    def list_tests(self) -> List[int]:
+        tests = set()
+        for rel_path in self._files():
+            head = rel_path.split('/', 1)[0]
+            if head.startswith('test_') and '/' in rel_path:
+                try:
+                    tests.add(int(head.split('_')[1]))
+                except (ValueError, IndexError):
+                    continue
+        return sorted(tests)
+
+    def list_parts(self, test_number, skill) -> List[int]:
+        prefix = f'test_{test_number}/{skill}/part'
+        parts = []
+        for rel_path in self._files():
+            if rel_path.startswith(prefix) and rel_path.endswith('.json'):
+                try:
+                    parts.append(int(rel_path[len(prefix):-len('.json')]))
+                except ValueError:
+                    continue
+        return sorted(parts)
+
+    def signature(self, test_number, skill, part_number):
+        rel_path = part_path(test_number, skill, part_number)
+        entry = self._files().get(rel_path)
+        if entry is None:
+            raise FileNotFoundError(f"Test data not found: {self.base_url}/{rel_path}")
+        return entry['sha256']
+
+    def read(self, test_number, skill, part_number) -> bytes:
+        rel_path = part_path(test_number, skill, part_number)
+        data = self._fetch(rel_path)
+        expected = self.signature(test_number, skill, part_number)
+        if hashlib.sha256(data).hexdigest() != expected:
+            # Fetched mid-publish: the index and the file disagree
+            raise ValueError(f"{self.base_url}/{rel_path} does not match {INDEX_NAME}")
+        return data
+
+    def version(self) -> str:
+        self._files()
+        return self._index['version']
+
+
+def content_source_from_env(data_dir='data') -> ContentSource:
+    """
+    Build the content source configured in the environment
+
+    Environment:
+        CONTENT_SOURCE: 'local' (default) or 'http'
+        CONTENT_URL: Base URL for 'http' (holds index.json and test_*/)
+        CONTENT_REFRESH_SECONDS: How often 'http' re-checks index.json (default 60)
+
+    Args:
+        data_dir: Directory for the 'local' source
+    """
+    kind = os.getenv('CONTENT_SOURCE', 'local').lower()
+    if kind == 'local':
+        return LocalContentSource(data_dir)
+    if kind == 'http':
+        base_url: Optional[str] = os.getenv('CONTENT_URL')
+        if not base_url:
+            raise RuntimeError("CONTENT_SOURCE=http requires CONTENT_URL")
+        return HttpContentSource(
+            base_url, refresh_seconds=float(os.getenv('CONTENT_REFRESH_SECONDS', 60))
+        )
+    raise RuntimeError(f"Unknown CONTENT_SOURCE {kind!r} (expected local or http)")
@@ -0,0 +1,307 @@
+"""
+Read-only content store: one memory-mapped file shared by every worker.
+
+scripts/build_content.py writes the parsed test parts and rendered
+fragments of a content build into a single file (content.store). Workers
+map it instead of each holding a parsed copy of all content: its pages
+live once in the OS page cache, whatever the number of workers, and
+Python objects are only materialized for the entry a request reads
+(ContentStore.get).
+
+Layout (little-endian, offsets from the start of the file):
+
+  header    magic, format, entry count
+  entries   entry count x (key offset, key length, value offset, value
+            length), all u32, sorted by key so that lookups binary-search
+            the mapped file
+  keys      UTF-8 bytes of the keys
+  values    one self-contained region per entry:
+              string count u32, nodes length u32
+              string count x (offset u32, length u32) into the blob
+              nodes     the encoded value
+              blob      UTF-8 bytes of the entry's distinct strings
+                        (dict keys, passages, question text, options,
+                        HTML), each stored once
+
+A value is encoded as a tag byte followed by:
+
+  N T F     nothing (null, true, false)
+  i         int64
+  f         float64
+  s         string id (u32)
+  l         item count (u32), then the items
+  d         item count (u32), then (key string id u32, value) pairs
+
+Regions do not reference each other, so a rebuild copies the regions of
+unchanged entries verbatim (ContentStore.raw) instead of re-encoding them.
+"""
+
+import mmap
+import struct
+from typing import Iterable, Iterator, Optional, Tuple
+
+MAGIC = b'CELPSTOR'
+STORE_FORMAT = 1
+
+_HEADER = struct.Struct('<8sII')
+_ENTRY = struct.Struct('<IIII')
+_PAIR = struct.Struct('<II')
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_U32_MAX = 0xFFFFFFFF
+_pack_u32 = _U32.pack
+
+
+class _Encoder:
+    """Encodes one value into a region"""
+
+    def __init__(self):
+        self.strings = {}
+        self.nodes = bytearray()
+
+    def string_id(self, value: str) -> int:
+        string_id = self.strings.get(value)
+        if string_id is None:
+            string_id = self.strings[value] = len(self.strings)
+        return string_id
+
+    def encode(self, value):
+        nodes = self.nodes
+        kind = type(value)
+        if kind is str:
+            nodes += b's'
+            nodes += _pack_u32(self.string_id(value))
+        elif kind is dict:
+            nodes += b'd'
+            nodes += _pack_u32(len(value))
+            for key, item in value.items():
+                if type(key) is not str:
+                    raise TypeError(f"content store keys must be strings, not {key!r}")
+                nodes += _pack_u32(self.string_id(key))
+                self.encode(item)
+        elif kind is list or kind is tuple:
+            nodes += b'l'
+            nodes += _pack_u32(len(value))
+            for item in value:
+                self.encode(item)
+        elif value is None:
+            nodes += b'N'
+        elif kind is bool:
+            nodes += b'T' if value else b'F'
+        elif kind is int:
+            nodes += b'i'
+            nodes += _I64.pack(value)
+        elif kind is float:
+            nodes += b'f'
+            nodes += _F64.pack(value)
+        else:
+            raise TypeError(f"cannot store {kind.__name__} values")
+
+    def region(self) -> bytes:
+        string_table = bytearray()
+        blob = bytearray()
+        for value in self.strings:
+            data = value.encode('utf-8')
+            string_table += _PAIR.pack(len(blob), len(data))
+            blob += data
+        return b''.join((_PAIR.pack(len(self.strings), len(self.nodes)), string_table, self.nodes, blob))
+
+
+def encode_value(value) -> bytes:
+    """The region of one JSON-compatible value"""
+    encoder = _Encoder()
+    encoder.encode(value)
+    return encoder.region()
+
+
+def write_store(path, entries: Iterable[Tuple[str, object]]) -> int:
+    """
+    Write a content store file
+
+    Args:
+        path: File to write (replaced if it exists)
+        entries: (key, value) pairs with unique keys. A value is either
+            JSON-compatible or bytes: a region from ContentStore.raw(),
+            copied as is
+
+    Returns:
+        int: Number of entries written
+    """
+    keys = []
+    regions = []
+    for key, value in entries:
+        keys.append(key.encode('utf-8'))
+        regions.append(value if isinstance(value, bytes) else encode_value(value))
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    for first, second in zip(order, order[1:]):
+        if keys[first] == keys[second]:
+            raise ValueError(f"duplicate content store key {keys[first].decode('utf-8')!r}")
+
+    keys_offset = _HEADER.size + len(keys) * _ENTRY.size
+    values_offset = keys_offset + sum(len(key) for key in keys)
+    if values_offset + sum(len(region) for region in regions) > _U32_MAX:
+        raise ValueError("content store would exceed 4 GiB")
+
+    table = bytearray()
+    key_offset, value_offset = keys_offset, values_offset
+    for index in order:
+        table += _ENTRY.pack(key_offset, len(keys[index]), value_offset, len(regions[index]))
+        key_offset += len(keys[index])
+        value_offset += len(regions[index])
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, STORE_FORMAT, len(keys)))
+        f.write(table)
+        for index in order:
+            f.write(keys[index])
+        for index in order:
+            f.write(regions[index])
+    return len(keys)
+
+
+class ContentStore:
+    """Read-only, memory-mapped view of a store written by write_store()"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Store file
+
+        Raises:
+            ValueError: The file is not a content store of this format
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{path}: truncated content store")
+        magic, store_format, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or store_format != STORE_FORMAT:
+            raise ValueError(f"{path}: not a content store of format {STORE_FORMAT}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) is not None
+
+    def keys(self) -> Iterator[str]:
+        """Every key, in UTF-8 byte order"""
+        for position in range(self._count):
+            yield self._key(position).decode('utf-8')
+
+    def get(self, key, default=None):
+        """
+        Materialize the value stored under *key*
+
+        Each call builds new Python objects; nothing but that entry's
+        region is read from the file.
+        """
+        found = self._find(key)
+        if found is None:
+            return default
+        start = found[0]
+        string_count, nodes_length = _PAIR.unpack_from(self._map, start)
+        nodes = start + _PAIR.size + string_count * _PAIR.size
+        decoder = _Decoder(self._map, start + _PAIR.size, nodes + nodes_length, self.path)
+        return decoder.decode(nodes)[0]
+
+    def raw(self, key) -> bytes:
+        """
+        The encoded region of *key*, for write_store() to copy into a new store
+
+        Raises:
+            KeyError: No entry has this key
+        """
+        found = self._find(key)
+        if found is None:
+            raise KeyError(key)
+        start, length = found
+        return self._map[start:start + length]
+
+    def advise_willneed(self):
+        """Ask the OS to read the whole file into the page cache ahead of use"""
+        if hasattr(self._map, 'madvise') and hasattr(mmap, 'MADV_WILLNEED'):
+            self._map.madvise(mmap.MADV_WILLNEED)
+
+    def close(self):
+        self._map.close()
+
+    def _key(self, position) -> bytes:
+        offset, length, _, _ = _ENTRY.unpack_from(self._map, _HEADER.size + position * _ENTRY.size)
+        return self._map[offset:offset + length]
+
+    def _find(self, key) -> Optional[Tuple[int, int]]:
+        """(value offset, value length) of *key*, or None"""
+        wanted = key.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = _ENTRY.unpack_from(
+                self._map, _HEADER.size + middle * _ENTRY.size
+            )
+            found = self._map[key_offset:key_offset + key_length]
+            if found == wanted:
+                return value_offset, value_length
+            if found < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+
+class _Decoder:
+    """Materializes the nodes of one region"""
+
+    __slots__ = ('map', 'strings_table', 'blob', 'path', 'strings')
+
+    def __init__(self, map_, strings_table, blob, path):
+        self.map = map_
+        self.strings_table = strings_table
+        self.blob = blob
+        self.path = path
+        self.strings = {}
+
+    def string(self, string_id) -> str:
+        value = self.strings.get(string_id)
+        if value is None:
+            offset, length = _PAIR.unpack_from(self.map, self.strings_table + string_id * _PAIR.size)
+            start = self.blob + offset
+            value = self.strings[string_id] = self.map[start:start + length].decode('utf-8')
+        return value
+
+    def decode(self, position):
+        """(value, position after it)"""
+        map_ = self.map
+        tag = map_[position]
+        position += 1
+        if tag == 0x73:  # s
+            return self.string(_U32.unpack_from(map_, position)[0]), position + 4
+        if tag == 0x64:  # d
+            count = _U32.unpack_from(map_, position)[0]
+            position += 4
+            value = {}
+            for _ in range(count):
+                key = self.string(_U32.unpack_from(map_, position)[0])
+                value[key], position = self.decode(position + 4)
+            return value, position
+        if tag == 0x6C:  # l
+            count = _U32.unpack_from(map_, position)[0]
+            position += 4
+            value = []
+            for _ in range(count):
+                item, position = self.decode(position)
+                value.append(item)
+            return value, position
+        if tag == 0x69:  # i
+            return _I64.unpack_from(map_, position)[0], position + 8
+        if tag == 0x66:  # f
+            return _F64.unpack_from(map_, position)[0], position + 8
+        if tag == 0x4E:  # N
+            return None, position
+        if tag == 0x54:  # T
+            return True, position
+        if tag == 0x46:  # F
+            return False, position
+        raise ValueError(f"{self.path}: corrupt content store (tag {tag:#x} at {position - 1})")
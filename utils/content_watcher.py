@@ -0,0 +1,92 @@
+"""
+Hot reload of test content, config.json and content builds.
+
+A ContentWatcher thread polls TestDataLoader.refresh() every
+CONTENT_WATCH_SECONDS. When the content source, config.json or the
+content build's CURRENT pointer changed, the loader parses what changed
+and swaps in a new snapshot. Publishing a test is then just writing its
+files (or running scripts/build_content.py): every worker picks it up
+within one interval, without a restart.
+
+While the watcher runs, requests never touch the file system to check
+for changes; each request pins the snapshot current when it started.
+
+Polling is used rather than inotify: it behaves the same on every
+platform, for CONTENT_SOURCE=http (where there are no local files to
+watch) and on network file systems. One check is a stat of each content
+file, which is cheap at this size.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ContentWatcher:
+    """Background thread refreshing a TestDataLoader's snapshot"""
+
+    def __init__(self, loader, interval=2.0):
+        """
+        Args:
+            loader: TestDataLoader to refresh
+            interval: Seconds between checks
+        """
+        self.loader = loader
+        self.interval = interval
+        self._pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, loader):
+        """
+        Build a watcher configured from the environment
+
+        Environment:
+            CONTENT_WATCH_SECONDS: Seconds between checks (default 2; 0 disables
+                the thread, and requests check for changes themselves)
+
+        Returns:
+            ContentWatcher or None: None when disabled
+        """
+        interval = float(os.getenv('CONTENT_WATCH_SECONDS', 2))
+        if interval <= 0:
+            return None
+        return cls(loader, interval)
+
+    def ensure_started(self):
+        """
+        Start the thread in this process, if not already running
+
+        Cheap enough to call on every request: gunicorn forks workers after
+        the app is imported, and threads do not survive a fork.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='content-watcher', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            self.loader.auto_refresh = False
+
+    def stop(self):
+        """Stop the thread; the loader goes back to checking on each request"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(self.interval + 1)
+        self._pid = None
+        self.loader.auto_refresh = True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.loader.refresh()
+            except Exception:
+                logger.exception("Content watcher check failed")
@@ -2,46 +2,385 @@
 Data loader utility for CELPIP test data.
 Loads test data from JSON files and processes them for use in the application.
 This module is designed to be platform-agnostic and can be used by web, iOS, or Android apps.
+
+Everything the loader serves (catalog, parsed parts, content build, config)
+comes from one immutable ContentSnapshot. refresh() builds a new snapshot
+when test content, config.json or the content build changes and swaps it
+in with a single assignment. A request pins the snapshot it started with
+(pin()/unpin()), so it sees one version throughout even if content is
+published mid-request.
 """
 
 import json
+import logging
 import os
+import threading
+from contextvars import ContextVar
 from pathlib import Path
 
+import config
+from utils.content_build import BUILD_DIR, SKILL_ORDER, ContentBuild, answer_key
+from utils.content_model import Part, as_question
+from utils.content_source import LocalContentSource, content_source_from_env
+
+logger = logging.getLogger(__name__)
+
+
+class ContentSnapshot:
+    """One consistent version of everything the loader serves (read-only)"""
+    
+    __slots__ = ('content_version', 'config', 'config_version', 'version', 'tests', 'parts', 'build')
+    
+    def __init__(self, content_version, config, config_version, tests, parts, build):
+        """
+        Args:
+            content_version: Version of the source's files
+            config: Configuration dict (config.json)
+            config_version: Version of the configuration
+            tests: {test number: {skill: [part numbers]}}
+            parts: {(test, skill, part): (source signature, Part)};
+                empty when *build* is set, whose store serves the parts
+            build: ContentBuild made from exactly this content and config, or None
+        """
+        self.content_version = content_version
+        self.config = config
+        self.config_version = config_version
+        # Content and config both change what pages show
+        self.version = f"{content_version}{config_version[:8]}"
+        self.tests = tests
+        self.parts = parts
+        self.build = build
+
 
 class TestDataLoader:
     """Loads and processes CELPIP test data from JSON files"""
     
-    def __init__(self, data_dir='data'):
+    # Attempts at a snapshot when content keeps changing while it is read
+    REFRESH_ATTEMPTS = 3
+    
+    def __init__(self, data_dir='data', source=None, build=None, build_dir=None):
         """
         Initialize the data loader
         
         Args:
             data_dir: Base directory containing test data (default: 'data')
+            source: ContentSource to read parts from (default: LocalContentSource(data_dir))
+            build: ContentBuild to serve from (scripts/build_content.py), if any
+            build_dir: Directory whose CURRENT build is served and re-opened
+                when CURRENT changes (instead of a fixed *build*)
         """
         self.data_dir = Path(data_dir)
+        self.source = source if source is not None else LocalContentSource(data_dir)
+        self.build = build
+        self.build_dir = build_dir
+        self._build_pointer = None
+        # Without a watcher thread (see utils/content_watcher.py), every
+        # unpinned call and every pin() checks for changes itself
+        self.auto_refresh = True
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._pinned = ContextVar(f'content_snapshot_{id(self)}', default=None)
+    
+    @classmethod
+    def from_env(cls, data_dir='data'):
+        """
+        Build a loader reading from the content source configured in the environment
         
-    def load_test_part(self, test_number, skill, part_number):
+        See utils.content_source.content_source_from_env for the variables.
+        CONTENT_BUILD_DIR (default 'build/content_build') is where the
+        output of scripts/build_content.py is looked for.
+        """
+        return cls(
+            data_dir=data_dir,
+            source=content_source_from_env(data_dir),
+            build_dir=os.getenv('CONTENT_BUILD_DIR', BUILD_DIR),
+        )
+    
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+    
+    def snapshot(self):
+        """
+        The snapshot this call should use
+        
+        Returns:
+            ContentSnapshot: The one pinned by the current request, else the
+            latest (checked for changes first when auto_refresh is on)
+        """
+        pinned = self._pinned.get()
+        if pinned is not None:
+            return pinned
+        if self.auto_refresh or self._snapshot is None:
+            return self.refresh()
+        return self._snapshot
+    
+    def pin(self):
+        """
+        Serve every call in this context (one request) from the current snapshot
+        
+        Returns:
+            Token to pass to unpin()
+        """
+        return self._pinned.set(self.snapshot())
+    
+    def unpin(self, token):
+        """Release the snapshot pinned by pin()"""
+        try:
+            self._pinned.reset(token)
+        except ValueError:
+            # Reset from another context (e.g. a teardown on a different thread)
+            self._pinned.set(None)
+    
+    def refresh(self):
+        """
+        Swap in a new snapshot if test content, config.json or the content build changed
+        
+        Changed parts are parsed before the swap, so requests never wait for
+        them; unchanged parts are shared with the previous snapshot.  If
+        new content cannot be read (e.g. a file saved half-way is invalid
+        JSON), the error is logged and the previous snapshot stays in use.
+        
+        Returns:
+            ContentSnapshot: The current snapshot
+        """
+        if not self._refresh_lock.acquire(blocking=self._snapshot is None):
+            # Another thread is refreshing; keep serving the current snapshot
+            return self._snapshot
+        try:
+            try:
+                self._snapshot = self._load_snapshot(self._snapshot)
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                logger.exception("Content reload failed; still serving version %s",
+                                 self._snapshot.version)
+            return self._snapshot
+        finally:
+            self._refresh_lock.release()
+    
+    def _current_build_dir_build(self):
+        """The build CURRENT names, re-opened only when CURRENT changes"""
+        pointer = Path(self.build_dir) / 'CURRENT'
+        try:
+            stat = pointer.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature != self._build_pointer:
+            self.build = ContentBuild.open(self.build_dir) if signature is not None else None
+            self._build_pointer = signature
+        return self.build
+    
+    def _load_snapshot(self, previous):
+        """Build the snapshot of what the source holds now (or return *previous* if unchanged)"""
+        for _ in range(self.REFRESH_ATTEMPTS):
+            content_version = self.source.version()
+            config_data, config_version = config.refresh_config()
+            build = self._current_build_dir_build() if self.build_dir is not None else self.build
+            if not self._build_matches(build, content_version, config_version):
+                build = None
+            if (previous is not None and previous.content_version == content_version
+                    and previous.config_version == config_version and previous.build is build):
+                return previous
+            
+            tests = {}
+            for test_num in self.source.list_tests():
+                skills = {}
+                for skill in SKILL_ORDER:
+                    parts = self.source.list_parts(test_num, skill)
+                    if parts:
+                        skills[skill] = parts
+                tests[test_num] = skills
+            
+            # With a current build, parts are materialized from its store on
+            # demand instead of every process holding all of them parsed
+            parts = {}
+            previous_parts = previous.parts if previous is not None else {}
+            for test_num, skills in (tests.items() if build is None else ()):
+                for skill, part_numbers in skills.items():
+                    for part_num in part_numbers:
+                        key = (test_num, skill, part_num)
+                        signature = self.source.signature(test_num, skill, part_num)
+                        cached = previous_parts.get(key)
+                        if cached is None or cached[0] != signature:
+                            data = json.loads(self.source.read(test_num, skill, part_num))
+                            cached = (signature, Part.from_dict(data))
+                        parts[key] = cached
+            
+            # Content published while we were reading: start over
+            if self.source.version() != content_version:
+                continue
+            if previous is not None:
+                logger.info("Content reloaded: version %s -> %s%s", previous.version,
+                            f"{content_version}{config_version[:8]}",
+                            " (from content build)" if build is not None else "")
+            return ContentSnapshot(content_version, config_data, config_version, tests, parts, build)
+        raise RuntimeError(f"Content in {self.source.describe()} kept changing while being read")
+    
+    @staticmethod
+    def _build_matches(build, content_version, config_version):
+        return (build is not None and build.content_version == content_version
+                and build.config_version == config_version)
+    
+    def current_build(self):
+        """
+        The content build, if it was built from the content being served
+        
+        Returns:
+            ContentBuild or None: None when there is no build or the data or
+            configuration has changed since it was built
+        """
+        return self.snapshot().build
+    
+    def get_config(self):
         """
-        Load a specific test part
+        Configuration (config.json) of the pinned snapshot
+        
+        Unpinned callers get the current configuration without a content
+        check, so the view-model builders can be used outside requests.
+        
+        Returns:
+            dict: Configuration snapshot (read-only)
+        """
+        pinned = self._pinned.get()
+        if pinned is not None:
+            return pinned.config
+        return config.load_config()
+        
+    def get_content_version(self):
+        """
+        Get a short hash identifying the content being served
+        
+        Covers the bytes of every JSON file and the configuration, so it
+        changes exactly when what the pages show changes.
+        
+        Returns:
+            str: Content version (24 hex characters)
+        """
+        return self.snapshot().version
+    
+    def load_part(self, test_number, skill, part_number):
+        """
+        Load a specific test part as its model
         
         Args:
             test_number: Test number (1-20)
             skill: Skill name ('reading', 'writing', 'speaking', 'listening')
             part_number: Part number (varies by skill)
             
+        With a current content build, parts are materialized from its
+        memory-mapped store when first asked for (the most recently used
+        are kept). Otherwise they are parsed when a snapshot is built and
+        shared with later snapshots until the source's signature for the
+        part (file modification time and size, or published hash) changes.
+        The returned Part is shared between callers: never modify it.
+            
+        Returns:
+            Part: Test part model (utils/content_model.py)
+            
+        Raises:
+            FileNotFoundError: The part is not in the snapshot
+        """
+        key = (int(test_number), skill, int(part_number))
+        snapshot = self.snapshot()
+        if snapshot.build is not None:
+            return snapshot.build.part(*key)
+        cached = snapshot.parts.get(key)
+        if cached is None:
+            raise FileNotFoundError(self._not_found(key))
+        return cached[1]
+    
+    def load_test_part(self, test_number, skill, part_number):
+        """
+        Load a specific test part as raw JSON
+        
+        Read on each call (from the content build's store when current,
+        else from the content source), so the caller owns the result. The
+        app renders from load_part(); this is for tools that need the
+        file's exact contents.
+            
         Returns:
             dict: Test part data
+            
+        Raises:
+            FileNotFoundError: The part is not in the snapshot
         """
-        file_path = self.data_dir / f'test_{test_number}' / skill / f'part{part_number}.json'
+        key = (int(test_number), skill, int(part_number))
+        snapshot = self.snapshot()
+        if snapshot.build is not None:
+            return snapshot.build.part_data(*key)
+        if key not in snapshot.parts:
+            raise FileNotFoundError(self._not_found(key))
+        return json.loads(self.source.read(*key))
+    
+    def _not_found(self, key):
+        return f"Test data not found: {self.source.describe()}/test_{key[0]}/{key[1]}/part{key[2]}.json"
+    
+    def preload(self):
+        """
+        Build the first snapshot
         
-        if not file_path.exists():
-            raise FileNotFoundError(f"Test data not found: {file_path}")
+        Called in the gunicorn master before forking (preload_app). With a
+        current content build, this maps its store, which every worker
+        then shares through the page cache; otherwise every test part is
+        parsed, and workers share it copy-on-write instead of each parsing
+        it on first request.
+        
+        Returns:
+            int: Number of parts available
+        """
+        snapshot = self.refresh()
+        if snapshot.build is not None:
+            return snapshot.build.preload()
+        return len(snapshot.parts)
+    
+    def count_questions(self, test_number, skill, part_number):
+        """
+        Number of questions in a test part (from the content build when current)
+        
+        Returns:
+            int: Question count
+        """
+        build = self.current_build()
+        if build is not None:
+            return build.question_count(test_number, skill, part_number)
+        return len(self.load_part(test_number, skill, part_number).questions)
+    
+    def get_answer_key(self, test_number, skill, part_number):
+        """
+        Correct answers of a test part (from the content build when current)
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        Returns:
+            dict: Mapping of question ID (int) to correct answer index (int);
+            shared, so treat it as read-only
+        """
+        build = self.current_build()
+        if build is not None:
+            return build.answer_key(test_number, skill, part_number)
+        return self.load_part(test_number, skill, part_number).answers
+    
+    def get_prebuilt_fragment(self, mode, test_number, skill, part_number, context, template_version):
+        """
+        Pre-rendered content partial of a test part, if the build has a current one
         
-        return data
+        Args:
+            mode: 'practice' or 'exam'
+            context: Extra template variables the caller would render with
+            template_version: Fingerprint of the templates being served
+            
+        Returns:
+            tuple or None: (processed section data, HTML), or None when the
+            part has to be rendered (no current build, templates changed, or
+            the fragment was built with a different context)
+        """
+        build = self.current_build()
+        if build is None or build.template_version != template_version:
+            return None
+        fragment = build.fragment(mode, test_number, skill, part_number)
+        if fragment is None or fragment['context'] != context:
+            return None
+        return fragment['section'], fragment['html']
     
     def get_all_questions(self, test_data):
         """
@@ -95,18 +434,19 @@ class TestDataLoader:
         
         Args:
             content: Text content with dropdown placeholders
-            questions: List of question dictionaries
+            questions: Questions of the section: utils/content_model.Question
+                objects or question dicts (get_questions_by_section)
             
         Returns:
             str: HTML content with dropdowns
         """
-        for question in questions:
-            q_id = question['id']
+        for question in map(as_question, questions):
+            q_id = question.id
             placeholder = f"__DROPDOWN_{q_id}__"
             
             # Build dropdown HTML with question number
             options_html = '<option value="" selected disabled>-- Select --</option>'
-            for idx, option in enumerate(question['options']):
+            for idx, option in enumerate(question.options):
                 options_html += f'<option value="{idx}">{option}</option>'
             
             dropdown_html = (
@@ -123,7 +463,8 @@ class TestDataLoader:
         Build HTML for standalone questions with dropdowns
         
         Args:
-            questions: List of question dictionaries
+            questions: utils/content_model.Question objects or question
+                dicts (get_all_questions)
             test_type: Type of test ('information' for Part 3, 'default' for others)
             require_answers: Whether to add 'required' attribute (True for Test Mode, False for Practice)
             
@@ -132,8 +473,8 @@ class TestDataLoader:
         """
         required_attr = ' required' if require_answers else ''
         html = ''
-        for question in questions:
-            q_id = question['id']
+        for question in map(as_question, questions):
+            q_id = question.id
             html += f'<div class="question-inline">'
             html += f'<span class="question-number">{q_id}.</span> '
             
@@ -141,16 +482,16 @@ class TestDataLoader:
             if test_type == 'information':
                 html += f'<select class="inline-dropdown" name="q{q_id}" data-question="{q_id}"{required_attr}>'
                 html += '<option value="">-- Select --</option>'
-                for idx, option in enumerate(question['options']):
+                for idx, option in enumerate(question.options):
                     html += f'<option value="{idx}">{option}</option>'
                 html += '</select> '
-                html += f'<span class="question-label">{question["text"]}</span>'
+                html += f'<span class="question-label">{question.text}</span>'
             else:
                 # Default: text comes before dropdown
-                html += f'<span class="question-label">{question["text"]}</span> '
+                html += f'<span class="question-label">{question.text}</span> '
                 html += f'<select class="inline-dropdown" name="q{q_id}" data-question="{q_id}"{required_attr}>'
                 html += '<option value="">-- Select --</option>'
-                for idx, option in enumerate(question['options']):
+                for idx, option in enumerate(question.options):
                     html += f'<option value="{idx}">{option}</option>'
                 html += '</select>'
             
@@ -164,15 +505,7 @@ class TestDataLoader:
         Returns:
             list: Available test numbers
         """
-        tests = []
-        for item in self.data_dir.iterdir():
-            if item.is_dir() and item.name.startswith('test_'):
-                try:
-                    test_num = int(item.name.split('_')[1])
-                    tests.append(test_num)
-                except (ValueError, IndexError):
-                    continue
-        return sorted(tests)
+        return sorted(self.snapshot().tests)
     
     def list_available_parts(self, test_number, skill):
         """
@@ -185,19 +518,7 @@ class TestDataLoader:
         Returns:
             list: Available part numbers
         """
-        skill_dir = self.data_dir / f'test_{test_number}' / skill
-        if not skill_dir.exists():
-            return []
-        
-        parts = []
-        for item in skill_dir.iterdir():
-            if item.suffix == '.json' and item.stem.startswith('part'):
-                try:
-                    part_num = int(item.stem.replace('part', ''))
-                    parts.append(part_num)
-                except ValueError:
-                    continue
-        return sorted(parts)
+        return self.snapshot().tests.get(int(test_number), {}).get(skill, [])
     
     def get_correct_answers(self, test_data):
         """
@@ -209,6 +530,5 @@ class TestDataLoader:
         Returns:
             dict: Mapping of question ID (int) to correct answer index (int)
         """
-        questions = self.get_all_questions(test_data)
-        return {q['id']: q['answer'] for q in questions}
+        return answer_key(test_data)
 
@@ -6,15 +6,21 @@ Falls back gracefully when DATABASE_URL is not configured.
 Tables:
   users          - email, name, provider, role, timestamps
   test_history   - user_email FK, test data as JSONB
+  test_summary   - per-user, per-test attempt count and latest score
   vocabulary_notes - individual notes with indexed columns
 """
+import io
 import os
 import json
 import logging
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from contextlib import contextmanager
 
+from utils.storage.bulk import merge_profile, merge_test, parse_test_key
+from utils.storage.summary import build_summary_entry, summarize_tests
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -26,6 +32,21 @@ except ImportError:
     HAS_PSYCOPG2 = False
 
 
+def _copy_value(value) -> str:
+    """One field of COPY's text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
 class Database:
     """PostgreSQL database wrapper with connection pooling."""
 
@@ -33,6 +54,18 @@ class Database:
         self.database_url = database_url or os.getenv('DATABASE_URL')
         self.pool = None
         self._available = False
+        self._pool_exhausted = 0
+        # Connections checked out through _get_conn (ThreadedConnectionPool
+        # has no public count of its own)
+        self._pool_in_use = 0
+        self._pool_count_lock = threading.Lock()
+        self.pool_min = int(os.getenv('DB_POOL_MIN', 1))
+        self.pool_max = int(os.getenv('DB_POOL_MAX', 5))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', 10))
+        # ThreadedConnectionPool raises as soon as it is empty; callers wait
+        # here for a free connection instead, which matters when one process
+        # runs many requests concurrently (threaded / ASGI workers).
+        self._pool_slots = threading.BoundedSemaphore(self.pool_max)
 
         if not self.database_url:
             logger.info("DATABASE_URL not set - using file-based storage")
@@ -42,12 +75,9 @@ class Database:
             logger.warning("psycopg2 not installed - using file-based storage")
             return
 
+        self._pool_lock = threading.Lock()
         try:
-            self.pool = psycopg2.pool.ThreadedConnectionPool(
-                minconn=1,
-                maxconn=5,
-                dsn=self.database_url
-            )
+            self._open_pool()
             self._init_tables()
             self._available = True
             logger.info("PostgreSQL database connected successfully")
@@ -55,21 +85,67 @@ class Database:
             logger.error(f"Failed to connect to PostgreSQL: {e}")
             self.pool = None
 
+    def _open_pool(self):
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn=self.pool_min,
+            maxconn=self.pool_max,
+            dsn=self.database_url
+        )
+
     @property
     def is_available(self) -> bool:
-        return self._available and self.pool is not None
+        return self._available
+
+    def stats(self) -> Dict:
+        """
+        Connection pool usage for the metrics endpoint.
+
+        Returns:
+            dict: backend, and pool min/max/in_use/exhausted when connected
+        """
+        stats: Dict[str, Any] = {"backend": "postgres"}
+        if self.pool is not None:
+            stats["pool"] = {
+                "min": self.pool_min,
+                "max": self.pool_max,
+                "in_use": self._pool_in_use,
+                "exhausted": self._pool_exhausted,
+            }
+        return stats
 
     @contextmanager
     def _get_conn(self):
-        conn = self.pool.getconn()
+        if not self._pool_slots.acquire(timeout=self.pool_timeout):
+            self._pool_exhausted += 1
+            raise psycopg2.pool.PoolError(
+                f"no connection available within {self.pool_timeout}s"
+            )
         try:
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
+            if self.pool is None:
+                # Closed in the gunicorn master before forking; each worker
+                # opens its own connections on first use
+                with self._pool_lock:
+                    if self.pool is None:
+                        self._open_pool()
+            try:
+                conn = self.pool.getconn()
+            except psycopg2.pool.PoolError:
+                self._pool_exhausted += 1
+                raise
+            with self._pool_count_lock:
+                self._pool_in_use += 1
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.pool.putconn(conn)
+                with self._pool_count_lock:
+                    self._pool_in_use -= 1
         finally:
-            self.pool.putconn(conn)
+            self._pool_slots.release()
 
     def _init_tables(self):
         """Create tables if they don't exist."""
@@ -95,6 +171,17 @@ class Database:
                         UNIQUE(user_email, test_num)
                     );
 
+                    CREATE TABLE IF NOT EXISTS test_summary (
+                        user_email        TEXT NOT NULL REFERENCES users(email) ON DELETE CASCADE,
+                        test_num          INTEGER NOT NULL,
+                        attempt_count     INTEGER NOT NULL DEFAULT 0,
+                        latest_score      INTEGER NOT NULL DEFAULT 0,
+                        latest_max        INTEGER NOT NULL DEFAULT 0,
+                        latest_percentage REAL NOT NULL DEFAULT 0,
+                        latest_date       TEXT NOT NULL DEFAULT '',
+                        PRIMARY KEY (user_email, test_num)
+                    );
+
                     CREATE TABLE IF NOT EXISTS vocabulary_notes (
                         note_id     TEXT PRIMARY KEY,
                         user_email  TEXT NOT NULL REFERENCES users(email) ON DELETE CASCADE,
@@ -116,6 +203,71 @@ class Database:
                         ON test_history(user_email);
                 """)
 
+        self._backfill_test_summary()
+
+    def _backfill_test_summary(self):
+        """
+        Rebuild test_summary rows that are missing or out of date (runs on every start-up).
+
+        Covers the first start after the table was added, a backfill that
+        failed partway, and completions written by an app version that did
+        not maintain the summary: any test whose completed-attempt count in
+        test_history differs from its summary row is rebuilt from history.
+        """
+        with self._get_conn() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT h.user_email, h.test_num, h.data
+                    FROM test_history h
+                    LEFT JOIN test_summary s
+                        ON s.user_email = h.user_email AND s.test_num = h.test_num
+                    CROSS JOIN LATERAL (
+                        SELECT COUNT(*) AS completed
+                        FROM jsonb_array_elements(COALESCE(h.data->'attempts', '[]'::jsonb)) AS a
+                        WHERE COALESCE(a->>'completed_at', '') <> ''
+                    ) c
+                    WHERE c.completed > 0
+                      AND s.attempt_count IS DISTINCT FROM c.completed
+                """)
+                rows = cur.fetchall()
+            with conn.cursor() as cur:
+                for row in rows:
+                    summary = summarize_tests({row['test_num']: row['data']})
+                    for test_num, entry in summary.items():
+                        self._upsert_summary(cur, row['user_email'], test_num, entry)
+        if rows:
+            logger.info("Backfilled test_summary from %d test_history row(s)", len(rows))
+
+    @staticmethod
+    def _upsert_summary(cur, email: str, test_num: int, entry: Dict, increment: Optional[int] = None):
+        """
+        Write one summary row.  With *increment*, attempt_count is bumped by
+        that amount instead of being overwritten.
+        """
+        count_sql = (
+            "test_summary.attempt_count + %s" if increment is not None
+            else "EXCLUDED.attempt_count"
+        )
+        params = [
+            email, test_num,
+            entry['attempt_count'] if increment is None else max(increment, 1),
+            entry['latest_score'], entry['latest_max'],
+            entry['latest_percentage'], entry['latest_date'],
+        ]
+        if increment is not None:
+            params.append(increment)
+        cur.execute(f"""
+            INSERT INTO test_summary (user_email, test_num, attempt_count,
+                                      latest_score, latest_max, latest_percentage, latest_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (user_email, test_num) DO UPDATE SET
+                attempt_count = {count_sql},
+                latest_score = EXCLUDED.latest_score,
+                latest_max = EXCLUDED.latest_max,
+                latest_percentage = EXCLUDED.latest_percentage,
+                latest_date = EXCLUDED.latest_date
+        """, params)
+
     # ------------------------------------------------------------------ users
 
     def get_user_profile(self, email: str) -> Dict:
@@ -124,15 +276,7 @@ class Database:
                 cur.execute("SELECT * FROM users WHERE email = %s", (email,))
                 row = cur.fetchone()
                 if row:
-                    return {
-                        'email': row['email'],
-                        'name': row['name'],
-                        'provider': row['provider'],
-                        'picture': row['picture'],
-                        'role': row['role'],
-                        'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                        'last_accessed': row['last_accessed'].isoformat() if row['last_accessed'] else None,
-                    }
+                    return self._row_to_profile(row)
                 return {
                     'email': email,
                     'role': 'Basic',
@@ -180,6 +324,44 @@ class Database:
                 cur.execute("SELECT email FROM users ORDER BY email")
                 return [row[0] for row in cur.fetchall()]
 
+    def import_user_profiles(self, profiles: List[Dict]):
+        """Upsert many profiles in one transaction (see utils.storage.bulk)."""
+        imported: Dict[str, List[Dict]] = {}
+        for profile in profiles:
+            imported.setdefault(profile['email'], []).append(profile)
+        if not imported:
+            return
+
+        with self._get_conn() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute(
+                    "SELECT * FROM users WHERE email = ANY(%s) ORDER BY email FOR UPDATE",
+                    (list(imported),),
+                )
+                stored = {row['email']: self._row_to_profile(row) for row in cur.fetchall()}
+
+                now = datetime.now().isoformat()
+                rows = []
+                for email, updates in imported.items():
+                    merged = stored.get(email)
+                    for profile in updates:
+                        merged = merge_profile(merged, profile)
+                    rows.append((
+                        email, merged.get('name'), merged.get('provider'), merged.get('picture'),
+                        merged['role'], merged.get('created_at') or now, merged.get('last_accessed') or now,
+                    ))
+                self._copy_upsert(
+                    cur, 'users',
+                    ('email', 'name', 'provider', 'picture', 'role', 'created_at', 'last_accessed'),
+                    rows, conflict='email',
+                )
+
+    def export_user_profiles(self, emails: List[str]) -> List[Dict]:
+        with self._get_conn() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute("SELECT * FROM users WHERE email = ANY(%s) ORDER BY email", (list(emails),))
+                return [self._row_to_profile(row) for row in cur.fetchall()]
+
     # --------------------------------------------------------- test_history
 
     def _load_test_history(self, email: str) -> Dict:
@@ -195,101 +377,126 @@ class Database:
                     tests[test_key] = row['data']
                 return {'tests': tests}
 
-    def _save_test_history_for_test(self, email: str, test_num: int, data: Dict):
-        """Save history for a single test number."""
-        self._ensure_user_exists(email)
-        with self._get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO test_history (user_email, test_num, data, updated_at)
-                    VALUES (%s, %s, %s, NOW())
-                    ON CONFLICT (user_email, test_num) DO UPDATE SET
-                        data = EXCLUDED.data,
-                        updated_at = NOW()
-                """, (
-                    email,
-                    test_num,
-                    json.dumps(data),
-                ))
+    @staticmethod
+    def _lock_test_history(cur, email: str, test_num: int) -> Dict:
+        """
+        Fetch one test's history row and lock it until the transaction ends.
+
+        Writers for the same user and test (other threads, workers or app
+        instances) wait here instead of overwriting each other's parts.
+        The row is created first if missing, so there is always one to lock.
+        """
+        cur.execute("""
+            INSERT INTO test_history (user_email, test_num, data)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (user_email, test_num) DO NOTHING
+        """, (email, test_num, json.dumps({'test_number': test_num, 'attempts': []})))
+        cur.execute("""
+            SELECT data FROM test_history
+            WHERE user_email = %s AND test_num = %s
+            FOR UPDATE
+        """, (email, test_num))
+        data = cur.fetchone()[0]
+        data.setdefault('test_number', test_num)
+        data.setdefault('attempts', [])
+        return data
+
+    @staticmethod
+    def _store_test_history(cur, email: str, test_num: int, data: Dict):
+        """Write back a history row locked by _lock_test_history."""
+        cur.execute("""
+            UPDATE test_history SET data = %s, updated_at = NOW()
+            WHERE user_email = %s AND test_num = %s
+        """, (json.dumps(data), email, test_num))
 
     def save_test_result(self, user_email, test_num, skill, part_num,
                          answers, correct_answers, score, max_score, attempt_id):
-        history = self._load_test_history(user_email)
-        test_key = f'test_{test_num}'
-
-        if test_key not in history['tests']:
-            history['tests'][test_key] = {
-                'test_number': test_num,
-                'attempts': []
-            }
-
-        test_data = history['tests'][test_key]
-
-        attempt = None
-        for att in test_data['attempts']:
-            if att['attempt_id'] == attempt_id:
-                attempt = att
-                break
-
-        if attempt is None:
-            attempt = {
-                'attempt_id': attempt_id,
-                'started_at': datetime.now().isoformat(),
-                'completed_at': None,
-                'skills': {}
-            }
-            test_data['attempts'].append(attempt)
-
-        if skill not in attempt['skills']:
-            attempt['skills'][skill] = {
-                'skill_name': skill,
-                'parts': {},
-                'total_score': 0,
-                'total_max': 0
-            }
+        self._ensure_user_exists(user_email)
+        with self._get_conn() as conn:
+            with conn.cursor() as cur:
+                test_data = self._lock_test_history(cur, user_email, test_num)
+
+                attempt = None
+                for att in test_data['attempts']:
+                    if att['attempt_id'] == attempt_id:
+                        attempt = att
+                        break
+
+                if attempt is None:
+                    attempt = {
+                        'attempt_id': attempt_id,
+                        'started_at': datetime.now().isoformat(),
+                        'completed_at': None,
+                        'skills': {}
+                    }
+                    test_data['attempts'].append(attempt)
+
+                if skill not in attempt['skills']:
+                    attempt['skills'][skill] = {
+                        'skill_name': skill,
+                        'parts': {},
+                        'total_score': 0,
+                        'total_max': 0
+                    }
 
-        attempt['skills'][skill]['parts'][str(part_num)] = {
-            'part_number': part_num,
-            'answers': {str(k): v for k, v in answers.items()},
-            'correct_answers': {str(k): v for k, v in correct_answers.items()},
-            'score': score,
-            'max_score': max_score,
-            'timestamp': datetime.now().isoformat()
-        }
+                attempt['skills'][skill]['parts'][str(part_num)] = {
+                    'part_number': part_num,
+                    'answers': {str(k): v for k, v in answers.items()},
+                    'correct_answers': {str(k): v for k, v in correct_answers.items()},
+                    'score': score,
+                    'max_score': max_score,
+                    'timestamp': datetime.now().isoformat()
+                }
 
-        skill_data = attempt['skills'][skill]
-        skill_data['total_score'] = sum(p['score'] for p in skill_data['parts'].values())
-        skill_data['total_max'] = sum(p['max_score'] for p in skill_data['parts'].values())
+                skill_data = attempt['skills'][skill]
+                skill_data['total_score'] = sum(p['score'] for p in skill_data['parts'].values())
+                skill_data['total_max'] = sum(p['max_score'] for p in skill_data['parts'].values())
 
-        self._save_test_history_for_test(user_email, test_num, test_data)
+                self._store_test_history(cur, user_email, test_num, test_data)
 
-        # Touch last_accessed
-        with self._get_conn() as conn:
-            with conn.cursor() as cur:
+                # Touch last_accessed
                 cur.execute(
                     "UPDATE users SET last_accessed = NOW() WHERE email = %s",
                     (user_email,),
                 )
 
     def complete_test_attempt(self, user_email, test_num, attempt_id):
-        history = self._load_test_history(user_email)
-        test_key = f'test_{test_num}'
-
-        if test_key in history['tests']:
-            test_data = history['tests'][test_key]
-            for attempt in test_data['attempts']:
-                if attempt['attempt_id'] == attempt_id:
-                    attempt['completed_at'] = datetime.now().isoformat()
-                    total_score = 0
-                    total_max = 0
-                    for skill_data in attempt['skills'].values():
-                        total_score += skill_data['total_score']
-                        total_max += skill_data['total_max']
-                    attempt['total_score'] = total_score
-                    attempt['total_max'] = total_max
-                    attempt['percentage'] = round((total_score / total_max * 100), 1) if total_max > 0 else 0
-                    break
-            self._save_test_history_for_test(user_email, test_num, test_data)
+        with self._get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT 1 FROM test_history WHERE user_email = %s AND test_num = %s",
+                    (user_email, test_num),
+                )
+                if cur.fetchone() is None:
+                    return
+
+                # The row lock also makes was_completed exact, so two
+                # instances completing the same attempt count it once
+                test_data = self._lock_test_history(cur, user_email, test_num)
+                completed_attempt = None
+                was_completed = False
+                for attempt in test_data['attempts']:
+                    if attempt['attempt_id'] == attempt_id:
+                        was_completed = bool(attempt.get('completed_at'))
+                        attempt['completed_at'] = datetime.now().isoformat()
+                        total_score = 0
+                        total_max = 0
+                        for skill_data in attempt['skills'].values():
+                            total_score += skill_data['total_score']
+                            total_max += skill_data['total_max']
+                        attempt['total_score'] = total_score
+                        attempt['total_max'] = total_max
+                        attempt['percentage'] = round((total_score / total_max * 100), 1) if total_max > 0 else 0
+                        completed_attempt = attempt
+                        break
+                self._store_test_history(cur, user_email, test_num, test_data)
+
+                if completed_attempt is not None:
+                    entry = build_summary_entry(completed_attempt, 1)
+                    self._upsert_summary(
+                        cur, user_email, test_num, entry,
+                        increment=0 if was_completed else 1,
+                    )
 
     def get_user_test_history(self, user_email, test_num) -> Dict:
         history = self._load_test_history(user_email)
@@ -312,31 +519,94 @@ class Database:
         }
 
     def get_all_tests_summary(self, user_email) -> Dict[int, Dict]:
-        history = self._load_test_history(user_email)
-        summary = {}
-
-        for test_key, test_data in history['tests'].items():
-            test_num = test_data['test_number']
-            completed = [a for a in test_data['attempts'] if a.get('completed_at')]
-
-            if completed:
-                latest = max(completed, key=lambda x: x['completed_at'])
-                summary[test_num] = {
-                    'attempt_count': len(completed),
-                    'latest_score': latest.get('total_score', 0),
-                    'latest_max': latest.get('total_max', 0),
-                    'latest_percentage': latest.get('percentage', 0),
-                    'latest_date': latest.get('completed_at', '')
+        with self._get_conn() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT test_num, attempt_count, latest_score, latest_max,
+                           latest_percentage, latest_date
+                    FROM test_summary WHERE user_email = %s
+                """, (user_email,))
+                return {
+                    row['test_num']: {
+                        'attempt_count': row['attempt_count'],
+                        'latest_score': row['latest_score'],
+                        'latest_max': row['latest_max'],
+                        'latest_percentage': row['latest_percentage'],
+                        'latest_date': row['latest_date'],
+                    }
+                    for row in cur.fetchall()
                 }
 
-        return summary
+    def import_test_histories(self, histories: Dict[str, Dict]):
+        """
+        Merge many users' histories in one transaction (see utils.storage.bulk).
+
+        Rows are locked like _lock_test_history, so the import is safe while
+        the app is writing; the summary of every imported test is rebuilt.
+        """
+        imported: Dict[tuple, Dict] = {}
+        for email, tests in histories.items():
+            for test_key, test_data in tests.items():
+                test_num = parse_test_key(test_key)
+                if test_num is None:
+                    logger.warning("Skipping unrecognised test key %r for %s", test_key, email)
+                    continue
+                imported[(email, test_num)] = merge_test(imported.get((email, test_num)), test_data, test_num)
+        if not imported:
+            return
+
+        with self._get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT user_email, test_num, data FROM test_history
+                    WHERE user_email = ANY(%s)
+                    ORDER BY user_email, test_num
+                    FOR UPDATE
+                """, (sorted({email for email, _ in imported}),))
+                stored = {(row[0], row[1]): row[2] for row in cur.fetchall()}
+
+                history_rows = []
+                summary_rows = []
+                for (email, test_num), test_data in imported.items():
+                    merged = merge_test(stored.get((email, test_num)), test_data, test_num)
+                    history_rows.append((email, test_num, json.dumps(merged)))
+                    for entry in summarize_tests({test_num: merged}).values():
+                        summary_rows.append((
+                            email, test_num, entry['attempt_count'],
+                            entry['latest_score'], entry['latest_max'],
+                            entry['latest_percentage'], entry['latest_date'],
+                        ))
+
+                self._copy_upsert(
+                    cur, 'test_history', ('user_email', 'test_num', 'data'), history_rows,
+                    conflict='user_email, test_num', update=('data = EXCLUDED.data', 'updated_at = NOW()'),
+                )
+                self._copy_upsert(
+                    cur, 'test_summary',
+                    ('user_email', 'test_num', 'attempt_count', 'latest_score', 'latest_max',
+                     'latest_percentage', 'latest_date'),
+                    summary_rows, conflict='user_email, test_num',
+                )
+
+    def export_test_histories(self, emails: List[str]) -> Dict[str, Dict]:
+        with self._get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT user_email, test_num, data FROM test_history
+                    WHERE user_email = ANY(%s)
+                    ORDER BY user_email, test_num
+                """, (list(emails),))
+                histories: Dict[str, Dict] = {}
+                for email, test_num, data in cur.fetchall():
+                    histories.setdefault(email, {})[f'test_{test_num}'] = data
+                return histories
 
     # --------------------------------------------------- vocabulary_notes
 
     def save_vocabulary_note(self, user_email, test_num, skill, part_num,
-                             word, definition, context='') -> str:
+                             word, definition, context='', note_id=None) -> str:
         self._ensure_user_exists(user_email)
-        note_id = f"{test_num}_{skill}_{part_num}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        note_id = note_id or f"{test_num}_{skill}_{part_num}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
 
         with self._get_conn() as conn:
             with conn.cursor() as cur:
@@ -344,6 +614,7 @@ class Database:
                     INSERT INTO vocabulary_notes
                         (note_id, user_email, test_num, skill, part_num, word, definition, context)
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (note_id) DO NOTHING
                 """, (
                     note_id, user_email, test_num, skill, part_num,
                     word.strip(), definition.strip(), context.strip(),
@@ -414,8 +685,80 @@ class Database:
                 )
                 return cur.rowcount > 0
 
+    def import_vocabulary_notes(self, notes: Dict[str, List[Dict]]):
+        """Upsert many users' notes in one transaction, keyed by note_id."""
+        now = datetime.now().isoformat()
+        rows = {}
+        for email, user_notes in notes.items():
+            for note in user_notes:
+                rows[note['note_id']] = (
+                    note['note_id'], email, note['test_num'], note['skill'], note['part_num'],
+                    note['word'], note['definition'], note.get('context') or '',
+                    note.get('created_at') or now, note.get('updated_at'),
+                )
+        with self._get_conn() as conn:
+            with conn.cursor() as cur:
+                self._copy_upsert(
+                    cur, 'vocabulary_notes',
+                    ('note_id', 'user_email', 'test_num', 'skill', 'part_num', 'word',
+                     'definition', 'context', 'created_at', 'updated_at'),
+                    list(rows.values()), conflict='note_id',
+                )
+
+    def export_vocabulary_notes(self, emails: List[str]) -> Dict[str, List[Dict]]:
+        with self._get_conn() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT * FROM vocabulary_notes
+                    WHERE user_email = ANY(%s)
+                    ORDER BY user_email, created_at DESC
+                """, (list(emails),))
+                notes: Dict[str, List[Dict]] = {}
+                for row in cur.fetchall():
+                    notes.setdefault(row['user_email'], []).append(self._row_to_note(row))
+                return notes
+
     # ------------------------------------------------------------ helpers
 
+    @staticmethod
+    def _copy_upsert(cur, table: str, columns, rows, conflict: str, update=None):
+        """
+        Upsert many rows through COPY.
+
+        Rows are streamed into a temporary copy of *table* with COPY, then
+        merged with one INSERT ... SELECT ... ON CONFLICT, which is far
+        faster than one INSERT per row.  Table and column names are fixed
+        by the callers; every value travels in the COPY stream.
+
+        Args:
+            table: Target table
+            columns: Column names, in row order
+            rows: Value tuples (None for NULL); at most one per conflict key
+            conflict: Conflict target, e.g. 'user_email, test_num'
+            update: SET clauses on conflict (default: overwrite every other column)
+        """
+        if not rows:
+            return
+        staging = f'_import_{table}'
+        column_list = ', '.join(columns)
+        keys = {key.strip() for key in conflict.split(',')}
+        update = update or [f'{c} = EXCLUDED.{c}' for c in columns if c not in keys]
+
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        cur.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cur.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN", buffer)
+        cur.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {column_list} FROM {staging}
+            ON CONFLICT ({conflict}) DO UPDATE SET {', '.join(update)}
+        """)
+        cur.execute(f"DROP TABLE {staging}")
+
     def _ensure_user_exists(self, email: str):
         """Insert a minimal user row if it doesn't exist yet."""
         with self._get_conn() as conn:
@@ -425,6 +768,18 @@ class Database:
                     ON CONFLICT (email) DO NOTHING
                 """, (email,))
 
+    @staticmethod
+    def _row_to_profile(row) -> Dict:
+        return {
+            'email': row['email'],
+            'name': row['name'],
+            'provider': row['provider'],
+            'picture': row['picture'],
+            'role': row['role'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'last_accessed': row['last_accessed'].isoformat() if row['last_accessed'] else None,
+        }
+
     @staticmethod
     def _row_to_note(row) -> Dict:
         return {
@@ -440,5 +795,7 @@ class Database:
         }
 
     def close(self):
+        """Close all pooled connections; the pool is reopened lazily on next use."""
         if self.pool:
             self.pool.closeall()
+            self.pool = None
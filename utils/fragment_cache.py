@@ -0,0 +1,80 @@
+"""
+In-process cache for rendered template fragments.
+
+The passage/question portion of a test page is identical for every visitor
+of a given part; only saved answers, timers and the login sidebar differ.
+Routes render that portion once per (template, test, skill, part, mode,
+content version) and reuse the HTML until test content or templates change.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """Thread-safe, size-bounded LRU cache of rendered fragments"""
+
+    def __init__(self, max_entries=512):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of fragments kept (least recently used evicted)
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """
+        Return the cached value for *key*, calling *render* on a miss
+
+        Rendering happens outside the lock, so two concurrent misses for the
+        same key may both render; the result is identical and one is kept.
+
+        Args:
+            key: Hashable cache key (must include the content version)
+            render: Zero-argument callable producing the value
+
+        Returns:
+            The cached or freshly rendered value
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = render()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every cached fragment"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: size, max_entries, hits, misses and hit_ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,97 @@
+"""
+HTTP caching helpers — ETags, Cache-Control and conditional GET.
+
+Content pages (practice parts, answer keys, test overview) only change when
+the JSON under data/, the templates or the per-user bits mixed into them
+change.  Routes build an ETag from those inputs and call
+conditional_response(); when the browser or a reverse proxy already holds
+that version the template is never rendered and a bodiless 304 is returned.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from flask import current_app, make_response, request
+
+
+# Pages that embed session or login state: browsers may store them but must
+# revalidate, and shared caches must not serve them to other users.
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag value from the given parts
+
+    Args:
+        *parts: Values that together identify one version of a response
+
+    Returns:
+        str: Hex digest (without quotes — Werkzeug adds them)
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:32]
+
+
+def tree_fingerprint(*paths):
+    """
+    Hash the bytes of every file under the given files/directories
+
+    Used once at startup for inputs that only change on deploy (templates,
+    config.json), so the cost is not paid per request.
+
+    Args:
+        *paths: Files or directories to include
+
+    Returns:
+        str: Short hex digest
+    """
+    digest = hashlib.sha256()
+    for base in paths:
+        base = Path(base)
+        if base.is_file():
+            files = [base]
+        elif base.is_dir():
+            files = sorted(p for p in base.rglob('*') if p.is_file())
+        else:
+            continue
+        for file_path in files:
+            digest.update(str(file_path.relative_to(base.parent)).encode('utf-8'))
+            digest.update(file_path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def conditional_response(etag, render, cache_control=PRIVATE_REVALIDATE):
+    """
+    Answer a GET with 304 when the client already has *etag*, else render
+
+    Args:
+        etag: ETag for the response the route would produce
+        render: Zero-argument callable returning the normal view result
+        cache_control: Cache-Control header for successful responses
+
+    Returns:
+        Response: 304 Not Modified, or the rendered response tagged with *etag*
+    """
+    # If-None-Match uses weak comparison, so tags weakened by response
+    # compression (see utils.assets) still match
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+        if response.status_code != 200:
+            # Errors are never tagged — a later fix to data/ must be visible.
+            return response
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def static_max_age():
+    """Seconds browsers may reuse files under static/ without revalidating."""
+    return int(os.getenv('STATIC_MAX_AGE', 86400))
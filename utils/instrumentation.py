@@ -0,0 +1,333 @@
+"""
+Per-request timing instrumentation and profiling hooks.
+
+Each request accumulates named timing spans:
+  • data     — TestDataLoader calls (JSON load, content version, ...)
+  • storage  — ResultsTracker calls (file or PostgreSQL I/O)
+  • render   — render_template (page and content fragments)
+  • session  — loading and saving the signed-cookie session
+The totals are aggregated per route into latency histograms that the
+metrics endpoint exposes. With SERVER_TIMING=1 (or in debug mode) they are
+also sent back in a Server-Timing header, visible in the browser's network
+panel; it is off by default so clients do not see backend timings.
+
+Slow requests can be profiled: with PROFILE_SAMPLE_RATE > 0 a sample of
+requests runs under cProfile (or pyinstrument if PROFILER=pyinstrument and
+it is installed) and any that take longer than PROFILE_SLOW_MS are written
+to PROFILE_DIR.
+"""
+
+import functools
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import before_render_template, g, has_request_context, request, request_finished, template_rendered
+from flask.sessions import SecureCookieSessionInterface
+
+
+# Upper bounds (ms) of the latency histogram buckets; a final +Inf bucket is implied
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+SPAN_DESCRIPTIONS = {
+    'data': 'Test data loader',
+    'storage': 'Results storage',
+    'render': 'Template rendering',
+    'session': 'Session load/save',
+}
+
+
+class _RequestTimings:
+    """Span totals for the request in progress (stored on flask.g)"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.active = defaultdict(int)
+        self.render_starts = []
+        self.profiler = None
+
+
+class _Histogram:
+    """Cumulative-style latency histogram for one route"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.span_ms = defaultdict(float)
+        self.status = defaultdict(int)
+
+    def observe(self, duration_ms, spans, status_code):
+        self.count += 1
+        self.total_ms += duration_ms
+        for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        for name, value in spans.items():
+            self.span_ms[name] += value
+        self.status[status_code] += 1
+
+
+def _state():
+    """Timing state of the current request, created on first use"""
+    timings = g.get('_request_timings')
+    if timings is None:
+        timings = g._request_timings = _RequestTimings()
+    return timings
+
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Cookie session interface that records load/save time in the 'session' span"""
+
+    def open_session(self, app, request):
+        with span('session'):
+            return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        with span('session'):
+            return super().save_session(app, session, response)
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block into the named span of the current request
+
+    Nested spans with the same name are counted once (the outermost), so a
+    loader method calling another loader method is not double-counted.
+    Outside a request this is a no-op.
+
+    Args:
+        name: Span name ('data', 'storage', 'render', 'session', ...)
+    """
+    if not has_request_context():
+        yield
+        return
+
+    timings = _state()
+    timings.active[name] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active[name] -= 1
+        if timings.active[name] == 0:
+            timings.totals[name] += time.perf_counter() - start
+            timings.counts[name] += 1
+
+
+class Instrumentation:
+    """Request timing, Server-Timing headers, per-route histograms and profiling"""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(_Histogram)
+        self._calls = defaultdict(lambda: [0, 0.0, 0])  # (span, method) -> [count, seconds, errors]
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Register hooks on *app*
+
+        Environment:
+            SERVER_TIMING: '1' adds the Server-Timing header to every response (default off;
+                always on in debug mode)
+            PROFILE_SAMPLE_RATE: Fraction of requests run under the profiler (default 0)
+            PROFILE_SLOW_MS: Only profiles of requests at least this slow are kept (default 500)
+            PROFILER: 'cprofile' (default) or 'pyinstrument'
+            PROFILE_DIR: Where profiles are written (default 'profiles')
+        """
+        self.server_timing = os.getenv('SERVER_TIMING', '0') == '1'
+        self.profile_sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+        self.profile_slow_ms = float(os.getenv('PROFILE_SLOW_MS', 500))
+        self.profiler_name = os.getenv('PROFILER', 'cprofile').lower()
+        self.profile_dir = os.getenv('PROFILE_DIR', os.path.join(app.root_path, 'profiles'))
+
+        app.session_interface = TimedSessionInterface()
+        app.before_request(self._before_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        # request_finished fires after the session cookie is written, so the
+        # header and histograms include session save time
+        request_finished.connect(self._request_finished, app)
+        app.extensions['instrumentation'] = self
+
+    def instrument(self, obj, span_name, exclude=()):
+        """
+        Wrap every public method of *obj* (in place) in the named span
+
+        Per-method call counts, time and errors are kept for the metrics endpoint.
+
+        Args:
+            obj: Instance to instrument (e.g. data_loader, results_tracker)
+            span_name: Span the calls are attributed to
+            exclude: Method names to leave unwrapped
+        """
+        for attr in dir(type(obj)):
+            if attr.startswith('_') or attr in exclude:
+                continue
+            method = getattr(obj, attr)
+            if callable(method):
+                setattr(obj, attr, self._wrap(method, span_name, attr))
+        return obj
+
+    def _wrap(self, method, span_name, method_name):
+        key = (span_name, method_name)
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            failed = False
+            try:
+                with span(span_name):
+                    return method(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    stats = self._calls[key]
+                    stats[0] += 1
+                    stats[1] += elapsed
+                    stats[2] += failed
+        return wrapper
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+
+    def _before_request(self):
+        timings = _state()
+        if self.profile_sample_rate and random.random() < self.profile_sample_rate:
+            timings.profiler = self._start_profiler()
+
+    def _before_render(self, sender, template, context, **extra):
+        if has_request_context():
+            _state().render_starts.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if not has_request_context():
+            return
+        timings = _state()
+        if timings.render_starts:
+            start = timings.render_starts.pop()
+            if not timings.render_starts:
+                # Only the outermost render counts (fragments render inside pages)
+                timings.totals['render'] += time.perf_counter() - start
+            timings.counts['render'] += 1
+
+    def _request_finished(self, sender, response, **extra):
+        timings = g.get('_request_timings')
+        if timings is None:
+            return
+        duration_ms = (time.perf_counter() - timings.start) * 1000
+        spans_ms = {name: seconds * 1000 for name, seconds in timings.totals.items()}
+
+        if self.server_timing or sender.debug:
+            entries = [
+                f'{name};dur={value:.2f};desc="{SPAN_DESCRIPTIONS.get(name, name)} '
+                f'({timings.counts[name]}x)"'
+                for name, value in sorted(spans_ms.items())
+            ]
+            entries.append(f'total;dur={duration_ms:.2f}')
+            response.headers['Server-Timing'] = ', '.join(entries)
+
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else '<unmatched>'}"
+        with self._lock:
+            self._routes[route].observe(duration_ms, spans_ms, response.status_code)
+
+        if timings.profiler is not None:
+            self._finish_profiler(timings.profiler, route, duration_ms)
+
+    # ------------------------------------------------------------------
+    # Profiling
+    # ------------------------------------------------------------------
+
+    def _start_profiler(self):
+        try:
+            if self.profiler_name == 'pyinstrument':
+                from pyinstrument import Profiler
+                profiler = Profiler()
+            else:
+                import cProfile
+                profiler = cProfile.Profile()
+                profiler.enable()
+                return profiler
+            profiler.start()
+            return profiler
+        except (ImportError, RuntimeError, ValueError):
+            # pyinstrument not installed, or another profiler already active
+            return None
+
+    def _finish_profiler(self, profiler, route, duration_ms):
+        if self.profiler_name == 'pyinstrument':
+            profiler.stop()
+        else:
+            profiler.disable()
+        if duration_ms < self.profile_slow_ms:
+            return
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_')
+        base = os.path.join(
+            self.profile_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{duration_ms:.0f}ms"
+        )
+        if self.profiler_name == 'pyinstrument':
+            with open(base + '.html', 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.dump_stats(base + '.prof')
+
+    # ------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------
+
+    def route_stats(self):
+        """
+        Get the per-route latency histograms
+
+        Returns:
+            dict: {"METHOD /rule": {count, total_ms, buckets: [(le_ms, cumulative count)],
+                   span_ms: {span: total ms}, status: {code: count}}}
+        """
+        with self._lock:
+            stats = {}
+            for route, hist in self._routes.items():
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(HISTOGRAM_BUCKETS_MS + (float('inf'),), hist.buckets):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                stats[route] = {
+                    'count': hist.count,
+                    'total_ms': round(hist.total_ms, 3),
+                    'buckets': buckets,
+                    'span_ms': {k: round(v, 3) for k, v in hist.span_ms.items()},
+                    'status': dict(hist.status),
+                }
+            return stats
+
+    def call_stats(self):
+        """
+        Get per-method statistics of instrumented objects
+
+        Returns:
+            dict: {(span, method): {count, seconds, errors}}
+        """
+        with self._lock:
+            return {
+                key: {'count': count, 'seconds': round(seconds, 6), 'errors': errors}
+                for key, (count, seconds, errors) in self._calls.items()
+            }
@@ -0,0 +1,244 @@
+"""
+Prometheus text-format metrics.
+
+Collects what the app already tracks in-process — per-route latency
+histograms and per-method call timings (utils.instrumentation), storage
+backend, connection pool usage and, with STORAGE_TRACING, per-operation
+storage traces (ResultsTracker.get_storage_stats) and
+content cache statistics (FragmentCache.stats) and background writer queue
+statistics (BackgroundWriter.stats) — and renders them in the
+Prometheus exposition format served by the /metrics endpoint.
+
+Values are per process: with several gunicorn workers each scrape sees
+one worker, so aggregate with sum() by instance in queries.
+"""
+
+import math
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    """Escape a label value"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf'
+        return repr(round(value, 6))
+    return str(value)
+
+
+class MetricsWriter:
+    """Accumulates metric families and renders them as text"""
+
+    def __init__(self):
+        self._lines = []
+
+    def family(self, name, metric_type, help_text):
+        self._lines.append(f'# HELP {name} {help_text}')
+        self._lines.append(f'# TYPE {name} {metric_type}')
+
+    def sample(self, name, value, **labels):
+        self._lines.append(f'{name}{_labels(**labels)} {_number(value)}')
+
+    def render(self):
+        return '\n'.join(self._lines) + '\n'
+
+
+def write_route_metrics(writer, route_stats):
+    """
+    Request counts and latency histograms per route
+
+    Args:
+        writer: MetricsWriter
+        route_stats: Instrumentation.route_stats()
+    """
+    rows = []
+    for key, stats in sorted(route_stats.items()):
+        method, _, route = key.partition(' ')
+        rows.append((method, route, stats))
+
+    writer.family('celpip_http_requests_total', 'counter', 'HTTP requests by route and status code.')
+    for method, route, stats in rows:
+        for status, count in sorted(stats['status'].items()):
+            writer.sample('celpip_http_requests_total', count, method=method, route=route, status=status)
+
+    writer.family('celpip_http_request_duration_seconds', 'histogram',
+                  'Request latency by route, including session load/save.')
+    for method, route, stats in rows:
+        for bound_ms, cumulative in stats['buckets']:
+            le = '+Inf' if math.isinf(bound_ms) else _number(bound_ms / 1000)
+            writer.sample('celpip_http_request_duration_seconds_bucket', cumulative,
+                          method=method, route=route, le=le)
+        writer.sample('celpip_http_request_duration_seconds_sum', stats['total_ms'] / 1000,
+                      method=method, route=route)
+        writer.sample('celpip_http_request_duration_seconds_count', stats['count'],
+                      method=method, route=route)
+
+    writer.family('celpip_http_request_span_seconds_total', 'counter',
+                  'Time spent in each span (data, storage, render, session) by route.')
+    for method, route, stats in rows:
+        for span, total_ms in sorted(stats['span_ms'].items()):
+            writer.sample('celpip_http_request_span_seconds_total', total_ms / 1000,
+                          method=method, route=route, span=span)
+
+
+def write_call_metrics(writer, call_stats):
+    """
+    Per-method call counts, time and errors of instrumented components
+
+    Args:
+        writer: MetricsWriter
+        call_stats: Instrumentation.call_stats()
+    """
+    rows = sorted(call_stats.items())
+    writer.family('celpip_component_calls_total', 'counter',
+                  'Calls to data loader (component="data") and storage (component="storage") methods.')
+    for (component, method), stats in rows:
+        writer.sample('celpip_component_calls_total', stats['count'], component=component, method=method)
+
+    writer.family('celpip_component_call_seconds_total', 'counter', 'Time spent in component methods.')
+    for (component, method), stats in rows:
+        writer.sample('celpip_component_call_seconds_total', stats['seconds'],
+                      component=component, method=method)
+
+    writer.family('celpip_component_call_errors_total', 'counter', 'Component method calls that raised.')
+    for (component, method), stats in rows:
+        writer.sample('celpip_component_call_errors_total', stats['errors'],
+                      component=component, method=method)
+
+
+def write_storage_metrics(writer, storage_stats):
+    """
+    Storage backend and connection pool usage
+
+    Args:
+        writer: MetricsWriter
+        storage_stats: ResultsTracker.get_storage_stats()
+    """
+    writer.family('celpip_storage_backend_info', 'gauge', 'Active storage backend.')
+    writer.sample('celpip_storage_backend_info', 1, backend=storage_stats.get('backend', 'unknown'))
+
+    pool = storage_stats.get('pool')
+    if not pool:
+        return
+    writer.family('celpip_db_pool_connections', 'gauge', 'PostgreSQL pool connections by state.')
+    writer.sample('celpip_db_pool_connections', pool['in_use'], state='in_use')
+    writer.family('celpip_db_pool_max_connections', 'gauge', 'PostgreSQL pool size limit.')
+    writer.sample('celpip_db_pool_max_connections', pool['max'])
+    writer.family('celpip_db_pool_utilization_ratio', 'gauge', 'Checked-out connections / pool maximum.')
+    writer.sample('celpip_db_pool_utilization_ratio', pool['in_use'] / pool['max'] if pool['max'] else 0.0)
+    writer.family('celpip_db_pool_exhausted_total', 'counter', 'Connection requests that timed out waiting for a free pool connection.')
+    writer.sample('celpip_db_pool_exhausted_total', pool['exhausted'])
+
+
+def write_storage_trace_metrics(writer, trace):
+    """
+    Per-operation storage traces (only present with STORAGE_TRACING)
+
+    Args:
+        writer: MetricsWriter
+        trace: StorageTracer.snapshot()
+    """
+    rows = sorted(trace['operations'].items())
+    for name, metric_type, key, help_text in (
+        ('celpip_storage_op_calls_total', 'counter', 'count', 'Repository method calls.'),
+        ('celpip_storage_op_seconds_total', 'counter', 'seconds', 'Time spent in repository methods.'),
+        ('celpip_storage_op_max_seconds', 'gauge', 'max_seconds', 'Slowest single repository call.'),
+        ('celpip_storage_op_errors_total', 'counter', 'errors', 'Repository calls that raised.'),
+    ):
+        writer.family(name, metric_type, help_text)
+        for (backend, repository, method), stats in rows:
+            writer.sample(name, stats[key], backend=backend, repository=repository, method=method)
+
+    writer.family('celpip_storage_op_payload_bytes_total', 'counter',
+                  'JSON size of repository arguments (direction="in") and results (direction="out").')
+    for (backend, repository, method), stats in rows:
+        for direction in ('in', 'out'):
+            writer.sample('celpip_storage_op_payload_bytes_total', stats[f'bytes_{direction}'],
+                          backend=backend, repository=repository, method=method, direction=direction)
+
+    routes = sorted(trace['routes'].items())
+    writer.family('celpip_storage_route_calls_total', 'counter', 'Repository calls by route.')
+    for (backend, key), stats in routes:
+        method, _, route = key.partition(' ')
+        writer.sample('celpip_storage_route_calls_total', stats['count'],
+                      backend=backend, method=method, route=route)
+    writer.family('celpip_storage_route_seconds_total', 'counter', 'Time spent in repository calls by route.')
+    for (backend, key), stats in routes:
+        method, _, route = key.partition(' ')
+        writer.sample('celpip_storage_route_seconds_total', stats['seconds'],
+                      backend=backend, method=method, route=route)
+
+
+def write_cache_metrics(writer, caches):
+    """
+    Content cache sizes and hit ratios
+
+    Args:
+        writer: MetricsWriter
+        caches: {cache name: FragmentCache.stats()-style dict}
+    """
+    rows = sorted(caches.items())
+    for name, metric_type, key, help_text in (
+        ('celpip_cache_entries', 'gauge', 'size', 'Entries currently cached.'),
+        ('celpip_cache_max_entries', 'gauge', 'max_entries', 'Cache capacity.'),
+        ('celpip_cache_hits_total', 'counter', 'hits', 'Cache hits.'),
+        ('celpip_cache_misses_total', 'counter', 'misses', 'Cache misses.'),
+        ('celpip_cache_hit_ratio', 'gauge', 'hit_ratio', 'Hits / lookups since start.'),
+    ):
+        writer.family(name, metric_type, help_text)
+        for cache, stats in rows:
+            if key in stats:
+                writer.sample(name, stats[key], cache=cache)
+
+
+def write_background_metrics(writer, background_stats):
+    """
+    Background writer queue depth and job outcomes
+
+    Args:
+        writer: MetricsWriter
+        background_stats: BackgroundWriter.stats()
+    """
+    writer.family('celpip_background_queue_depth', 'gauge', 'Deferred writes waiting to run.')
+    writer.sample('celpip_background_queue_depth', background_stats['depth'])
+    writer.family('celpip_background_jobs_total', 'counter',
+                  'Deferred writes by outcome (inline = ran in the request because the queue was full or disabled).')
+    for outcome in ('queued', 'inline', 'succeeded', 'retried', 'failed', 'recovered'):
+        writer.sample('celpip_background_jobs_total', background_stats[outcome], outcome=outcome)
+
+
+def render_metrics(instrumentation, storage_stats, caches, background_stats=None):
+    """
+    Render every metric family as Prometheus text
+
+    Args:
+        instrumentation: utils.instrumentation.Instrumentation
+        storage_stats: ResultsTracker.get_storage_stats()
+        caches: {cache name: stats dict}
+        background_stats: BackgroundWriter.stats(), if any
+
+    Returns:
+        str: Exposition-format body
+    """
+    writer = MetricsWriter()
+    write_route_metrics(writer, instrumentation.route_stats())
+    write_call_metrics(writer, instrumentation.call_stats())
+    write_storage_metrics(writer, storage_stats)
+    if storage_stats.get('trace'):
+        write_storage_trace_metrics(writer, storage_stats['trace'])
+    write_cache_metrics(writer, caches)
+    if background_stats is not None:
+        write_background_metrics(writer, background_stats)
+    return writer.render()
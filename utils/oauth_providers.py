@@ -1,11 +1,20 @@
 """
 OAuth Integration Module
 Handles OAuth flows for Google, Facebook, and other providers
+
+authlib (and the requests/cryptography stack it imports) is loaded on the
+first login rather than at startup, so guest-mode traffic and cold starts
+do not pay for it.
 """
 import os
-from authlib.integrations.flask_client import OAuth
+import threading
 from flask import url_for
 
+# Key under which authlib's Flask integration registers itself in app.extensions
+OAUTH_EXTENSION = 'authlib.integrations.flask_client'
+
+_init_lock = threading.Lock()
+
 
 def init_oauth(app):
     """
@@ -14,6 +23,8 @@ def init_oauth(app):
     Returns:
         OAuth instance configured with providers
     """
+    from authlib.integrations.flask_client import OAuth
+
     oauth = OAuth(app)
     
     # Google OAuth
@@ -45,6 +56,22 @@ def init_oauth(app):
     return oauth
 
 
+def get_oauth(app):
+    """
+    Get the app's OAuth registry, initializing it on first use
+    
+    Returns:
+        OAuth instance configured with providers
+    """
+    oauth = app.extensions.get(OAUTH_EXTENSION)
+    if oauth is None:
+        with _init_lock:
+            oauth = app.extensions.get(OAUTH_EXTENSION)
+            if oauth is None:
+                oauth = init_oauth(app)
+    return oauth
+
+
 def get_oauth_providers():
     """
     Get list of available OAuth providers
@@ -12,10 +12,14 @@ Domain responsibilities are split into three focused repositories:
   • UserRepository       — profiles and roles
   • TestRepository       — test attempts and results
   • VocabularyRepository — vocabulary notes
+
+The repositories (and any PostgreSQL connection) are created on first use,
+so importing the app does not wait on the database.
 """
 
 import os
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 
 from utils.storage import make_repositories, UserRepository, TestRepository, VocabularyRepository
 
@@ -24,14 +28,32 @@ class ResultsTracker:
     """Thin facade that delegates to the appropriate storage repositories."""
 
     def __init__(self, users_dir: str = "users", database_url: Optional[str] = None):
-        self._users: UserRepository
-        self._tests: TestRepository
-        self._vocab: VocabularyRepository
-
-        self._users, self._tests, self._vocab = make_repositories(
-            users_dir=users_dir,
-            database_url=database_url,
-        )
+        self._users_dir = users_dir
+        self._database_url = database_url
+        self._repos: Optional[Tuple[UserRepository, TestRepository, VocabularyRepository]] = None
+        self._repos_lock = threading.Lock()
+
+    def _repositories(self) -> Tuple[UserRepository, TestRepository, VocabularyRepository]:
+        if self._repos is None:
+            with self._repos_lock:
+                if self._repos is None:
+                    self._repos = make_repositories(
+                        users_dir=self._users_dir,
+                        database_url=self._database_url,
+                    )
+        return self._repos
+
+    @property
+    def _users(self) -> UserRepository:
+        return self._repositories()[0]
+
+    @property
+    def _tests(self) -> TestRepository:
+        return self._repositories()[1]
+
+    @property
+    def _vocab(self) -> VocabularyRepository:
+        return self._repositories()[2]
 
     # ------------------------------------------------------------------
     # User profile
@@ -95,8 +117,12 @@ class ResultsTracker:
         word: str,
         definition: str,
         context: str = "",
+        note_id: Optional[str] = None,
     ) -> str:
-        return self._vocab.save(user_email, test_num, skill, part_num, word, definition, context)
+        return self._vocab.save(user_email, test_num, skill, part_num, word, definition, context, note_id)
+
+    def new_vocabulary_note_id(self, test_num: int, skill: str, part_num: int) -> str:
+        return self._vocab.new_note_id(test_num, skill, part_num)
 
     def get_vocabulary_notes(
         self,
@@ -119,3 +145,30 @@ class ResultsTracker:
         context: Optional[str] = None,
     ) -> bool:
         return self._vocab.update(user_email, note_id, word, definition, context)
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def get_storage_stats(self) -> Dict:
+        """
+        Backend name, connection pool usage and storage traces (repositories share one backend).
+
+        Does not create the repositories: before the first storage call the
+        backend is reported as 'not_initialized'.
+        """
+        if self._repos is None:
+            return {"backend": "not_initialized"}
+        stats: Dict = {}
+        for repo in self._repos:
+            stats.update(repo.stats())
+        return stats
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def close_connections(self) -> None:
+        """Close backend connections (reopened lazily); called before forking workers."""
+        for repo in self._repos or ():
+            repo.close()
@@ -0,0 +1,274 @@
+"""
+Server-side sessions shared between app instances.
+
+By default Flask keeps the whole session in a signed cookie, which already
+works behind a load balancer as long as every instance has the same
+SECRET_KEY. SESSION_BACKEND=redis or sqlite instead keeps session data in
+a shared store and puts only a signed, random session id in the cookie:
+
+  redis   Any Redis-protocol server (Redis, Valkey, KeyDB) reachable by
+          every instance. Needs `pip install redis`.
+  sqlite  A local SQLite file. Shared by the processes of one machine
+          (gunicorn workers) and used for local multi-instance testing;
+          not for instances on different hosts.
+
+Exam progress (answers, attempt ids, timers) then stays on the server: the
+cookie does not grow with it, and clearing the session (logout) deletes it
+everywhere at once. Entries expire after PERMANENT_SESSION_LIFETIME. When the
+user behind a session changes (login, or a new email), the data moves to a
+fresh session id, so an id planted before login (session fixation) never
+becomes an authenticated one.
+"""
+
+import logging
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+from utils.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Session keys identifying the user (Flask-Login's user id, the app's email);
+# a change to any of them issues a new session id
+IDENTITY_KEYS = ('_user_id', 'user_email')
+
+
+class SessionStore(ABC):
+    """Key-value store for serialized sessions, with expiry"""
+
+    @abstractmethod
+    def get(self, sid: str) -> Optional[bytes]:
+        """Session data, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, sid: str, data: bytes, ttl: int) -> None:
+        """Store session data for *ttl* seconds"""
+
+    @abstractmethod
+    def touch(self, sid: str, ttl: int) -> None:
+        """Extend the expiry of an unchanged session"""
+
+    @abstractmethod
+    def delete(self, sid: str) -> None:
+        """Remove a session"""
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis (or any server speaking its protocol)"""
+
+    def __init__(self, url: str, prefix: str = 'celpip:session:'):
+        import redis  # optional dependency, only needed for SESSION_BACKEND=redis
+
+        # redis-py reconnects after fork, so a client created before gunicorn
+        # forks is safe to use in workers
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, sid: str) -> Optional[bytes]:
+        return self._client.get(self._prefix + sid)
+
+    def set(self, sid: str, data: bytes, ttl: int) -> None:
+        self._client.set(self._prefix + sid, data, ex=ttl)
+
+    def touch(self, sid: str, ttl: int) -> None:
+        self._client.expire(self._prefix + sid, ttl)
+
+    def delete(self, sid: str) -> None:
+        self._client.delete(self._prefix + sid)
+
+
+class SqliteSessionStore(SessionStore):
+    """Sessions in a SQLite file shared by the processes of one machine"""
+
+    # Expired rows are purged once every this many writes
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self):
+        # SQLite connections must not cross fork: open one per process
+        if self._pid != os.getpid():
+            import sqlite3  # only needed for SESSION_BACKEND=sqlite
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid        TEXT PRIMARY KEY,
+                    data       BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, sid: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT data FROM sessions WHERE sid = ? AND expires_at > ?', (sid, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid: str, data: bytes, ttl: int) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("""
+                INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at
+            """, (sid, data, time.time() + ttl))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),))
+
+    def touch(self, sid: str, ttl: int) -> None:
+        with self._lock:
+            self._connection().execute(
+                'UPDATE sessions SET expires_at = ? WHERE sid = ?', (time.time() + ttl, sid)
+            )
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._connection().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+
+class ServerSideSession(SecureCookieSession):
+    """Session whose data lives in a SessionStore under a random id"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = new
+        self.opened_identity = self.identity()
+
+    def identity(self) -> tuple:
+        # dict.get: reading through the session would mark it accessed
+        return tuple(dict.get(self, key) for key in IDENTITY_KEYS)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Signed session id in the cookie, session data in a SessionStore"""
+
+    serializer = TaggedJSONSerializer()
+    salt = 'server-side-session'
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def _signer(self, app) -> Optional[Signer]:
+        if not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        with span('session'):
+            signer = self._signer(app)
+            if signer is None:
+                return None
+            cookie = request.cookies.get(self.get_cookie_name(app))
+            if cookie:
+                try:
+                    sid = signer.unsign(cookie).decode('utf-8')
+                except BadSignature:
+                    sid = None
+                data = self.store.get(sid) if sid else None
+                if data is not None:
+                    try:
+                        return ServerSideSession(self.serializer.loads(data.decode('utf-8')), sid=sid)
+                    except ValueError:
+                        logger.warning("Discarding unreadable session %s", sid)
+            return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        with span('session'):
+            name = self.get_cookie_name(app)
+            domain = self.get_cookie_domain(app)
+            path = self.get_cookie_path(app)
+            secure = self.get_cookie_secure(app)
+            samesite = self.get_cookie_samesite(app)
+            httponly = self.get_cookie_httponly(app)
+
+            if session.accessed:
+                response.vary.add('Cookie')
+
+            if not session:
+                if session.modified:
+                    self.store.delete(session.sid)
+                    response.delete_cookie(
+                        name, domain=domain, path=path, secure=secure,
+                        samesite=samesite, httponly=httponly,
+                    )
+                    response.vary.add('Cookie')
+                return
+
+            if not self.should_set_cookie(app, session):
+                return
+
+            if not session.new and session.identity() != session.opened_identity:
+                # Logged in (or switched user): stop honouring the old id
+                self.store.delete(session.sid)
+                session.sid = secrets.token_urlsafe(32)
+                session.new = True
+
+            ttl = int(app.permanent_session_lifetime.total_seconds())
+            if session.modified or session.new:
+                self.store.set(session.sid, self.serializer.dumps(dict(session)).encode('utf-8'), ttl)
+            else:
+                self.store.touch(session.sid, ttl)
+
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode('utf-8'),
+                expires=self.get_expiration_time(app, session),
+                httponly=httponly, domain=domain, path=path,
+                secure=secure, samesite=samesite,
+            )
+            response.vary.add('Cookie')
+
+
+def init_sessions(app) -> Optional[SessionStore]:
+    """
+    Install the session backend configured in the environment on *app*
+
+    Call after Instrumentation(app), which installs the timed cookie interface.
+
+    Environment:
+        SESSION_BACKEND: 'cookie' (default), 'redis' or 'sqlite'
+        SESSION_REDIS_URL: Redis URL for 'redis' (default 'redis://localhost:6379/0')
+        SESSION_SQLITE_PATH: Database file for 'sqlite' (default 'instance/sessions.sqlite3')
+
+    Returns:
+        SessionStore or None: The store in use (None for cookie sessions)
+    """
+    backend = os.getenv('SESSION_BACKEND', 'cookie').lower()
+    if backend == 'cookie':
+        return None
+    if backend == 'redis':
+        store = RedisSessionStore(os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0'))
+    elif backend == 'sqlite':
+        store = SqliteSessionStore(
+            os.getenv('SESSION_SQLITE_PATH', os.path.join('instance', 'sessions.sqlite3'))
+        )
+    else:
+        raise RuntimeError(f"Unknown SESSION_BACKEND {backend!r} (expected cookie, redis or sqlite)")
+
+    if not os.getenv('SECRET_KEY'):
+        logger.warning("SECRET_KEY is not set: session cookies from other instances will be rejected")
+    app.session_interface = ServerSideSessionInterface(store)
+    return store
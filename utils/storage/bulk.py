@@ -0,0 +1,92 @@
+"""
+Merge rules for bulk imports, shared by every storage backend.
+
+Migrations and bulk transfers write many users at once through
+UserRepository.import_profiles and TestRepository.import_histories.  Both
+backends apply the same rules, so importing the same data twice, or into a
+user who already has data, gives the same result everywhere:
+
+  profiles   imported fields overwrite stored ones; fields the import
+             lacks (or sets to None) keep their stored value, and the
+             earlier created_at wins
+  histories  attempts are matched by attempt_id; an imported attempt
+             replaces the stored one with the same id, others are added
+
+The fingerprint helpers let a transfer check that two backends hold the
+same data. They hash what both backends store verbatim. Timestamp columns
+are left out: PostgreSQL normalizes them, so they read back differently.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+PROFILE_FIELDS = ("email", "role", "name", "provider", "picture")
+NOTE_FIELDS = ("note_id", "test_num", "skill", "part_num", "word", "definition", "context")
+
+
+def merge_profile(stored: Optional[Dict], imported: Dict) -> Dict:
+    """Return *stored* updated with the non-empty fields of *imported*."""
+    merged = dict(stored or {})
+    merged.update({key: value for key, value in imported.items() if value not in (None, "")})
+    created = [p["created_at"] for p in (stored or {}, imported) if p.get("created_at")]
+    if created:
+        merged["created_at"] = min(created)
+    if not merged.get("role"):
+        merged["role"] = "Basic"
+    return merged
+
+
+def _attempt_key(attempt: Dict) -> str:
+    # Attempts written before attempt ids existed are keyed by start time
+    return attempt.get("attempt_id") or attempt.get("started_at") or ""
+
+
+def merge_test(stored: Optional[Dict], imported: Dict, test_num: int) -> Dict:
+    """
+    Merge one test's history (``{"test_number", "attempts"}``).
+
+    Attempts keep their stored order; new ones are appended in import order.
+    """
+    merged = dict(stored or {})
+    merged["test_number"] = test_num
+    attempts = list(merged.get("attempts", []))
+    position = {_attempt_key(attempt): i for i, attempt in enumerate(attempts)}
+    for attempt in imported.get("attempts", []):
+        key = _attempt_key(attempt)
+        if key in position:
+            attempts[position[key]] = attempt
+        else:
+            position[key] = len(attempts)
+            attempts.append(attempt)
+    merged["attempts"] = attempts
+    return merged
+
+
+def parse_test_key(test_key) -> Optional[int]:
+    """Test number of a history key ('test_3' or 3), or None if it is not one."""
+    try:
+        return int(str(test_key).rsplit("_", 1)[-1])
+    except ValueError:
+        return None
+
+
+def fingerprint(value) -> str:
+    """SHA-256 of a value's canonical JSON."""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def profile_fingerprint(profile: Dict) -> str:
+    return fingerprint({field: profile.get(field) for field in PROFILE_FIELDS})
+
+
+def history_fingerprint(tests: Dict) -> str:
+    return fingerprint({f"test_{parse_test_key(key)}": value for key, value in tests.items()})
+
+
+def notes_fingerprint(notes: List[Dict]) -> str:
+    return fingerprint(sorted(
+        ([note.get(field) for field in NOTE_FIELDS] for note in notes),
+        key=lambda values: values[0],
+    ))
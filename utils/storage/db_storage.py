@@ -19,6 +19,12 @@ class DbUserRepository(UserRepository):
     def __init__(self, db: Database):
         self._db = db
 
+    def stats(self) -> Dict:
+        return self._db.stats()
+
+    def close(self) -> None:
+        self._db.close()
+
     def get(self, email: str) -> Dict:
         return self._db.get_user_profile(email)
 
@@ -34,11 +40,23 @@ class DbUserRepository(UserRepository):
     def list_all(self) -> List[str]:
         return self._db.list_all_users()
 
+    def import_profiles(self, profiles: List[Dict]) -> None:
+        self._db.import_user_profiles(profiles)
+
+    def export_profiles(self, emails: List[str]) -> List[Dict]:
+        return self._db.export_user_profiles(emails)
+
 
 class DbTestRepository(TestRepository):
     def __init__(self, db: Database):
         self._db = db
 
+    def stats(self) -> Dict:
+        return self._db.stats()
+
+    def close(self) -> None:
+        self._db.close()
+
     def save_result(
         self,
         user_email: str,
@@ -65,11 +83,23 @@ class DbTestRepository(TestRepository):
     def get_all_summary(self, user_email: str) -> Dict[int, Dict]:
         return self._db.get_all_tests_summary(user_email)
 
+    def import_histories(self, histories: Dict[str, Dict]) -> None:
+        self._db.import_test_histories(histories)
+
+    def export_histories(self, emails: List[str]) -> Dict[str, Dict]:
+        return self._db.export_test_histories(emails)
+
 
 class DbVocabularyRepository(VocabularyRepository):
     def __init__(self, db: Database):
         self._db = db
 
+    def stats(self) -> Dict:
+        return self._db.stats()
+
+    def close(self) -> None:
+        self._db.close()
+
     def save(
         self,
         user_email: str,
@@ -79,9 +109,11 @@ class DbVocabularyRepository(VocabularyRepository):
         word: str,
         definition: str,
         context: str = "",
+        note_id: Optional[str] = None,
     ) -> str:
         return self._db.save_vocabulary_note(
-            user_email, test_num, skill, part_num, word, definition, context
+            user_email, test_num, skill, part_num, word, definition, context,
+            note_id or self.new_note_id(test_num, skill, part_num),
         )
 
     def get(
@@ -105,3 +137,9 @@ class DbVocabularyRepository(VocabularyRepository):
         context: Optional[str] = None,
     ) -> bool:
         return self._db.update_vocabulary_note(user_email, note_id, word, definition, context)
+
+    def import_notes(self, notes: Dict[str, List[Dict]]) -> None:
+        self._db.import_vocabulary_notes(notes)
+
+    def export_notes(self, emails: List[str]) -> Dict[str, List[Dict]]:
+        return self._db.export_vocabulary_notes(emails)
@@ -2,7 +2,8 @@
 Storage factory.
 
 Decides which backend to use based on DATABASE_URL and returns the three
-repository instances the application needs.
+repository instances the application needs, wrapped in tracing proxies when
+STORAGE_TRACING is enabled.
 """
 
 import logging
@@ -10,6 +11,7 @@ import os
 from typing import Optional, Tuple
 
 from .interfaces import UserRepository, TestRepository, VocabularyRepository
+from .tracing import trace_repositories, tracing_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -17,32 +19,76 @@ logger = logging.getLogger(__name__)
 def make_repositories(
     users_dir: str = "users",
     database_url: Optional[str] = None,
+    backend: Optional[str] = None,
 ) -> Tuple[UserRepository, TestRepository, VocabularyRepository]:
     """
     Return (user_repo, test_repo, vocab_repo).
 
     Uses PostgreSQL when *database_url* (or the DATABASE_URL env var) is
     available and psycopg2 connects successfully; falls back to file storage.
+    With STORAGE_TRACING set, every repository call is traced (see tracing.py).
+
+    Tools that must not silently land on the wrong backend pass *backend*:
+    "file" ignores DATABASE_URL, "postgres" raises RuntimeError instead of
+    falling back.
     """
+    if backend == "file":
+        repos = _file_repositories(users_dir)
+    elif backend == "postgres":
+        repos = _db_repositories(database_url or os.getenv("DATABASE_URL"))
+        if repos is None:
+            raise RuntimeError("PostgreSQL storage requested but the database is not reachable")
+    elif backend is None:
+        repos = _backend_repositories(users_dir, database_url)
+    else:
+        raise ValueError(f"Unknown storage backend {backend!r} (expected 'file' or 'postgres')")
+    if tracing_enabled():
+        logger.info("Storage tracing enabled")
+        return trace_repositories(*repos)
+    return repos
+
+
+def _backend_repositories(
+    users_dir: str,
+    database_url: Optional[str],
+) -> Tuple[UserRepository, TestRepository, VocabularyRepository]:
     url = database_url or os.getenv("DATABASE_URL")
 
     if url:
-        try:
-            from utils.database import Database
-            from .db_storage import DbUserRepository, DbTestRepository, DbVocabularyRepository
-
-            db = Database(url)
-            if db.is_available:
-                logger.info("Storage backend: PostgreSQL")
-                return (
-                    DbUserRepository(db),
-                    DbTestRepository(db),
-                    DbVocabularyRepository(db),
-                )
-            logger.warning("DATABASE_URL set but connection failed — falling back to file storage")
-        except Exception as exc:
-            logger.warning("Could not initialise DB storage (%s) — falling back to file storage", exc)
+        repos = _db_repositories(url)
+        if repos is not None:
+            return repos
+        logger.warning("Falling back to file storage")
+
+    return _file_repositories(users_dir)
 
+
+def _db_repositories(
+    url: Optional[str],
+) -> Optional[Tuple[UserRepository, TestRepository, VocabularyRepository]]:
+    if not url:
+        return None
+    try:
+        from utils.database import Database
+        from .db_storage import DbUserRepository, DbTestRepository, DbVocabularyRepository
+
+        db = Database(url)
+        if db.is_available:
+            logger.info("Storage backend: PostgreSQL")
+            return (
+                DbUserRepository(db),
+                DbTestRepository(db),
+                DbVocabularyRepository(db),
+            )
+        logger.warning("DATABASE_URL set but connection failed")
+    except Exception as exc:
+        logger.warning("Could not initialise DB storage (%s)", exc)
+    return None
+
+
+def _file_repositories(
+    users_dir: str,
+) -> Tuple[UserRepository, TestRepository, VocabularyRepository]:
     from .file_storage import FileUserRepository, FileTestRepository, FileVocabularyRepository
 
     logger.info("Storage backend: file-based (%s)", users_dir)
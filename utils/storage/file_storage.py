@@ -3,16 +3,31 @@ File-based storage implementations.
 
 Used automatically when DATABASE_URL is not set (local development).
 Data is persisted as JSON files under users/{sanitized_email}/*.json.
+
+Files are replaced atomically, and every read-modify-write of a user's files
+holds that user's lock (a thread lock plus an flock on users/<user>/.lock),
+so several threads or gunicorn workers on one machine can write safely.
 """
 
 import json
 import logging
 import os
 import re
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List, Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows: thread locks only
+    fcntl = None
+
+from .bulk import merge_profile, merge_test, parse_test_key
 from .interfaces import UserRepository, TestRepository, VocabularyRepository
+from .summary import build_summary_entry, summarize_tests
 
 logger = logging.getLogger(__name__)
 
@@ -44,12 +59,51 @@ def _read_json(path: str, default):
 
 
 def _write_json(path: str, data) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = None
     try:
-        with open(path, "w", encoding="utf-8") as fh:
+        # Write a sibling temp file and rename it over the target, so readers
+        # never see a half-written file
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
             json.dump(data, fh, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        tmp_path = None
     except Exception as exc:
+        # Raise so the caller (or the background writer's retry) sees the failure
         logger.error("Error writing %s: %s", path, exc)
+        raise
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# A fixed set of lock stripes, hashed by user folder, rather than one lock per
+# user kept for the life of the process. Users sharing a stripe only wait on
+# each other inside this process; flock stays per user.
+_LOCK_STRIPES = 64
+_thread_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+@contextmanager
+def _user_lock(users_dir: str, email: str):
+    """Hold a user's lock for a read-modify-write, across threads and processes."""
+    folder = _user_folder(users_dir, email)
+    os.makedirs(folder, exist_ok=True)
+    lock = _thread_locks[zlib.crc32(folder.encode("utf-8")) % _LOCK_STRIPES]
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(folder, ".lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
 
 
 # ---------------------------------------------------------------------------
@@ -61,6 +115,9 @@ class FileUserRepository(UserRepository):
         self._dir = users_dir
         os.makedirs(users_dir, exist_ok=True)
 
+    def stats(self) -> Dict:
+        return {"backend": "file", "users_dir": self._dir}
+
     def _profile_path(self, email: str) -> str:
         return os.path.join(_user_folder(self._dir, email), "profile.json")
 
@@ -76,20 +133,21 @@ class FileUserRepository(UserRepository):
         )
 
     def save(self, email: str, profile: Dict) -> None:
-        _write_json(self._profile_path(email), profile)
+        with _user_lock(self._dir, email):
+            _write_json(self._profile_path(email), profile)
 
     def get_or_create(self, email: str) -> Dict:
-        folder = _user_folder(self._dir, email)
-        os.makedirs(folder, exist_ok=True)
-        profile = self.get(email)
-        profile["last_accessed"] = datetime.now().isoformat()
-        self.save(email, profile)
+        with _user_lock(self._dir, email):
+            profile = self.get(email)
+            profile["last_accessed"] = datetime.now().isoformat()
+            _write_json(self._profile_path(email), profile)
         return profile
 
     def update_role(self, email: str, role: str) -> None:
-        profile = self.get(email)
-        profile["role"] = role
-        self.save(email, profile)
+        with _user_lock(self._dir, email):
+            profile = self.get(email)
+            profile["role"] = role
+            _write_json(self._profile_path(email), profile)
 
     def list_all(self) -> List[str]:
         users = []
@@ -104,6 +162,25 @@ class FileUserRepository(UserRepository):
                     users.append(data["email"])
         return users
 
+    def import_profiles(self, profiles: List[Dict]) -> None:
+        now = datetime.now().isoformat()
+        for imported in profiles:
+            email = imported["email"]
+            with _user_lock(self._dir, email):
+                path = self._profile_path(email)
+                profile = merge_profile(_read_json(path, default=None), imported)
+                profile.setdefault("created_at", now)
+                profile.setdefault("last_accessed", now)
+                _write_json(path, profile)
+
+    def export_profiles(self, emails: List[str]) -> List[Dict]:
+        profiles = []
+        for email in emails:
+            profile = _read_json(self._profile_path(email), default=None)
+            if profile is not None:
+                profiles.append(profile)
+        return profiles
+
 
 # ---------------------------------------------------------------------------
 # TestRepository
@@ -113,6 +190,9 @@ class FileTestRepository(TestRepository):
     def __init__(self, users_dir: str = "users"):
         self._dir = users_dir
 
+    def stats(self) -> Dict:
+        return {"backend": "file", "users_dir": self._dir}
+
     def _history_path(self, email: str) -> str:
         return os.path.join(_user_folder(self._dir, email), "test_history.json")
 
@@ -122,6 +202,21 @@ class FileTestRepository(TestRepository):
     def _persist(self, email: str, history: Dict) -> None:
         _write_json(self._history_path(email), history)
 
+    def _summary_path(self, email: str) -> str:
+        return os.path.join(_user_folder(self._dir, email), "test_summary.json")
+
+    def _load_summary(self, email: str) -> Optional[Dict[int, Dict]]:
+        data = _read_json(self._summary_path(email), default=None)
+        if data is None:
+            return None
+        return {int(k): v for k, v in data.get("tests", {}).items()}
+
+    def _persist_summary(self, email: str, summary: Dict[int, Dict]) -> None:
+        _write_json(
+            self._summary_path(email),
+            {"tests": {str(k): v for k, v in sorted(summary.items())}},
+        )
+
     def save_result(
         self,
         user_email: str,
@@ -134,64 +229,93 @@ class FileTestRepository(TestRepository):
         max_score: int,
         attempt_id: str,
     ) -> None:
-        history = self._load(user_email)
-        test_key = f"test_{test_num}"
-
-        history["tests"].setdefault(
-            test_key,
-            {"test_number": test_num, "attempts": []},
-        )
-
-        attempts = history["tests"][test_key]["attempts"]
-        attempt = next((a for a in attempts if a["attempt_id"] == attempt_id), None)
-        if attempt is None:
-            attempt = {
-                "attempt_id": attempt_id,
-                "started_at": datetime.now().isoformat(),
-                "completed_at": None,
-                "skills": {},
+        with _user_lock(self._dir, user_email):
+            history = self._load(user_email)
+            test_key = f"test_{test_num}"
+
+            history["tests"].setdefault(
+                test_key,
+                {"test_number": test_num, "attempts": []},
+            )
+
+            attempts = history["tests"][test_key]["attempts"]
+            attempt = next((a for a in attempts if a["attempt_id"] == attempt_id), None)
+            if attempt is None:
+                attempt = {
+                    "attempt_id": attempt_id,
+                    "started_at": datetime.now().isoformat(),
+                    "completed_at": None,
+                    "skills": {},
+                }
+                attempts.append(attempt)
+
+            attempt["skills"].setdefault(
+                skill,
+                {"skill_name": skill, "parts": {}, "total_score": 0, "total_max": 0},
+            )
+            attempt["skills"][skill]["parts"][str(part_num)] = {
+                "part_number": part_num,
+                "answers": answers,
+                "correct_answers": correct_answers,
+                "score": score,
+                "max_score": max_score,
+                "timestamp": datetime.now().isoformat(),
             }
-            attempts.append(attempt)
-
-        attempt["skills"].setdefault(
-            skill,
-            {"skill_name": skill, "parts": {}, "total_score": 0, "total_max": 0},
-        )
-        attempt["skills"][skill]["parts"][str(part_num)] = {
-            "part_number": part_num,
-            "answers": answers,
-            "correct_answers": correct_answers,
-            "score": score,
-            "max_score": max_score,
-            "timestamp": datetime.now().isoformat(),
-        }
 
-        skill_data = attempt["skills"][skill]
-        skill_data["total_score"] = sum(p["score"] for p in skill_data["parts"].values())
-        skill_data["total_max"] = sum(p["max_score"] for p in skill_data["parts"].values())
+            skill_data = attempt["skills"][skill]
+            skill_data["total_score"] = sum(p["score"] for p in skill_data["parts"].values())
+            skill_data["total_max"] = sum(p["max_score"] for p in skill_data["parts"].values())
 
-        self._persist(user_email, history)
+            self._persist(user_email, history)
 
     def complete_attempt(self, user_email: str, test_num: int, attempt_id: str) -> None:
-        history = self._load(user_email)
-        test_key = f"test_{test_num}"
-
-        if test_key not in history["tests"]:
-            return
-
-        for attempt in history["tests"][test_key]["attempts"]:
-            if attempt["attempt_id"] == attempt_id:
-                attempt["completed_at"] = datetime.now().isoformat()
-                total_score = sum(s["total_score"] for s in attempt["skills"].values())
-                total_max = sum(s["total_max"] for s in attempt["skills"].values())
-                attempt["total_score"] = total_score
-                attempt["total_max"] = total_max
-                attempt["percentage"] = (
-                    round(total_score / total_max * 100, 1) if total_max > 0 else 0
-                )
-                break
-
-        self._persist(user_email, history)
+        with _user_lock(self._dir, user_email):
+            history = self._load(user_email)
+            test_key = f"test_{test_num}"
+
+            if test_key not in history["tests"]:
+                return
+
+            completed_attempt = None
+            was_completed = False
+            for attempt in history["tests"][test_key]["attempts"]:
+                if attempt["attempt_id"] == attempt_id:
+                    was_completed = bool(attempt.get("completed_at"))
+                    attempt["completed_at"] = datetime.now().isoformat()
+                    total_score = sum(s["total_score"] for s in attempt["skills"].values())
+                    total_max = sum(s["total_max"] for s in attempt["skills"].values())
+                    attempt["total_score"] = total_score
+                    attempt["total_max"] = total_max
+                    attempt["percentage"] = (
+                        round(total_score / total_max * 100, 1) if total_max > 0 else 0
+                    )
+                    completed_attempt = attempt
+                    break
+
+            self._persist(user_email, history)
+
+            if completed_attempt is not None:
+                self._update_summary(user_email, test_num, completed_attempt, was_completed, history)
+
+    def _update_summary(
+        self,
+        user_email: str,
+        test_num: int,
+        attempt: Dict,
+        was_completed: bool,
+        history: Dict,
+    ) -> None:
+        """Fold a freshly completed attempt into the per-user summary."""
+        summary = self._load_summary(user_email)
+        if summary is None:
+            # First completion since the summary file was introduced — the
+            # history we just persisted already contains this attempt.
+            summary = summarize_tests(history["tests"])
+        else:
+            previous = summary.get(test_num, {}).get("attempt_count", 0)
+            count = previous if was_completed else previous + 1
+            summary[test_num] = build_summary_entry(attempt, max(count, 1))
+        self._persist_summary(user_email, summary)
 
     def get_history(self, user_email: str, test_num: int) -> Dict:
         history = self._load(user_email)
@@ -211,24 +335,39 @@ class FileTestRepository(TestRepository):
         }
 
     def get_all_summary(self, user_email: str) -> Dict[int, Dict]:
-        history = self._load(user_email)
-        summary: Dict[int, Dict] = {}
-
-        for test_data in history["tests"].values():
-            test_num = test_data["test_number"]
-            completed = [a for a in test_data["attempts"] if a.get("completed_at")]
-            if completed:
-                latest = max(completed, key=lambda x: x["completed_at"])
-                summary[test_num] = {
-                    "attempt_count": len(completed),
-                    "latest_score": latest.get("total_score", 0),
-                    "latest_max": latest.get("total_max", 0),
-                    "latest_percentage": latest.get("percentage", 0),
-                    "latest_date": latest.get("completed_at", ""),
-                }
-
+        summary = self._load_summary(user_email)
+        if summary is not None:
+            return summary
+
+        # Legacy user without a summary file: rebuild it once from history.
+        with _user_lock(self._dir, user_email):
+            history = self._load(user_email)
+            summary = summarize_tests(history["tests"])
+            self._persist_summary(user_email, summary)
         return summary
 
+    def import_histories(self, histories: Dict[str, Dict]) -> None:
+        for email, tests in histories.items():
+            with _user_lock(self._dir, email):
+                history = self._load(email)
+                for test_key, imported in tests.items():
+                    test_num = parse_test_key(test_key)
+                    if test_num is None:
+                        logger.warning("Skipping unrecognised test key %r for %s", test_key, email)
+                        continue
+                    key = f"test_{test_num}"
+                    history["tests"][key] = merge_test(history["tests"].get(key), imported, test_num)
+                self._persist(email, history)
+                self._persist_summary(email, summarize_tests(history["tests"]))
+
+    def export_histories(self, emails: List[str]) -> Dict[str, Dict]:
+        histories = {}
+        for email in emails:
+            tests = self._load(email)["tests"]
+            if tests:
+                histories[email] = tests
+        return histories
+
 
 # ---------------------------------------------------------------------------
 # VocabularyRepository
@@ -238,6 +377,9 @@ class FileVocabularyRepository(VocabularyRepository):
     def __init__(self, users_dir: str = "users"):
         self._dir = users_dir
 
+    def stats(self) -> Dict:
+        return {"backend": "file", "users_dir": self._dir}
+
     def _notes_path(self, email: str) -> str:
         return os.path.join(_user_folder(self._dir, email), "vocabulary_notes.json")
 
@@ -256,30 +398,35 @@ class FileVocabularyRepository(VocabularyRepository):
         word: str,
         definition: str,
         context: str = "",
+        note_id: Optional[str] = None,
     ) -> str:
-        notes = self._load(user_email)
-        test_key = f"test_{test_num}"
-        skill_key = f"{skill}_part_{part_num}"
-
-        notes["tests"].setdefault(test_key, {})
-        notes["tests"][test_key].setdefault(skill_key, [])
-
-        note_id = f"{test_num}_{skill}_{part_num}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
-        notes["tests"][test_key][skill_key].append(
-            {
-                "note_id": note_id,
-                "word": word.strip(),
-                "definition": definition.strip(),
-                "context": context.strip(),
-                "created_at": datetime.now().isoformat(),
-                "test_num": test_num,
-                "skill": skill,
-                "part_num": part_num,
-            }
-        )
+        with _user_lock(self._dir, user_email):
+            notes = self._load(user_email)
+            test_key = f"test_{test_num}"
+            skill_key = f"{skill}_part_{part_num}"
+
+            notes["tests"].setdefault(test_key, {})
+            notes["tests"][test_key].setdefault(skill_key, [])
+
+            note_id = note_id or self.new_note_id(test_num, skill, part_num)
+            if any(note["note_id"] == note_id for note in notes["tests"][test_key][skill_key]):
+                # Already saved (a background retry or replay of this note)
+                return note_id
+            notes["tests"][test_key][skill_key].append(
+                {
+                    "note_id": note_id,
+                    "word": word.strip(),
+                    "definition": definition.strip(),
+                    "context": context.strip(),
+                    "created_at": datetime.now().isoformat(),
+                    "test_num": test_num,
+                    "skill": skill,
+                    "part_num": part_num,
+                }
+            )
 
-        self._persist(user_email, notes)
-        return note_id
+            self._persist(user_email, notes)
+            return note_id
 
     def get(
         self,
@@ -305,15 +452,16 @@ class FileVocabularyRepository(VocabularyRepository):
         return all_notes
 
     def delete(self, user_email: str, note_id: str) -> bool:
-        notes = self._load(user_email)
-        for test_data in notes.get("tests", {}).values():
-            for skill_key, note_list in test_data.items():
-                for i, note in enumerate(note_list):
-                    if note.get("note_id") == note_id:
-                        del note_list[i]
-                        self._persist(user_email, notes)
-                        return True
-        return False
+        with _user_lock(self._dir, user_email):
+            notes = self._load(user_email)
+            for test_data in notes.get("tests", {}).values():
+                for skill_key, note_list in test_data.items():
+                    for i, note in enumerate(note_list):
+                        if note.get("note_id") == note_id:
+                            del note_list[i]
+                            self._persist(user_email, notes)
+                            return True
+            return False
 
     def update(
         self,
@@ -323,18 +471,41 @@ class FileVocabularyRepository(VocabularyRepository):
         definition: Optional[str] = None,
         context: Optional[str] = None,
     ) -> bool:
-        notes = self._load(user_email)
-        for test_data in notes.get("tests", {}).values():
-            for note_list in test_data.values():
-                for note in note_list:
-                    if note.get("note_id") == note_id:
-                        if word is not None:
-                            note["word"] = word.strip()
-                        if definition is not None:
-                            note["definition"] = definition.strip()
-                        if context is not None:
-                            note["context"] = context.strip()
-                        note["updated_at"] = datetime.now().isoformat()
-                        self._persist(user_email, notes)
-                        return True
-        return False
+        with _user_lock(self._dir, user_email):
+            notes = self._load(user_email)
+            for test_data in notes.get("tests", {}).values():
+                for note_list in test_data.values():
+                    for note in note_list:
+                        if note.get("note_id") == note_id:
+                            if word is not None:
+                                note["word"] = word.strip()
+                            if definition is not None:
+                                note["definition"] = definition.strip()
+                            if context is not None:
+                                note["context"] = context.strip()
+                            note["updated_at"] = datetime.now().isoformat()
+                            self._persist(user_email, notes)
+                            return True
+            return False
+
+    def import_notes(self, notes: Dict[str, List[Dict]]) -> None:
+        for email, imported in notes.items():
+            with _user_lock(self._dir, email):
+                stored = self._load(email)
+                replaced = {note["note_id"] for note in imported}
+                for test_data in stored["tests"].values():
+                    for skill_key, note_list in test_data.items():
+                        test_data[skill_key] = [n for n in note_list if n.get("note_id") not in replaced]
+                for note in imported:
+                    test_key = f"test_{note['test_num']}"
+                    skill_key = f"{note['skill']}_part_{note['part_num']}"
+                    stored["tests"].setdefault(test_key, {}).setdefault(skill_key, []).append(dict(note))
+                self._persist(email, stored)
+
+    def export_notes(self, emails: List[str]) -> Dict[str, List[Dict]]:
+        exported = {}
+        for email in emails:
+            notes = self.get(email)
+            if notes:
+                exported[email] = notes
+        return exported
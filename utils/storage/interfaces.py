@@ -8,6 +8,7 @@ them directly — always go through the factory.
 """
 
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import Dict, List, Optional
 
 
@@ -38,6 +39,26 @@ class UserRepository(ABC):
     def list_all(self) -> List[str]:
         """Return a list of all known email addresses."""
 
+    @abstractmethod
+    def import_profiles(self, profiles: List[Dict]) -> None:
+        """
+        Upsert many profiles at once (migrations, bulk transfers).
+
+        Each profile must contain "email"; merged with any stored profile
+        by utils.storage.bulk.merge_profile.
+        """
+
+    @abstractmethod
+    def export_profiles(self, emails: List[str]) -> List[Dict]:
+        """Return the stored profiles of *emails* (unknown emails are left out)."""
+
+    def stats(self) -> Dict:
+        """Return backend statistics for monitoring (e.g. connection pool usage)."""
+        return {}
+
+    def close(self) -> None:
+        """Release backend connections; they are reopened lazily on next use."""
+
 
 # ---------------------------------------------------------------------------
 # Test history
@@ -68,7 +89,7 @@ class TestRepository(ABC):
         test_num: int,
         attempt_id: str,
     ) -> None:
-        """Mark an attempt as completed and compute its totals."""
+        """Mark an attempt as completed, compute its totals and update the summary."""
 
     @abstractmethod
     def get_history(self, user_email: str, test_num: int) -> Dict:
@@ -76,7 +97,34 @@ class TestRepository(ABC):
 
     @abstractmethod
     def get_all_summary(self, user_email: str) -> Dict[int, Dict]:
-        """Return a summary dict keyed by test number."""
+        """Return the per-test summary (attempt count, latest score) keyed by test number."""
+
+    @abstractmethod
+    def import_histories(self, histories: Dict[str, Dict]) -> None:
+        """
+        Merge many users' test histories at once (migrations, bulk transfers).
+
+        *histories* maps email -> ``{"test_N": {"test_number", "attempts"}}``.
+        Attempts are merged by utils.storage.bulk.merge_test and the summary
+        of every imported test is rebuilt.  Users must already exist
+        (import_profiles first).
+        """
+
+    @abstractmethod
+    def export_histories(self, emails: List[str]) -> Dict[str, Dict]:
+        """
+        Return the full stored histories of *emails*, in import_histories' format.
+
+        Unlike get_history, unfinished attempts are included.  Users without
+        history are left out.
+        """
+
+    def stats(self) -> Dict:
+        """Return backend statistics for monitoring (e.g. connection pool usage)."""
+        return {}
+
+    def close(self) -> None:
+        """Release backend connections; they are reopened lazily on next use."""
 
 
 # ---------------------------------------------------------------------------
@@ -86,6 +134,11 @@ class TestRepository(ABC):
 class VocabularyRepository(ABC):
     """Manages per-user vocabulary notes."""
 
+    @staticmethod
+    def new_note_id(test_num: int, skill: str, part_num: int) -> str:
+        """Return a fresh note_id (callers may generate it up front to defer the save)."""
+        return f"{test_num}_{skill}_{part_num}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
     @abstractmethod
     def save(
         self,
@@ -96,8 +149,14 @@ class VocabularyRepository(ABC):
         word: str,
         definition: str,
         context: str = "",
+        note_id: Optional[str] = None,
     ) -> str:
-        """Persist a new note and return its generated note_id."""
+        """
+        Persist a new note and return its note_id (generated unless *note_id* is given).
+
+        Saving a note_id that is already stored does nothing, so a deferred
+        save can safely be retried.
+        """
 
     @abstractmethod
     def get(
@@ -123,3 +182,23 @@ class VocabularyRepository(ABC):
         context: Optional[str] = None,
     ) -> bool:
         """Update fields of an existing note.  Returns True if found."""
+
+    @abstractmethod
+    def import_notes(self, notes: Dict[str, List[Dict]]) -> None:
+        """
+        Upsert many users' notes at once (bulk transfers).
+
+        *notes* maps email -> notes as returned by get().  A note replaces the
+        stored note with the same note_id.  Users must already exist.
+        """
+
+    @abstractmethod
+    def export_notes(self, emails: List[str]) -> Dict[str, List[Dict]]:
+        """Return every note of *emails* (users without notes are left out)."""
+
+    def stats(self) -> Dict:
+        """Return backend statistics for monitoring (e.g. connection pool usage)."""
+        return {}
+
+    def close(self) -> None:
+        """Release backend connections; they are reopened lazily on next use."""
@@ -0,0 +1,34 @@
+"""
+Per-user test summary helpers shared by every storage backend.
+
+The home page only needs, for each test, how many attempts were completed
+and the score of the latest one.  Backends keep that record up to date
+incrementally in complete_attempt; these helpers define its shape and
+rebuild it from a full history for users created before it existed.
+"""
+
+from typing import Dict
+
+
+def build_summary_entry(attempt: Dict, attempt_count: int) -> Dict:
+    """Return the summary record for a test whose latest attempt is *attempt*."""
+    return {
+        "attempt_count": attempt_count,
+        "latest_score": attempt.get("total_score", 0),
+        "latest_max": attempt.get("total_max", 0),
+        "latest_percentage": attempt.get("percentage", 0),
+        "latest_date": attempt.get("completed_at", ""),
+    }
+
+
+def summarize_tests(tests: Dict) -> Dict[int, Dict]:
+    """Rebuild the summary from a full ``{"test_N": {...}}`` history mapping."""
+    summary: Dict[int, Dict] = {}
+
+    for test_data in tests.values():
+        completed = [a for a in test_data.get("attempts", []) if a.get("completed_at")]
+        if completed:
+            latest = max(completed, key=lambda x: x["completed_at"])
+            summary[test_data["test_number"]] = build_summary_entry(latest, len(completed))
+
+    return summary
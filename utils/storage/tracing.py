@@ -0,0 +1,171 @@
+"""
+Storage-operation tracing.
+
+When STORAGE_TRACING is enabled the factory wraps each repository in a
+TracingRepository proxy that records, per backend / repository / method:
+call count, latency, errors and payload size (JSON bytes in and out), plus
+storage time per route.  Calls slower than STORAGE_SLOW_MS are logged.
+The numbers are exposed through the repositories' stats() and /metrics,
+so file vs PostgreSQL cost can be compared route by route in production
+without code changes.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+def tracing_enabled() -> bool:
+    """Whether STORAGE_TRACING asks for traced repositories."""
+    return os.getenv("STORAGE_TRACING", "").lower() in ("1", "true", "yes", "on")
+
+
+def _payload_size(value) -> int:
+    """Approximate serialized size of a value in bytes."""
+    if value is None:
+        return 0
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _current_route() -> str:
+    """Route rule of the current request, or '<none>' outside requests."""
+    try:
+        from flask import has_request_context, request
+    except ImportError:
+        return "<none>"
+    if has_request_context() and request.url_rule is not None:
+        return f"{request.method} {request.url_rule.rule}"
+    return "<none>"
+
+
+class StorageTracer:
+    """Thread-safe accumulator of per-operation storage statistics."""
+
+    def __init__(self, slow_ms: float = 100.0):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        # (backend, repository, method) -> counters
+        self._ops = defaultdict(lambda: {
+            "count": 0, "seconds": 0.0, "max_seconds": 0.0,
+            "errors": 0, "bytes_in": 0, "bytes_out": 0,
+        })
+        # (backend, route) -> [count, seconds]
+        self._routes = defaultdict(lambda: [0, 0.0])
+
+    def record(self, backend, repository, method, seconds, failed, bytes_in, bytes_out):
+        route = _current_route()
+        with self._lock:
+            op = self._ops[(backend, repository, method)]
+            op["count"] += 1
+            op["seconds"] += seconds
+            op["max_seconds"] = max(op["max_seconds"], seconds)
+            op["errors"] += failed
+            op["bytes_in"] += bytes_in
+            op["bytes_out"] += bytes_out
+            per_route = self._routes[(backend, route)]
+            per_route[0] += 1
+            per_route[1] += seconds
+
+        if seconds * 1000 >= self.slow_ms:
+            logger.warning(
+                "Slow storage call %s.%s [%s] took %.1f ms (route %s, %d bytes in, %d bytes out)",
+                repository, method, backend, seconds * 1000, route, bytes_in, bytes_out,
+            )
+
+    def snapshot(self) -> Dict:
+        """
+        Return a copy of the collected statistics.
+
+        Returns:
+            dict: {"operations": {(backend, repository, method): {...}},
+                   "routes": {(backend, route): {"count", "seconds"}}}
+        """
+        with self._lock:
+            return {
+                "operations": {key: dict(value) for key, value in self._ops.items()},
+                "routes": {
+                    key: {"count": count, "seconds": seconds}
+                    for key, (count, seconds) in self._routes.items()
+                },
+            }
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> StorageTracer:
+    """Process-wide tracer shared by every traced repository."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = StorageTracer(slow_ms=float(os.getenv("STORAGE_SLOW_MS", 100)))
+        return _tracer
+
+
+class TracingRepository:
+    """
+    Proxy around a repository that traces every public method call.
+
+    Attribute access is forwarded to the wrapped repository, so the proxy
+    satisfies the same interface as the repository it wraps.
+    """
+
+    def __init__(self, inner, repository: str, tracer: StorageTracer):
+        self._inner = inner
+        self._repository = repository
+        self._tracer = tracer
+        self._backend = inner.stats().get("backend", type(inner).__name__)
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if name.startswith("_") or name in ("stats", "close", "new_note_id") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            failed = False
+            result = None
+            try:
+                result = attr(*args, **kwargs)
+                return result
+            except Exception:
+                failed = True
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                self._tracer.record(
+                    self._backend, self._repository, name, seconds, failed,
+                    _payload_size([args, kwargs] if kwargs else list(args)),
+                    _payload_size(result),
+                )
+
+        # Cache on the instance so __getattr__ runs once per method
+        self.__dict__[name] = traced
+        return traced
+
+    def stats(self) -> Dict:
+        stats = dict(self._inner.stats())
+        stats["trace"] = self._tracer.snapshot()
+        return stats
+
+
+def trace_repositories(user_repo, test_repo, vocab_repo):
+    """Wrap the three repositories in tracing proxies sharing one tracer."""
+    tracer = get_tracer()
+    return (
+        TracingRepository(user_repo, "users", tracer),
+        TracingRepository(test_repo, "tests", tracer),
+        TracingRepository(vocab_repo, "vocabulary", tracer),
+    )